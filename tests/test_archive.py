@@ -0,0 +1,79 @@
+""" Tests for archival and retention of batch log directories.
+"""
+import datetime
+import os
+
+from vcs.model import archive
+from vcs.model import log
+
+
+def _make_batch(logging_path, timestamp, size=10):
+    batch_dir = log.batch_dir(str(logging_path), timestamp)
+    os.makedirs(os.path.join(batch_dir, 'transactions'))
+    with open(os.path.join(batch_dir, 'device0_x.png'), 'wb') as fref:
+        fref.write(bytes(size))
+    with open(os.path.join(batch_dir, 'measurements.log'), 'w', encoding='utf-8') as fref:
+        fref.write('{}')
+    return batch_dir
+
+
+def test_archive_old_batches(tmp_path):
+    """ Test that only batches past the archive age are archived, skipping those in use, and
+    that single images can be read back from the archive.
+    """
+    old = _make_batch(tmp_path, '20240101T080000')
+    in_use = _make_batch(tmp_path, '20240102T080000')
+    recent = _make_batch(tmp_path, '20240110T080000')
+
+    archiver = archive.Archiver(str(tmp_path), archive_after_days=7)
+    created, deleted = archiver.run(exclude=[in_use], now=datetime.datetime(2024, 1, 12))
+
+    assert created == [archive.get_archive_path(old)], created
+    assert deleted == [], deleted
+    assert not os.path.exists(old)
+    assert os.path.isdir(in_use) and os.path.isdir(recent)
+
+    archive_path = created[0]
+    assert sorted(archive.list_members(archive_path)) == \
+        ['device0_x.png', 'measurements.log'], archive.list_members(archive_path)
+    assert archive.read_member(archive_path, 'device0_x.png') == bytes(10)
+
+
+def test_retention_limits(tmp_path):
+    """ Test that archives are deleted oldest first when past the age or size limits.
+    """
+    for day in range(1, 5):
+        archive.archive_batch(_make_batch(tmp_path, f'2024010{day}T080000', size=1000))
+    size = os.path.getsize(archive.get_archive_path(log.batch_dir(str(tmp_path),
+                                                                  '20240104T080000')))
+
+    archiver = archive.Archiver(str(tmp_path), archive_after_days=7, retention_days=10,
+                                retention_bytes=2 * size)
+    deleted = archiver.apply_retention(now=datetime.datetime(2024, 1, 11, 12))
+
+    remaining = [path for _, path, _ in archive.find_archives(str(tmp_path))]
+    assert [os.path.basename(path) for path in deleted] == [
+        'VCU_Test_BatchLogs_20240101T080000.zip',
+        'VCU_Test_BatchLogs_20240102T080000.zip',
+    ], deleted
+    assert len(remaining) == 2, remaining
+
+
+def test_remove_partial_archives(tmp_path):
+    """ Test that partial archives left by an interrupted pass are removed by the retention
+    pass, leaving complete archives and their batch directories alone.
+    """
+    batch_dir = _make_batch(tmp_path, '20240101T080000')
+    archive_path = archive.archive_batch(_make_batch(tmp_path, '20240102T080000'))
+    partial_path = archive.get_archive_path(batch_dir) + archive.PARTIAL_EXTENSION
+    with open(partial_path, 'wb') as fref:
+        fref.write(bytes(10))
+
+    archiver = archive.Archiver(str(tmp_path), archive_after_days=7)
+    deleted = archiver.apply_retention(now=datetime.datetime(2024, 1, 3))
+
+    assert deleted == [], deleted
+    assert not os.path.exists(partial_path)
+    assert os.path.isfile(archive_path) and os.path.isdir(batch_dir)
+    created, _ = archiver.run(now=datetime.datetime(2024, 1, 12))
+    assert created == [archive.get_archive_path(batch_dir)], created
@@ -0,0 +1,145 @@
+""" Tests for boot detection using synthetic supply current profiles.
+"""
+import random
+import subprocess
+import sys
+
+import numpy as np
+
+from vcs.model import application
+from vcs.model import boot
+
+PERIOD = .1
+
+
+def _jetson_profile(boot_time=20.0, steady_current=.6, duration=40.0, seed=0):
+    """ Current drawn by a booting Jetson: an inrush spike, a noisy boot, then a steady state.
+    """
+    generator = random.Random(seed)
+    samples = []
+    for step in range(int(duration / PERIOD)):
+        elapsed = step * PERIOD
+        if elapsed < .5:
+            current = 0.0
+        elif elapsed < .7:
+            current = 1.2
+        elif elapsed < boot_time:
+            current = generator.uniform(.3, 1.0)
+        else:
+            current = steady_current + generator.gauss(0, .005)
+        samples.append((elapsed, current))
+    return samples
+
+
+def _detect(samples, profile=None, current_limit=1.5):
+    detector = boot.BootDetector(profile or boot.BootProfile(), current_limit)
+    for elapsed, current in samples:
+        result = detector.add(elapsed, current)
+        if result is not None:
+            return result
+    return None
+
+
+def test_normal_boot():
+    """ Test that the steady state is recognized once the current has settled.
+    """
+    result = _detect(_jetson_profile(boot_time=20.0))
+    assert result.booted and result.reason is None, result
+    assert 22.5 <= result.elapsed <= 23.5, result
+    assert abs(result.steady_current - .6) < .01, result
+
+
+def test_anomalous_boots():
+    """ Test that faulty units are flagged without waiting for the boot timeout.
+    """
+    result = _detect([(step * PERIOD, 0.0) for step in range(100)])
+    assert not result.booted and result.fatal and result.elapsed < 5.5, result
+
+    # Current limiting during inrush is expected, but not for longer than overcurrent_time.
+    samples = _jetson_profile()
+    samples[50] = (samples[50][0], 1.5)
+    result = _detect(samples)
+    assert result.booted, result
+    for step in range(50, 56):
+        samples[step] = (samples[step][0], 1.5)
+    result = _detect(samples)
+    assert result.fatal and 'overcurrent' in result.reason, result
+    assert abs(result.elapsed - 5.5) < .05, result
+
+    result = _detect(_jetson_profile(steady_current=1.42))
+    assert not result.booted and not result.fatal and 'out of range' in result.reason, result
+
+    profile = boot.BootProfile(boot_timeout=30.0)
+    result = _detect(_jetson_profile(boot_time=60.0, duration=60.0), profile)
+    assert not result.booted and result.reason == 'current did not settle', result
+    assert 30.0 < result.elapsed < 30.5, result
+
+
+class DummySampler():
+    """ Stand-in for a running TelemetrySampler, releasing a few samples per poll.
+    """
+    def __init__(self, samples):
+        self._rows = np.zeros((len(samples), 10), dtype=np.float32)
+        for row, (elapsed, current) in zip(self._rows, samples):
+            row[0] = elapsed
+            row[2] = current
+        self.elapsed = 0.0
+
+
+    def read_since(self, index):
+        """ Returns the samples up to the current time.
+        """
+        count = int(np.searchsorted(self._rows[:, 0], self.elapsed, side='right'))
+        return self._rows[index:count], count
+
+
+def test_wait_for_boot():
+    """ Test that waiting follows the sampler until the unit has booted, timed from the end of
+    the power on sequence.
+    """
+    # Samples taken during a 2 s power on sequence are ignored.
+    sequence = [(step * PERIOD, 1.5) for step in range(20)]
+    sampler = DummySampler(sequence + [
+        (elapsed + 2.0, current) for elapsed, current in _jetson_profile(boot_time=10.0)])
+    def sleep(seconds):
+        sampler.elapsed += seconds
+    result = boot.wait_for_boot(sampler, boot.BootProfile(), current_limit=1.5, start=2.0,
+                                sleep=sleep)
+    assert result.booted, result
+    assert abs(sampler.elapsed - 2.0 - result.elapsed) <= .2, (sampler.elapsed, result)
+
+
+def test_default_profile():
+    """ Test that the default setting matches the profile, without the settings loading the
+    power supply drivers.
+    """
+    values = application._DefaultSettings().boot_profile      #pylint: disable=protected-access
+    assert boot.load_profile(values) == boot.BootProfile(), values
+
+    loaded = subprocess.run(
+        [sys.executable, '-c', 'import sys, vcs.model.application; '
+         'print(sorted({"pyvisa", "serial", "util.power_supply"} & set(sys.modules)))'],
+        capture_output=True, text=True, check=True).stdout.strip()
+    assert loaded == '[]', loaded
+
+
+def test_monitor_ready():
+    """ Test that waiting until ready stops once the unit has drawn power for the minimum boot
+    time, well before the current settles, and fails fast on overcurrent.
+    """
+    sampler = DummySampler(_jetson_profile(boot_time=30.0))
+    def sleep(seconds):
+        sampler.elapsed += seconds
+    monitor = boot.BootMonitor(sampler, boot.BootProfile(), current_limit=1.5)
+    assert monitor.wait(until_ready=True, sleep=sleep) is None
+    assert monitor.ready and 5.5 <= sampler.elapsed <= 5.7, sampler.elapsed
+    assert monitor.poll() is None
+
+    samples = _jetson_profile()
+    for step in range(20, 30):
+        samples[step] = (samples[step][0], 1.5)
+    sampler = DummySampler(samples)
+    monitor = boot.BootMonitor(sampler, boot.BootProfile(), current_limit=1.5)
+    result = monitor.wait(until_ready=True, sleep=sleep)
+    assert result.fatal and 'overcurrent' in result.reason, result
+    assert not monitor.ready
@@ -1,5 +1,5 @@
 
-from vcs.model.camera import Camera, assign_images_to_cameras
+from vcs.model.camera import Camera, assign_images_to_cameras, assign_image_paths, get_sensor_ids
 
 
 def test_camera_report_message():
@@ -64,3 +64,18 @@ def test_camera_has_expected_images():
 
     assert camera_with_serial_number.has_expected_images is True
     assert camera_without_serial_number.has_expected_images is False
+
+
+def test_retest_sensor_lookup():
+    """ Test that failed cameras map back to their sensor ids and that images downloaded for
+    those sensors are assigned to the expected cameras only.
+    """
+    cameras = [Camera(index, '') for index in range(8)]
+    camera_to_device_lookup = {0:3, 1:4, 2:5, 3:6, 4:7, 5:0, 6:1, 7:2}
+
+    sensor_ids = get_sensor_ids([cameras[0], cameras[6]], camera_to_device_lookup)
+    assert sensor_ids == [3, 5], sensor_ids
+
+    assign_image_paths(cameras, ['foo/device5_20220101T000000.png'], camera_to_device_lookup)
+    assert cameras[0].images == ['foo/device5_20220101T000000.png'], cameras[0].images
+    assert all(not camera.images for camera in cameras[1:])
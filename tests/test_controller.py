@@ -0,0 +1,228 @@
+""" Tests for the test executive controller state machine.
+"""
+#pylint: disable=protected-access
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from util import power_supply
+from vcs.control import controller
+from vcs.model import application
+from vcs.model import images
+from vcs.model import log
+from vcs.model import messages
+from vcs.model.bgstates import BGStates
+from vcs.model.camera import Camera
+from vcs.model.resources import VCSResources
+
+
+class DummyVCU():
+    """ Stand-in for the VCU, writing an empty image for every sensor captured.
+    """
+    def __init__(self):
+        self.captures = []
+
+
+    def capture_images(self, sensor_ids=None):
+        """ Record the sensors captured.
+        """
+        self.captures.append(sensor_ids)
+
+
+    def download_images(self, batch_dir, sensor_ids=None):
+        """ Write an image for each sensor, returning their paths.
+        """
+        paths = []
+        for sensor_id in range(8) if sensor_ids is None else sensor_ids:
+            path = os.path.join(batch_dir, f'device{sensor_id}_20220101T000000.png')
+            with open(path, 'wb'):
+                pass
+            paths.append(path)
+        return paths
+
+
+def _get_idle_controller(tmp_path, monkeypatch):
+    """ Returns a controller whose background worker has stopped, so states can be driven
+    directly by the test.
+    """
+    monkeypatch.setattr(application.settings.values, 'logging_path', str(tmp_path))
+    executor = controller.ExecutorController(None, lambda _: None, lambda: None)
+    while not executor.running:
+        time.sleep(.001)
+    executor.running = False
+    executor.worker.join()
+    return executor
+
+
+def _get_controller(tmp_path, monkeypatch):
+    monkeypatch.setattr(application.settings.values, 'process_images_enabled', True)
+    executor = _get_idle_controller(tmp_path, monkeypatch)
+    executor._equipment = SimpleNamespace(
+        vcu=DummyVCU(), camera_list=[Camera(index, f'sn{index}') for index in range(8)])
+    executor.camera_position_lookup = {index:index for index in range(8)}
+    executor._session.reserve()
+    log.makedirs(executor._batch_dir)
+    return executor
+
+
+def test_retest_failed_camera(tmp_path, monkeypatch):
+    """ Test that a camera failing assessment is recaptured and re-scored on its own.
+    """
+    executor = _get_controller(tmp_path, monkeypatch)
+    scored = []
+    def evaluate_camera_images(camera, _):
+        scored.append(camera.index)
+        status = not (camera.index == 2 and scored.count(2) == 1)
+        camera.set_status(status)
+        return status, {}
+    monkeypatch.setattr(images, 'Baselines', lambda _: None)
+    monkeypatch.setattr(images, 'evaluate_camera_images', evaluate_camera_images)
+
+    states = []
+    executor.state = BGStates.ACQUIRE_IMAGES
+    while executor.state is not BGStates.CLEANUP:
+        states.append(executor.state)
+        if executor.state is BGStates.WAITING:
+            executor.resume(True)
+        else:
+            controller.fsm.handlers[executor.state](executor)
+
+    assert states == [
+        BGStates.ACQUIRE_IMAGES, BGStates.PROCESS_IMAGES, BGStates.REVIEW, BGStates.WAITING,
+        BGStates.REVIEW, BGStates.RETEST, BGStates.REVIEW], states
+    assert executor.system.vcu.captures == [None, [2]], executor.system.vcu.captures
+    assert scored == list(range(8)) + [2], scored
+    assert executor._session.failures == [], executor._session.failures
+    assert executor._session.get_report()['retests'] == 1, executor._session.get_report()
+
+
+def test_error_closes_report(tmp_path, monkeypatch):
+    """ Test that an error in a state closes the streamed report and the power supplies
+    before returning to IDLE.
+    """
+    executor = _get_controller(tmp_path, monkeypatch)
+    def capture_images(sensor_ids=None):
+        raise RuntimeError(sensor_ids)
+    executor.system.vcu.capture_images = capture_images
+    closed = []
+    executor.system.close_power_supplies = lambda: closed.append(True)
+    executor._session.stream_report(os.path.join(executor._batch_dir, 'measurements.jsonl'))
+    stream = executor._session._stream
+
+    executor.state = BGStates.ACQUIRE_IMAGES
+    thread = threading.Thread(target=executor._main)
+    thread.start()
+    while executor.state is not BGStates.IDLE:
+        time.sleep(.001)
+    executor.running = False
+    thread.join()
+    assert executor._session._stream is None
+    assert stream._file.closed
+    assert closed == [True], closed
+
+
+def _get_resources(vcu_number):
+    return VCSResources(serial_numbers=[], enable_transaction_log=False, deserializer_lookup={},
+                        operator_name='test', start_time='', vcu_number=vcu_number)
+
+
+def test_clear_queue(tmp_path, monkeypatch):
+    """ Test that units removed from the queue leave nothing in the logging directory, and a
+    unit's batch directory is only created as it starts.
+    """
+    executor = _get_idle_controller(tmp_path, monkeypatch)
+    for vcu_number in ('1', '2'):
+        executor.enqueue(_get_resources(vcu_number))
+    jobs = list(executor._jobs)
+    executor.clear_queue()
+    for job in jobs:
+        job.future.result()
+    assert executor.queue_length == 0
+    assert os.listdir(tmp_path) == [], os.listdir(tmp_path)
+
+    executor.enqueue(_get_resources('3'))
+    executor._activate(executor._next_job())
+    assert executor.state is BGStates.SETUP, executor.state
+    assert os.listdir(tmp_path) == [os.path.basename(executor._batch_dir)], os.listdir(tmp_path)
+    executor._log_handler.close()
+    executor._preparer.shutdown()
+
+
+class DummySampler():
+    """ Stand-in for a running TelemetrySampler, with the VCU drawing a constant current.
+    """
+    def __init__(self, current, on_read=lambda: None):
+        self.elapsed = 0.0
+        self._current = current
+        self._on_read = on_read
+
+
+    def read_since(self, index):
+        """ Returns a sample for each poll.
+        """
+        self._on_read()
+        self.elapsed += .1
+        row = np.zeros((1, 10), dtype=np.float32)
+        row[0, 0], row[0, 2] = self.elapsed, self._current
+        return row, index + 1
+
+
+def _get_connecting_controller(tmp_path, monkeypatch, sampler):
+    executor = _get_controller(tmp_path, monkeypatch)
+    connects = []
+    executor.system.vcu.connect = lambda: connects.append(sampler.elapsed)
+    executor.system.vcu.get_boot_time = lambda: 1.0
+    executor.system.start_telemetry = lambda rate, capacity: sampler
+    executor.system.enable_supply = lambda: []
+    executor._vcresources = _get_resources('1')
+    executor.state = BGStates.CONNECTING
+    return executor, connects
+
+
+def test_connect_once_powered(tmp_path, monkeypatch):
+    """ Test that connecting starts once the unit has drawn power for the minimum boot time,
+    without waiting for the current to settle.
+    """
+    monkeypatch.setattr(application.settings.values, 'boot_profile',
+                        {'min_boot_time':.5, 'steady_tolerance':0.0})
+    sampler = DummySampler(.6)
+    executor, connects = _get_connecting_controller(tmp_path, monkeypatch, sampler)
+    controller.fsm.handlers[executor.state](executor)
+    assert len(connects) == 1 and connects[0] < 1.0, connects
+    assert executor.state is BGStates.CAMERA_CHECK, executor.state
+
+
+def test_cancel_while_connecting(tmp_path, monkeypatch):
+    """ Test that cancelling while waiting for the unit to draw power stops connecting.
+    """
+    executor = None
+    def cancel():
+        executor._cancelled = True
+    sampler = DummySampler(.6, on_read=cancel)
+    executor, connects = _get_connecting_controller(tmp_path, monkeypatch, sampler)
+    controller.fsm.handlers[executor.state](executor)
+    assert connects == [], connects
+    assert executor.state is BGStates.CONNECTING, executor.state
+
+
+def test_multiple_supplies_prompt(tmp_path, monkeypatch):
+    """ Test that finding more than one power supply asks the operator, naming the supplies.
+    """
+    executor = _get_controller(tmp_path, monkeypatch)
+    fingerprints = [{'backend':'bk', 'resource':f'USB0::{index}::INSTR',
+                     'identity':f'B&K Precision,9140,{index},1.0'} for index in (1, 2)]
+    def setup():
+        raise power_supply.MultipleSupplies(fingerprints)
+    executor.system.setup = setup
+    posted = []
+    executor.worker.post = posted.append
+    executor.state = BGStates.SETUP
+    controller.fsm.handlers[executor.state](executor)
+    assert executor.state is BGStates.WAITING, executor.state
+    prompts = [message for message in posted if isinstance(message, messages.Prompt)]
+    assert len(prompts) == 1, posted
+    assert 'USB0::1::INSTR' in prompts[0].details and 'USB0::2::INSTR' in prompts[0].details, \
+        prompts[0].details
@@ -0,0 +1,61 @@
+""" Tests for organizing the system equipment.
+"""
+#pylint: disable=protected-access
+from util.power_supply import adapters
+from util.power_supply import instrument
+from vcs.model.equipment import Equipment
+from vcs.model.resources import VCSResources
+
+
+class DummyDriver():                                    #pylint: disable=too-few-public-methods
+    """ Stand-in for a power supply driver recording whether it was closed.
+    """
+    def __init__(self):
+        self.closed = False
+
+
+    def close(self):
+        """ Record the close.
+        """
+        self.closed = True
+
+
+def _get_equipment():
+    resources = VCSResources(serial_numbers=[], enable_transaction_log=False,
+                             deserializer_lookup={}, operator_name='test', start_time='',
+                             vcu_number='1')
+    return Equipment(resources, None)
+
+
+def _get_used_equipment(adapter):
+    equipment = _get_equipment()
+    driver = DummyDriver()
+    equipment._power_supplies = [instrument.AsyncSupply(adapter(driver))]
+    return equipment, driver
+
+
+def test_reuse_power_supplies():
+    """ Test that detected supplies are adopted by the next unit, until they are closed.
+    """
+    previous, driver = _get_used_equipment(adapters.AmetekSupply)
+    equipment = _get_equipment()
+    equipment.reuse_power_supplies(previous)
+    assert equipment.power_supplies == previous.power_supplies
+    assert not driver.closed
+
+    equipment.close_power_supplies()
+    assert equipment.power_supplies == [] and driver.closed
+    following = _get_equipment()
+    following.reuse_power_supplies(equipment)
+    assert following.power_supplies == []
+
+
+def test_manual_supply_not_reused():
+    """ Test that the manual fallback is closed rather than adopted, so the next unit detects
+    the supply again.
+    """
+    previous, driver = _get_used_equipment(adapters.ManualSupply)
+    equipment = _get_equipment()
+    equipment.reuse_power_supplies(previous)
+    assert equipment.power_supplies == [], equipment.power_supplies
+    assert previous.power_supplies == [] and driver.closed
@@ -0,0 +1,34 @@
+""" Tests for exporting the logging directory.
+"""
+import os
+
+from vcs.model import export
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as fref:
+        fref.write(content)
+
+
+def test_incremental_export(tmp_path):
+    """ Test that only new or changed files are copied by later exports, and that the copies
+    match their sources.
+    """
+    source = str(tmp_path / 'logs')
+    destination = str(tmp_path / 'drive')
+    _write(os.path.join(source, 'batch1', 'device0.png'), b'a' * 1000)
+    _write(os.path.join(source, 'batch1', 'measurements.log'), b'{}')
+
+    first = export.export_logs(source, destination, workers=2)
+    assert (first.files, first.skipped, first.bytes) == (2, 0, 1002), first
+    assert first.failures == [], first.failures
+
+    _write(os.path.join(source, 'batch2', 'device0.png'), b'b' * 10)
+    second = export.export_logs(source, destination, workers=2)
+    assert (second.files, second.skipped) == (1, 2), second
+
+    copy = os.path.join(destination, 'batch2', 'device0.png')
+    assert export.hash_file(copy) == \
+        export.load_manifest(destination)['files']['batch2/device0.png']['sha256']
+    assert export.export_logs(source, destination).files == 0
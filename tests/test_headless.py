@@ -0,0 +1,102 @@
+""" Tests for the headless runner.
+"""
+import collections
+import io
+import json
+
+from vcs.control import headless
+from vcs.model import application
+from vcs.model import messages
+from vcs.model.bgstates import BGStates
+
+
+def test_read_unit_queue(tmp_path):
+    """ Test that units are read in order, with blank rows skipped and defaults applied.
+    """
+    path = tmp_path / 'queue.csv'
+    path.write_text(
+        'vcu_number,operator_name,serial_numbers\n'
+        '101,alice,SN1; SN2;;\n'
+        '\n'
+        ',,\n'
+        '102,,\n'
+        '103\n'
+        '104,bob,SN3,extra\n',
+        encoding='utf-8')
+    units = headless.read_unit_queue(str(path), 'default')
+    assert units == [
+        headless.UnitRequest('alice', '101', ['SN1', 'SN2']),
+        headless.UnitRequest('default', '102', []),
+        headless.UnitRequest('default', '103', []),
+        headless.UnitRequest('bob', '104', ['SN3']),
+    ], units
+
+
+class DummyController():
+    """ Stand-in for ExecutorController, running each queued unit on the next poll.
+
+    Units with a VCU number of 'fail' fail, and each unit asks a question before completing.
+    """
+    def __init__(self, parent, update, final):             #pylint: disable=unused-argument
+        self._update = update
+        self._pending = collections.deque()
+        self.worker = self
+        self.answers = []
+        self.statistics = {}
+        self.shut_down = False
+
+
+    def enqueue(self, resources):
+        """ Queue a unit.
+        """
+        self._pending.append(resources)
+
+
+    def poll(self, timeout=None):                           #pylint: disable=unused-argument
+        """ Run the next queued unit.
+        """
+        if not self._pending:
+            return
+        resources = self._pending.popleft()
+        self._update(messages.StateChanged(BGStates.SETUP))
+        self._update(messages.Ask('Retest failed cameras?', ''))
+        result = 'FAIL' if resources.vcu_number == 'fail' else 'PASS'
+        self._update(messages.UnitComplete('batch', result, ['camera'] if result == 'FAIL' else []))
+        self._update(messages.StateChanged(BGStates.IDLE))
+
+
+    def resume(self, value):
+        """ Record an answer.
+        """
+        self.answers.append(value)
+
+
+    def shutdown(self):
+        """ Record the shutdown.
+        """
+        self.shut_down = True
+
+
+def test_headless_runner(tmp_path, monkeypatch):
+    """ Test that every unit is run and reported, answering questions by policy.
+    """
+    monkeypatch.setattr(headless, 'ExecutorController', DummyController)
+    stream = io.StringIO()
+    results_path = tmp_path / 'results.jsonl'
+    runner = headless.HeadlessRunner(
+        application.MapperForVCUTest, answer_ask=True, results_path=str(results_path),
+        stream=stream)
+
+    statistics = runner.run([headless.UnitRequest('alice', number) for number in
+                             ('1', 'fail', '3')])
+    assert runner.controller.shut_down
+    assert runner.controller.answers == [True, True, True], runner.controller.answers
+    assert (statistics['units'], statistics['passed'], statistics['failed']) == (3, 2, 1), \
+        statistics
+
+    results = [json.loads(line) for line in results_path.read_text().splitlines()]
+    assert [(result['unit'], result['vcu_number'], result['result']) for result in results] == \
+        [(1, '1', 'PASS'), (2, 'fail', 'FAIL'), (3, '3', 'PASS')], results
+    assert results[1]['failures'] == ['camera'], results
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert lines[:3] == results and 'statistics' in lines[3], lines
@@ -0,0 +1,56 @@
+""" Tests for the shared decoded-image cache.
+"""
+import numpy as np
+
+from vcs.model.image_cache import ImageCache
+
+
+def _write(path, value):
+    with open(path, 'w', encoding='utf-8') as fref:
+        fref.write(value)
+
+
+def test_image_cache_decodes_once(tmp_path):
+    """ Test that repeated reads of an unchanged file are served from the cache, and that
+    changing the file causes it to be decoded again.
+    """
+    calls = []
+    def loader(path):
+        calls.append(path)
+        with open(path, encoding='utf-8') as fref:
+            return np.full((2, 2), int(fref.read()), dtype=np.uint8)
+
+    path = str(tmp_path / 'image.png')
+    _write(path, '1')
+    cache = ImageCache(loader=loader)
+
+    first = cache.read(path)
+    second = cache.read(path)
+    assert first is second
+    assert len(calls) == 1, calls
+    assert first.flags.writeable is False
+
+    _write(path, '22')
+    assert cache.read(path)[0, 0] == 22
+    assert len(calls) == 2, calls
+
+
+def test_image_cache_evicts_least_recently_used(tmp_path):
+    """ Test that the cache stays within its memory limit by discarding the least recently
+    used images.
+    """
+    paths = []
+    for index in range(3):
+        paths.append(str(tmp_path / f'image{index}.png'))
+        _write(paths[-1], '')
+
+    cache = ImageCache(max_bytes=200, loader=lambda _: np.zeros(100, dtype=np.uint8))
+    cache.read(paths[0])
+    cache.read(paths[1])
+    cache.read(paths[0])
+    cache.read(paths[2])
+
+    assert cache.nbytes == 200, cache.nbytes
+    assert paths[0] in cache
+    assert paths[1] not in cache
+    assert paths[2] in cache
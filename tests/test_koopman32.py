@@ -0,0 +1,51 @@
+""" Tests for the Koopman CRC-32.
+"""
+import random
+
+import numpy as np
+
+from util.koopman32 import INITIAL_VALUE, Koopman32, crc
+
+
+def _reference(data):
+    """ Bit at a time CRC, used as the reference implementation.
+    """
+    value = INITIAL_VALUE
+    for byte in data:
+        value ^= byte << 24
+        for _ in range(8):
+            if value & 0x80000000:
+                value = ((value << 1) ^ 0x741B8CD7) & 0xffffffff
+            else:
+                value = (value << 1) & 0xffffffff
+    return value
+
+
+def test_crc_matches_reference():
+    """ Test the CRC of short messages and of messages long enough to be vectorized.
+    """
+    generator = random.Random(0)
+    for size in (0, 1, 7, 4095, 4096, 100003):
+        data = generator.randbytes(size)
+        assert crc(data) == _reference(data), size
+    assert crc([1, 2, 3]) == _reference(b'\x01\x02\x03')
+
+
+def test_incremental_update():
+    """ Test that updating in pieces of any size and type gives the same CRC.
+    """
+    generator = random.Random(1)
+    data = generator.randbytes(1024 * 1024 + 300000)
+    expected = crc(data)
+
+    checksum = Koopman32()
+    offset = 0
+    while offset < len(data):
+        size = generator.choice((1, 3, 5000, 70000))
+        checksum.update(memoryview(data)[offset:offset + size])
+        offset += size
+    assert checksum.value == expected, checksum.hexdigest()
+
+    copy = Koopman32(bytearray(data[:1000])).copy()
+    copy.update(np.frombuffer(data[1000:], dtype=np.uint8))
+    assert copy.digest() == expected.to_bytes(4, 'big'), copy.hexdigest()
@@ -0,0 +1,41 @@
+""" Tests for the queue-based logging pipeline.
+"""
+import logging
+import logging.handlers
+import queue
+
+from vcs.model import log
+
+
+def _read(path):
+    with open(path, encoding='utf-8') as fref:
+        return fref.read()
+
+
+def test_listener_swaps_handlers_in_order(tmp_path):
+    """ Test that records queued before a handler swap are written to the previous handlers,
+    and that the previous handlers are closed once swapped out.
+    """
+    listener = log.LogListener(queue.SimpleQueue(), flush_interval=60)
+    first = log.create_file_handler(str(tmp_path / 'first.log'))
+    second = log.create_file_handler(str(tmp_path / 'second.log'))
+    logger = logging.getLogger('test_log')
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(logging.handlers.QueueHandler(listener.queue))
+    listener.set_handlers([first])
+    listener.start()
+    try:
+        logger.warning('one')
+        listener.set_handlers([second])
+        logger.info('two')
+        listener.flush()
+    finally:
+        listener.stop()
+        listener.set_handlers([])
+        log.close(logger)
+
+    assert 'one' in _read(first.baseFilename)
+    assert 'two' not in _read(first.baseFilename)
+    assert 'two' in _read(second.baseFilename)
+    assert first.stream is None
@@ -0,0 +1,549 @@
+""" Tests for the BK Precision power supply sequencing.
+"""
+#pylint: disable=protected-access
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from util import power_supply
+from util.power_supply import adapters, ametek_power_supply, bk_power_supply, discovery, pacing
+from util.power_supply import manual_power_supply, sequence, sorensen_power_supply, telemetry
+from util.power_supply.errors import NotDetected
+from util.power_supply.bk_power_supply import ChannelSetting, OperationFailed
+from util.power_supply.instrument import AsyncSupply, InstrumentThread, PRIORITY_POLL
+
+
+class DummyInstrument():
+    """ Stand-in for a VISA resource that interprets the subset of SCPI used by the supply.
+    """
+    def __init__(self):
+        self.channel = 0
+        self.channels = {channel:['0.000,0.000', False] for channel in range(3)}
+        self.writes = []
+        self.queries = []
+
+
+    def _execute(self, command) -> list[str]:
+        if command.startswith('INST '):
+            self.channel = int(command[5:])
+        elif command.startswith('APPL '):
+            voltage, current = command[5:].split(',')
+            self.channels[self.channel][0] = f'{float(voltage):.3f},{float(current):.3f}'
+        elif command in ('OUTP ON', 'OUTP OFF'):
+            self.channels[self.channel][1] = command == 'OUTP ON'
+        elif command == 'APPL?':
+            return [self.channels[self.channel][0]]
+        elif command == 'OUTP?':
+            return ['1' if self.channels[self.channel][1] else '0']
+        return []
+
+
+    def write(self, program):
+        """ Run each command of a program.
+        """
+        self.writes.append(program)
+        for command in program.split(';'):
+            self._execute(command)
+
+
+    def query(self, program):
+        """ Run each command of a program, returning the responses joined as per SCPI.
+        """
+        self.queries.append(program)
+        responses = []
+        for command in program.split(';'):
+            responses.extend(self._execute(command))
+        return ';'.join(responses) + '\n'
+
+
+class DummyClock():
+    """ Simulated monotonic clock, where sleeping and writing to the instrument take time.
+    """
+    def __init__(self, instrument, write_time):
+        self.now = 100.0
+        write = instrument.write
+        def timed_write(program):
+            self.now += write_time
+            write(program)
+        instrument.write = timed_write
+
+
+    def __call__(self):
+        return self.now
+
+
+    def sleep(self, seconds):
+        """ Advance the clock.
+        """
+        self.now += seconds
+
+
+def _get_power(instrument):
+    power = bk_power_supply.Power.__new__(bk_power_supply.Power)
+    power._vi = instrument
+    power.lock = threading.RLock()
+    return power
+
+
+def _get_supply(instrument):
+    return AsyncSupply(adapters.BKSupply(_get_power(instrument)))
+
+
+def test_compile_outputs():
+    """ Test that channels without a delay share a program.
+    """
+    settings = [
+        ChannelSetting(0, 0.0, 1.5, False, .1),
+        ChannelSetting(1, 0.0, 3.0, False),
+        ChannelSetting(2, 0.0, 3.0, False),
+    ]
+    assert bk_power_supply.compile_outputs(settings) == [
+        ('INST 0;APPL 0.0,1.5;OUTP OFF', .1),
+        ('INST 1;APPL 0.0,3.0;OUTP OFF;INST 2;APPL 0.0,3.0;OUTP OFF', 0.0),
+    ]
+    assert bk_power_supply.compile_verification(settings) == \
+        'INST 0;APPL?;OUTP?;INST 1;APPL?;OUTP?;INST 2;APPL?;OUTP?;INST 0'
+
+
+def test_apply_settings():
+    """ Test that enabling and disabling the channels is verified with one query per phase.
+    """
+    instrument = DummyInstrument()
+    power = _get_power(instrument)
+    power.apply_settings([
+        ChannelSetting(0, 12.0, 1.5, True),
+        ChannelSetting(1, 5.0, 3.0, True),
+        ChannelSetting(2, 3.3, 3.0, True),
+    ])
+    assert instrument.channels == {
+        0:['12.000,1.500', True],
+        1:['5.000,3.000', True],
+        2:['3.300,3.000', True],
+        }, instrument.channels
+    assert len(instrument.queries) == 2, instrument.queries
+    assert instrument.channel == 0
+
+    power.apply_settings([ChannelSetting(channel, 0.0, 3.0, False) for channel in range(3)])
+    assert not any(enabled for _, enabled in instrument.channels.values()), instrument.channels
+    assert len(instrument.queries) == 3, instrument.queries
+
+
+def test_apply_settings_verification_failure():
+    """ Test that no output is enabled if a channel does not accept its settings.
+    """
+    instrument = DummyInstrument()
+    execute = instrument._execute
+    instrument._execute = lambda command: \
+        execute('APPL 0,0' if command == 'APPL 5.0,3.0' else command)
+    power = _get_power(instrument)
+    with pytest.raises(OperationFailed):
+        power.apply_settings([
+            ChannelSetting(0, 12.0, 1.5, True),
+            ChannelSetting(1, 5.0, 3.0, True),
+        ])
+    assert not any(enabled for _, enabled in instrument.channels.values()), instrument.channels
+
+
+RECIPE = [
+    {'channel':0, 'voltage':12.0, 'current':1.5},
+    {'channel':1, 'voltage':5.0, 'current':3.0, 'delay':0.5},
+    {'channel':2, 'voltage':3.3, 'current':3.0},
+]
+
+
+def test_power_sequence():
+    """ Test that steps are scheduled from the previous step, with steps that have no delay
+    switched in the same program.
+    """
+    instrument = DummyInstrument()
+    clock = DummyClock(instrument, write_time=.01)
+    sequencer = sequence.PowerSequencer(
+        sequence.load_recipe(RECIPE), tolerance=.05, clock=clock, sleep=clock.sleep)
+    timings = sequencer.run(_get_supply(instrument))
+
+    assert [(timing.channel, round(timing.gap, 3)) for timing in timings] == [
+        (0, .01), (1, .51), (2, 0.0)], timings
+    assert instrument.writes[1:] == ['INST 0;OUTP ON', 'INST 1;OUTP ON;INST 2;OUTP ON'], \
+        instrument.writes
+    assert all(enabled for _, enabled in instrument.channels.values()), instrument.channels
+
+
+def test_power_sequence_tolerance():
+    """ Test that a sequence completes but fails when a step runs later than its tolerance.
+    """
+    instrument = DummyInstrument()
+    clock = DummyClock(instrument, write_time=.2)
+    recipe = sequence.load_recipe(RECIPE)
+    sequencer = sequence.PowerSequencer(recipe, tolerance=.1, clock=clock, sleep=clock.sleep)
+    with pytest.raises(sequence.SequenceError) as error:
+        sequencer.run(_get_supply(instrument))
+    assert [timing.channel for timing in error.value.violations] == [0, 1], error.value
+    assert all(enabled for _, enabled in instrument.channels.values()), instrument.channels
+
+    with pytest.raises(ValueError):
+        sequence.load_recipe([{'channel':0, 'voltage':1.0, 'current':1.0, 'delay':-1}])
+
+
+class DummySupply(adapters.Supply):
+    """ Stand-in supply returning a fixed set of measurements.
+    """
+    channels = 3
+
+    def __init__(self):
+        super().__init__(None)
+        self.reads = 0
+
+
+    def read_all_channels(self):
+        """ Returns the current of the first channel rising with each read.
+        """
+        self.reads += 1
+        return [12.0, self.reads, 12.0 * self.reads, 5.0, .5, 2.5, 3.3, .1, .33]
+
+
+def test_telemetry_ring_buffer(tmp_path):
+    """ Test that the oldest samples are overwritten and samples are saved oldest first.
+    """
+    sampler = telemetry.TelemetrySampler(AsyncSupply(DummySupply()), capacity=4)
+    for index in range(6):
+        sampler.add(index, [index] * 9)
+    samples = sampler.samples
+    assert samples[:, 0].tolist() == [2, 3, 4, 5], samples
+
+    path = str(tmp_path / 'telemetry.npy')
+    sampler.save(path)
+    assert np.array_equal(np.load(path), samples)
+    summary = sampler.summary()
+    assert summary['samples'] == 6, summary
+    assert summary['CH3']['power'] == {'mean':3.5, 'min':2.0, 'max':5.0}, summary
+
+
+def test_telemetry_sampling():
+    """ Test that samples are taken in the background and skipped while the supply is busy.
+    """
+    supply = DummySupply()
+    busy = threading.Event()
+    async_supply = AsyncSupply(supply)
+    sampler = telemetry.TelemetrySampler(async_supply, rate=200)
+    command = async_supply.submit(busy.wait)
+    sampler.start()
+    while sampler.skipped < 2:
+        time.sleep(.001)
+    busy.set()
+    command.result()
+    while sampler.summary()['samples'] < 5:
+        time.sleep(.001)
+    sampler.stop()
+
+    summary = sampler.summary()
+    assert summary['samples'] == supply.reads, summary
+    assert summary['CH1']['current']['max'] == supply.reads, summary
+    assert summary['CH2']['voltage']['mean'] == 5.0, summary
+
+
+class SlowSupply(DummySupply):
+    """ Stand-in supply taking longer than a sampling period to read.
+    """
+    def read_all_channels(self):
+        time.sleep(.05)
+        return super().read_all_channels()
+
+
+def test_telemetry_slow_read():
+    """ Test that a read slower than one period is waited on, not counted as an error and
+    queued again.
+    """
+    supply = SlowSupply()
+    async_supply = AsyncSupply(supply)
+    sampler = telemetry.TelemetrySampler(async_supply, rate=100)
+    sampler.start()
+    while sampler.summary()['samples'] < 3:
+        time.sleep(.001)
+    sampler.stop()
+    async_supply.close()
+
+    summary = sampler.summary()
+    assert summary['errors'] == 0, summary
+    assert summary['skipped'] > 0, summary
+    assert supply.reads <= summary['samples'] + 1, (supply.reads, summary)
+
+
+def test_instrument_thread():
+    """ Test that commands run ahead of waiting polls, and errors are returned by the futures.
+    """
+    thread = InstrumentThread()
+    thread.start()
+    busy = threading.Event()
+    order = []
+    thread.submit(busy.wait)
+    polls = [thread.submit(order.append, 'poll', priority=PRIORITY_POLL) for _ in range(2)]
+    command = thread.submit(order.append, 'command')
+    failure = thread.submit(int, 'x')
+    busy.set()
+    command.result()
+    for poll in polls:
+        poll.result()
+    assert order == ['command', 'poll', 'poll'], order
+    with pytest.raises(ValueError):
+        failure.result()
+
+    thread.stop()
+    assert not thread.is_alive()
+    with pytest.raises(RuntimeError):
+        thread.submit(order.append, 'late')
+
+
+class DummyVisaSupply():                                #pylint: disable=too-few-public-methods
+    """ Stand-in for bk_power_supply.Power that takes a while to identify.
+    """
+    IDENTITIES = {'USB0::1::INSTR':'B&K Precision,9140,111,1.0', 'USB0::2::INSTR':'Other,1,2,3'}
+    opened = []
+
+    def __init__(self, resource_name, resource_manager=None):   #pylint: disable=unused-argument
+        time.sleep(.2)
+        self.opened.append(resource_name)
+        self.identity = self.IDENTITIES[resource_name]
+
+
+    def close(self):
+        """ Nothing to close.
+        """
+
+
+class DummySerialSupply(DummyVisaSupply):               #pylint: disable=too-few-public-methods
+    """ Stand-in for ametek_power_supply.Power where no supply is attached.
+    """
+    def __init__(self, port_name):                      #pylint: disable=super-init-not-called
+        time.sleep(.2)
+        self.opened.append(port_name)
+        raise NotDetected(port_name)
+
+
+class DummyResourceManager():                            #pylint: disable=too-few-public-methods
+    """ Stand-in for pyvisa.ResourceManager recording whether it was closed.
+    """
+    closed = False
+
+    def close(self):
+        """ Record the close.
+        """
+        DummyResourceManager.closed = True
+
+
+def test_discovery(monkeypatch):
+    """ Test that all resources are probed concurrently, and a known supply is opened directly.
+    """
+    monkeypatch.setattr(bk_power_supply, 'Power', DummyVisaSupply)
+    monkeypatch.setattr(ametek_power_supply, 'Power', DummySerialSupply)
+    monkeypatch.setattr(discovery.pyvisa, 'ResourceManager', DummyResourceManager)
+    monkeypatch.setattr(
+        discovery, '_list_visa_resources', lambda _: list(DummyVisaSupply.IDENTITIES))
+    monkeypatch.setattr(discovery, '_list_serial_ports', lambda: ['COM1', 'COM2'])
+    DummyVisaSupply.opened = []
+
+    started = time.perf_counter()
+    detected = discovery.discover(backends=('bk', 'ametek'))
+    elapsed = time.perf_counter() - started
+    assert [item.fingerprint for item in detected] == [{
+        'backend':'bk', 'resource':'USB0::1::INSTR', 'identity':'B&K Precision,9140,111,1.0'}]
+    assert sorted(DummyVisaSupply.opened) == ['COM1', 'COM2', 'USB0::1::INSTR', 'USB0::2::INSTR']
+    assert elapsed < .6, elapsed
+    assert DummyResourceManager.closed, DummyResourceManager.closed
+
+    DummyVisaSupply.opened = []
+    again = discovery.discover(known=detected[0].fingerprint)
+    assert again[0].fingerprint == detected[0].fingerprint, again
+    assert DummyVisaSupply.opened == ['USB0::1::INSTR'], DummyVisaSupply.opened
+
+    # A different supply on the known resource triggers a full discovery.
+    DummyVisaSupply.opened = []
+    known = dict(detected[0].fingerprint, identity='B&K Precision,9140,999,1.0')
+    again = discovery.discover(known=known, backends=('bk',))
+    assert again[0].fingerprint == detected[0].fingerprint, again
+    assert len(DummyVisaSupply.opened) == 3, DummyVisaSupply.opened
+
+
+def test_multiple_supplies(monkeypatch):
+    """ Test that finding more than one supply closes them all and names them in the error.
+    """
+    closed = []
+    supplies = [discovery.DetectedSupply('bk', resource, identity, DummyVisaSupply.__new__(
+        DummyVisaSupply)) for resource, identity in DummyVisaSupply.IDENTITIES.items()]
+    for item in supplies:
+        item.supply.close = lambda resource=item.resource: closed.append(resource)
+    monkeypatch.setattr(discovery, 'discover', lambda known, backends: supplies)
+
+    with pytest.raises(power_supply.MultipleSupplies) as error:
+        power_supply.detect()
+    assert error.value.fingerprints == [item.fingerprint for item in supplies], error.value
+    assert 'Other,1,2,3 (bk on USB0::2::INSTR)' in str(error.value), str(error.value)
+    assert closed == list(DummyVisaSupply.IDENTITIES), closed
+
+
+def test_adaptive_pacer():
+    """ Test that the period follows the observed response time within its limits.
+    """
+    clock = DummyClock(DummyStream(), 0)
+    pacer = pacing.AdaptivePacer(minimum=.01, maximum=.1, margin=2, smoothing=.5,
+                                 clock=clock, sleep=clock.sleep)
+    assert pacer.period == .1, pacer.period
+
+    pacer.observe(.02)
+    assert pacer.period == pytest.approx(.04), pacer.period
+    pacer.observe(.04)
+    assert pacer.period == pytest.approx(.06), pacer.period
+    pacer.observe(0)
+    pacer.observe(0)
+    pacer.observe(0)
+    assert pacer.period == .01, pacer.period
+
+    pacer.sent()
+    started = clock.now
+    pacer.wait()
+    assert clock.now - started == pytest.approx(.01), clock.now - started
+
+    pacer.backoff()
+    assert pacer.period == .1, pacer.period
+    with pytest.raises(ValueError):
+        pacing.check_verification('some')
+
+
+class DummyStream():
+    """ Stand-in for the serial stream of a supply, recording what is written.
+    """
+    def __init__(self, responses=None):
+        self.written = []
+        self.responses = dict(responses or {})
+        self.reads = 0
+
+
+    def write(self, data):
+        self.written.append(data.strip())
+
+
+    def readline(self):
+        self.reads += 1
+        return self.responses.get(self.written[-1], '') + '\n'
+
+
+    def flush(self):
+        pass
+
+
+def test_ametek_verification_levels():
+    """ Test that each verification level sends only the queries it needs.
+    """
+    power = ametek_power_supply.Power.__new__(ametek_power_supply.Power)
+    power._stream = DummyStream({':VOLT?':'12.0', '*ERR?':'0,"No error;"'})
+    power.pacer = pacing.AdaptivePacer(minimum=0, maximum=0)
+
+    expected = {
+        pacing.VERIFY_NONE:[':VOLT 12.0V'],
+        pacing.VERIFY_READBACK:[':VOLT 12.0V', ':VOLT?'],
+        pacing.VERIFY_FULL:[':VOLT 12.0V', '*ERR?', ':VOLT?'],
+    }
+    for level, commands in expected.items():
+        power.verification = level
+        power._stream.written = []
+        power.set_voltage(12.0)
+        assert power._stream.written == commands, (level, power._stream.written)
+
+    power._stream.responses[':VOLT?'] = '11.0'
+    with pytest.raises(ametek_power_supply.OperationFailed):
+        power._set_voltage(12.0)
+
+
+def test_ametek_slow_response():
+    """ Test that a reply arriving after the serial timeout is still read.
+    """
+    class SlowStream(DummyStream):
+        """ Stream where the reply arrives in pieces, each after a serial timeout.
+        """
+        def readline(self):
+            time.sleep(.05)
+            self.reads += 1
+            return {1:'', 2:'12.', 3:'0\n'}.get(self.reads, '')
+
+    power = ametek_power_supply.Power.__new__(ametek_power_supply.Power)
+    power._stream = SlowStream()
+    power.pacer = pacing.AdaptivePacer(minimum=0, maximum=0)
+    power.write(':VOLT?')
+    assert power.read() == '12.0'
+    assert power._stream.reads == 3, power._stream.reads
+
+
+def test_sorensen_commands():
+    """ Test that only queries wait for a response.
+    """
+    class DummyPort(DummyStream):
+        """ Stand-in for an open serial port.
+        """
+        def write(self, data):
+            super().write(data.decode())
+
+
+        def readline(self):
+            return super().readline().encode()
+
+
+        def isOpen(self):                                #pylint: disable=invalid-name
+            return True
+
+
+        def close(self):
+            pass
+
+    power = sorensen_power_supply.sorensenPower.__new__(sorensen_power_supply.sorensenPower)
+    power.port = DummyPort({':SOUR:VOLT?':'5.000', ':SYST:ERR?':'0,"No error"'})
+    power.pacer = pacing.AdaptivePacer(minimum=0, maximum=0)
+    power.debug = False
+    power.maxVoltage = 60.0
+    power.verification = pacing.VERIFY_NONE
+
+    assert power.setOutputVoltage(5.0)
+    assert power.port.written == [':SOUR:VOLT 5.000'], power.port.written
+    assert power.port.reads == 0, power.port.reads
+
+    power.verification = pacing.VERIFY_FULL
+    assert power.setOutputVoltage(5.0)
+    assert power.port.reads == 2, power.port.reads
+    assert not power.setOutputVoltage(6.0)
+
+
+def test_ametek_adapter():
+    """ Test that a single output supply follows its channel of a power sequence.
+    """
+    power = ametek_power_supply.Power.__new__(ametek_power_supply.Power)
+    power._stream = DummyStream({
+        ':VOLT?':'12.0', ':CURR?':'1.5', 'OUTP?':'1', '*ERR?':'0,"No error;"'})
+    power.pacer = pacing.AdaptivePacer(minimum=0, maximum=0)
+    power.verification = pacing.VERIFY_NONE
+
+    supply = AsyncSupply(adapters.create('ametek', power))
+    sequencer = sequence.PowerSequencer(sequence.load_recipe(RECIPE), tolerance=1)
+    sequencer.run(supply)
+    commands = [command for command in power._stream.written if '?' not in command]
+    assert commands == [':VOLT 12.0V', ':CURR 1.5A', 'OUTP ON'], commands
+    # The output is switched without waiting for its read back, which follows at the end.
+    assert power._stream.written[2:] == ['OUTP ON', ':VOLT?', ':CURR?', 'OUTP?'], \
+        power._stream.written
+    supply.close()
+
+
+def test_manual_sequence(monkeypatch):
+    """ Test that a sequence waiting on the operator is not held to its timing.
+    """
+    prompts = []
+    def message_box(title, text, style):                #pylint: disable=unused-argument
+        prompts.append(title)
+        time.sleep(.2)
+    monkeypatch.setattr(manual_power_supply, 'MessageBox', message_box)
+
+    supply = AsyncSupply(adapters.ManualSupply(manual_power_supply.open()))
+    sequencer = sequence.PowerSequencer(sequence.load_recipe(RECIPE), tolerance=.01)
+    timings = sequencer.run(supply)
+    assert timings[0].gap > .1, timings
+    assert prompts == ['Enable Power Supply'], prompts
+    supply.close()
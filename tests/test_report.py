@@ -0,0 +1,52 @@
+""" Tests for writing session reports.
+"""
+import json
+import os
+
+from vcs.model import report
+
+
+def test_report_stream_survives_interruption(tmp_path):
+    """ Test that sections streamed to disk can be read back, including merged updates, and
+    that an incomplete final line is ignored.
+    """
+    path = str(tmp_path / 'measurements.jsonl')
+    stream = report.ReportStream(path)
+    stream.write('boot time', 12.5)
+    stream.write('process images', {'Camera 1':{'blur':30.0}}, update=True)
+    stream.write('process images', {'Camera 2':{'blur':35.0}}, update=True)
+    stream.close()
+    with open(path, 'a', encoding='utf-8') as fref:
+        fref.write('{"section": "total ti')
+
+    content = report.read_stream(path)
+    assert content == {
+        'boot time':12.5,
+        'process images':{'Camera 1':{'blur':30.0}, 'Camera 2':{'blur':35.0}},
+    }, content
+
+
+def test_write_camera_reports(tmp_path):
+    """ Test that cameras sharing a serial number, e.g. unpopulated slots, get a log each.
+    """
+    reports = [report.CameraAssessmentReport(index, True, {'blur':index}, serial)
+               for index, serial in enumerate(['SN1', '', ''])]
+    paths = report.write_camera_reports(reports, '123', str(tmp_path), '20240101T080000')
+    assert len(set(paths)) == 3, paths
+    assert sorted(path.name for path in (tmp_path / 'transactions').iterdir()) == sorted(
+        os.path.basename(path) for path in paths)
+    with open(paths[2], encoding='utf-8') as fref:
+        assert json.load(fref)['camera_id'] == 2
+
+
+def test_write_in_working_directory(tmp_path, monkeypatch):
+    """ Test that reports can be written to a bare file name in the working directory.
+    """
+    monkeypatch.chdir(tmp_path)
+    report.write('measurements.log', {'result':'PASS'})
+    stream = report.ReportStream('measurements.jsonl')
+    stream.write('result', 'PASS')
+    stream.close()
+    assert report.read_stream('measurements.jsonl') == {'result':'PASS'}
+    with open('measurements.log', encoding='utf-8') as fref:
+        assert json.load(fref) == {'result':'PASS'}
@@ -0,0 +1,81 @@
+""" Tests for the application settings.
+"""
+import dataclasses
+import os
+import threading
+
+from util.settings import ApplicationSettings, set_default
+
+
+@dataclasses.dataclass
+class _Settings:
+    name: str = 'default'
+    count: int = 1
+    items: list = set_default(['a', 'b'])
+
+
+def _touch(path, content):
+    """ Rewrite a file and move its modification time on so the change is always detected.
+    """
+    stat = os.stat(path)
+    with open(path, 'w', encoding='utf-8') as ref:
+        ref.write(content)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_save_only_on_change(tmp_path):
+    """ Test that saving is skipped unless the values have changed.
+    """
+    path = str(tmp_path / 'settings' / 'settings.yaml')
+    settings = ApplicationSettings(path, _Settings())
+    settings.load()
+    assert settings.save(), 'missing file should be written'
+    assert not settings.save(), 'unchanged values should not be written'
+
+    settings.values.count = 2
+    assert settings.save(), 'changed values should be written'
+    assert not settings.refresh(), 'unchanged file should not be reloaded'
+    assert os.listdir(os.path.dirname(path)) == ['settings.yaml'], os.listdir(os.path.dirname(path))
+
+    other = ApplicationSettings(path, _Settings())
+    other.load()
+    assert other.values == _Settings(count=2), other.values
+
+
+def test_load_skips_unchanged_file(tmp_path):
+    """ Test that the file is only reloaded when it changes, and that missing and unknown
+    settings are merged with the defaults.
+    """
+    path = str(tmp_path / 'settings.yaml')
+    with open(path, 'w', encoding='utf-8') as ref:
+        ref.write('name: first\nunknown: 1\n')
+    settings = ApplicationSettings(path, _Settings())
+    assert settings.load()
+    assert settings.values == _Settings(name='first'), settings.values
+    assert not settings.load()
+
+    assert settings.save(), 'merged values should be written'
+    with open(path, 'r', encoding='utf-8') as ref:
+        content = ref.read()
+    assert 'unknown' not in content and 'count: 1' in content, content
+
+    _touch(path, 'name: second\n')
+    assert settings.load()
+    assert settings.values.name == 'second', settings.values
+
+
+def test_watch(tmp_path):
+    """ Test that the watcher reloads the settings when the file is edited.
+    """
+    path = str(tmp_path / 'settings.yaml')
+    settings = ApplicationSettings(path, _Settings())
+    settings.refresh()
+
+    changed = threading.Event()
+    watcher = settings.watch(lambda values: changed.set(), period=.01)
+    try:
+        _touch(path, 'name: edited\n')
+        assert changed.wait(5), 'edit was not detected'
+        assert settings.values.name == 'edited', settings.values
+    finally:
+        watcher.stop()
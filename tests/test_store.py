@@ -0,0 +1,68 @@
+""" Tests for the measurement store.
+"""
+import datetime
+
+from vcs.model.store import MeasurementStore
+
+
+def _add_unit(store, timestamp, station, serial_number, temperature, blur):
+    with store:
+        session_id = store.add_session(
+            timestamp, station,
+            {'thermal check':{'temperatures':{'cpu':temperature}},
+             'process images':{'Camera 1':{'foo/device0.png':{'blur':blur}}}},
+            result='PASS', vcu_number='42')
+        store.add_camera(session_id, 0, serial_number, True, {'foo/device0.png':{'blur':blur}})
+    return session_id
+
+
+def test_store_queries():
+    """ Test that results can be found by serial number, station, time and camera position.
+    """
+    store = MeasurementStore(':memory:')
+    _add_unit(store, '20240101T080000', 'station-a', 'SN1', 40.0, 30.0)
+    _add_unit(store, '20240102T080000', 'station-b', 'SN2', 41.5, 35.0)
+    _add_unit(store, '20240103T080000', 'station-a', 'SN1', 43.0, 40.0)
+
+    sessions = store.sessions(serial_number='SN1')
+    assert [session['timestamp'] for session in sessions] == \
+        ['20240103T080000', '20240101T080000'], sessions
+    assert sessions[0]['report']['thermal check']['temperatures']['cpu'] == 43.0
+
+    cameras = store.cameras(serial_number='SN2')
+    assert len(cameras) == 1, cameras
+    assert cameras[0]['station'] == 'station-b', cameras
+    assert cameras[0]['status'] is True, cameras
+
+    trend = store.measurements('thermal check.temperatures.cpu', station='station-a',
+                               since=datetime.datetime(2024, 1, 1))
+    assert trend == [('20240101T080000', 40.0), ('20240103T080000', 43.0)], trend
+
+    blur = store.measurements('image quality.blur', position=0, until='20240103T000000')
+    assert blur == [('20240101T080000', 30.0), ('20240102T080000', 35.0)], blur
+
+    assert store.measurement_names() == \
+        ['image quality.blur', 'thermal check.temperatures.cpu'], store.measurement_names()
+
+
+def test_store_rolls_back_failed_transaction():
+    """ Test that a session is not recorded if writing its cameras fails part way.
+    """
+    store = MeasurementStore(':memory:')
+    try:
+        with store:
+            store.add_session('20240101T080000', 'station-a', {}, result='FAIL')
+            raise RuntimeError('interrupted')
+    except RuntimeError:
+        pass
+    assert store.sessions() == [], store.sessions()
+
+
+def test_store_in_working_directory(tmp_path, monkeypatch):
+    """ Test that the store can be a bare file name in the working directory.
+    """
+    monkeypatch.chdir(tmp_path)
+    store = MeasurementStore('measurements.db')
+    _add_unit(store, '20240101T080000', 'station-a', 'SN1', 40.0, 30.0)
+    store.close()
+    assert (tmp_path / 'measurements.db').is_file()
@@ -0,0 +1,67 @@
+""" Tests for the timing utilities.
+"""
+import random
+
+from util.timing import RunningStatistics, SpanTimer, TimeLog
+
+
+def test_running_statistics():
+    """ Test that streaming quantile estimates are close to the exact quantiles.
+    """
+    generator = random.Random(0)
+    values = [generator.uniform(0, 100) for _ in range(10000)]
+    statistics = RunningStatistics()
+    for value in values:
+        statistics.add(value)
+    summary = statistics.summary()
+
+    ordered = sorted(values)
+    assert summary['count'] == 10000, summary
+    assert abs(summary['mean'] - sum(values) / len(values)) < 1e-6, summary
+    for name, quantile in (('p50', .5), ('p95', .95), ('p99', .99)):
+        exact = ordered[int(quantile * len(ordered))]
+        assert abs(summary[name] - exact) < 1, (name, summary[name], exact)
+
+
+def test_timelog_header(tmp_path):
+    """ Test that the header is only repeated when the logged names change, including for
+    a file written by an earlier TimeLog.
+    """
+    path = str(tmp_path / 'timelog.csv')
+    timelog = TimeLog(path)
+    for value in (1, 2):
+        timelog.log('a', value)
+        timelog.log('b', 'x')
+        timelog.write()
+    timelog.close()
+
+    timelog = TimeLog(path)
+    timelog.log('a', 3)
+    timelog.log('b', 'y')
+    timelog.write()
+    timelog.log('c', 4)
+    timelog.write()
+    timelog.close()
+
+    with open(path, encoding='utf-8') as fref:
+        assert fref.read().splitlines() == ['a,b', '1,x', '2,x', '3,y', 'c', '4']
+    assert timelog.statistics['a']['count'] == 1, timelog.statistics
+
+
+def test_span_timer_tree():
+    """ Test that nested and dotted spans are recorded in the same tree.
+    """
+    timer = SpanTimer()
+    with timer.span('acquire'):
+        with timer.span('transfer'):
+            pass
+    with timer.span('acquire.transfer'):
+        pass
+    with timer.span('connect.ssh'):
+        pass
+
+    tree = timer.to_dict()
+    assert tree['acquire']['calls'] == 1, tree
+    assert tree['acquire']['transfer']['calls'] == 2, tree
+    assert tree['connect'] == {'ssh':tree['connect']['ssh']}, tree
+    assert isinstance(tree['connect']['ssh']['seconds'], float), tree
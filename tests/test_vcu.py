@@ -1,7 +1,8 @@
 """ Tests various methods relating to parsing responses from the VCU.
 """
 #pylint: disable=protected-access
-
+import hashlib
+import os
 
 from vcs.model import vcu
 
@@ -12,8 +13,10 @@ class DummyConnection():                                #pylint: disable=too-few
     Takes in a series of responses that will be retrieved for everytime
     the run() method is called.
     """
-    def __init__(self, responses: list[str]):
+    def __init__(self, responses: list[str], files: dict = None):
         self._responses: list = responses
+        self._files = files or {}
+        self.transfers = []
 
     def run(self, cmd):
         """ Pops the first response out of the queue and returns as a DummyResponse.
@@ -21,6 +24,14 @@ class DummyConnection():                                #pylint: disable=too-few
         return DummyResponse(cmd, self._responses.pop(0))
 
 
+    def get(self, src, dst):
+        """ Records the requested transfer and writes the next content queued for the file.
+        """
+        self.transfers.append(src)
+        contents = self._files[src]
+        dst.write(contents.pop(0) if len(contents) > 1 else contents[0])
+
+
 class DummyResponse():                                  #pylint: disable=too-few-public-methods
     """ Stand-in to simulate the response class returned by Connection.run() during testing.
     """
@@ -75,3 +86,65 @@ def test_poll_i2c_device():
     ])
     devices = vcu.poll_i2c_device(connection, 9)
     assert devices == [True, True, False, True], devices
+
+
+def _checksum_listing(files: dict) -> str:
+    return ''.join(f'{hashlib.sha1(content).hexdigest()}  ./{name}\n'
+                   for name, content in files.items())
+
+
+def test_get_contents_for_selected_sensors(tmp_path):
+    """ Test that vcu._get_contents() only transfers files for the requested sensors.
+    """
+    files = {
+        'device0_20220101T000000.png':b'zero',
+        'device1_20220101T000000.png':b'one',
+        'device3_20220101T000000.png':b'three',
+    }
+    connection = DummyConnection(
+        responses=[_checksum_listing(files)],
+        files={f'src/{name}':[content] for name, content in files.items()},
+    )
+    paths = vcu._get_contents(connection, 'src', str(tmp_path), ('device1_', 'device3_'))
+
+    assert paths == [
+        f'{tmp_path}/device1_20220101T000000.png',
+        f'{tmp_path}/device3_20220101T000000.png',
+        ], paths
+    assert connection.transfers == [
+        'src/device1_20220101T000000.png',
+        'src/device3_20220101T000000.png',
+        ], connection.transfers
+    with open(paths[1], 'rb') as fref:
+        assert fref.read() == b'three'
+
+
+def test_get_contents_refetches_corrupt_files(tmp_path):
+    """ Test that a short or corrupt transfer is repeated for that file only, and that a file
+    which never arrives intact is left out of the results.
+    """
+    files = {
+        'device0_20220101T000000.png':b'zero',
+        'device1_20220101T000000.png':b'one',
+        'device2_20220101T000000.png':b'two',
+    }
+    connection = DummyConnection(
+        responses=[_checksum_listing(files)],
+        files={
+            'src/device0_20220101T000000.png':[b'zero'],
+            'src/device1_20220101T000000.png':[b'on', b'one'],
+            'src/device2_20220101T000000.png':[b'tw'],
+        },
+    )
+    paths = vcu._get_contents(connection, 'src', str(tmp_path))
+
+    assert paths == [
+        f'{tmp_path}/device0_20220101T000000.png',
+        f'{tmp_path}/device1_20220101T000000.png',
+        ], paths
+    assert connection.transfers.count('src/device0_20220101T000000.png') == 1
+    assert connection.transfers.count('src/device1_20220101T000000.png') == 2
+    assert connection.transfers.count('src/device2_20220101T000000.png') == vcu.TRANSFER_ATTEMPTS
+    with open(paths[1], 'rb') as fref:
+        assert fref.read() == b'one'
+    assert sorted(os.listdir(tmp_path)) == [os.path.basename(path) for path in paths]
@@ -1,32 +1,248 @@
+""" CRC-32 using the Koopman polynomial (0x741B8CD7), computed most significant bit first with an
+initial value of 0xffffffff and no final XOR.
+
+crc() computes the checksum of a complete message, while Koopman32 provides a hashlib style
+object for computing it incrementally, e.g. while a file is being read or transferred.
+
+Large buffers are processed with NumPy by splitting them into equal blocks, running a sliced
+table driven CRC over every block at once (one vectorized step per 32-bit word), and then folding
+the block CRCs together. The fold relies on the CRC being linear: the CRC of A followed by B is the
+CRC of A advanced over len(B) zero bytes, XORed with the CRC of B.
+"""
+import functools
+import time
+
+import numpy as np
+
 POLYNOMIAL = 0x741B8CD7
 BITS = 32
 INITIAL_VALUE = 0xffffffff
+MASK = 0xffffffff
 
-def _table_initial_remainder(value):
-    return value << (BITS - 8)
+# Buffers shorter than this are processed a byte at a time.
+VECTORIZE_THRESHOLD = 4096
+MIN_BLOCK_SIZE = 64
+MAX_BLOCK_SIZE = 512
+CHUNK_SIZE = 1024 * 1024
 
 
-def _calculate_remainder(remainder, bit=0):
-    if bit < 8:
-        return _calculate_remainder(_mod_shift(remainder), bit+1)
+def _table_entry(value):
+    remainder = value << (BITS - 8)
+    for _ in range(8):
+        if remainder & (1 << (BITS - 1)):
+            remainder = ((remainder << 1) ^ POLYNOMIAL) & MASK
+        else:
+            remainder = (remainder << 1) & MASK
     return remainder
 
 
-def _mod_shift(value):
-    if value & (1 << (BITS - 1)):
-        return ((value << 1) ^ POLYNOMIAL) & 0xffffffff
-    return (value << 1) & 0xffffffff
+_TABLE = tuple(_table_entry(value) for value in range(256))
+_TABLE_ARRAY = np.array(_TABLE, dtype=np.uint32)
 
 
-def _table_entry(value):
-    return _calculate_remainder(_table_initial_remainder(value))
+class Koopman32():
+    """ Incremental Koopman CRC-32 with a hashlib style interface.
+
+    Args:
+        data (bytes-like, optional): initial data to add. Defaults to b''.
+    """
+    name = 'koopman32'
+    digest_size = 4
+    block_size = 1
+
+    def __init__(self, data=b''):
+        self._value = INITIAL_VALUE
+        if data:
+            self.update(data)
+
+
+    def update(self, data):
+        """ Add data to the CRC.
+
+        Args:
+            data (bytes-like): any object supporting the buffer protocol, e.g. bytes, bytearray,
+                memoryview or a NumPy array.
+        """
+        view = memoryview(data).cast('B')
+        if len(view) < VECTORIZE_THRESHOLD:
+            self._value = _crc_bytes(self._value, view)
+        else:
+            data = np.frombuffer(view, dtype=np.uint8)
+            # Work through very large buffers in chunks, keeping the working set in cache.
+            for offset in range(0, len(data), CHUNK_SIZE):
+                self._value = _crc_blocks(self._value, data[offset:offset + CHUNK_SIZE])
+
 
+    def copy(self):
+        """ Returns:
+            Koopman32: independent copy of the current state.
+        """
+        other = Koopman32()
+        other._value = self._value                          #pylint: disable=protected-access
+        return other
 
-_TABLE = tuple(map(_table_entry, range(256)))
+
+    @property
+    def value(self) -> int:
+        """ The CRC of the data added so far, as an integer.
+        """
+        return self._value
+
+
+    def digest(self) -> bytes:
+        """ Returns:
+            bytes: the CRC of the data added so far, big endian.
+        """
+        return self._value.to_bytes(self.digest_size, 'big')
+
+
+    def hexdigest(self) -> str:
+        """ Returns:
+            str: the CRC of the data added so far, as hexadecimal.
+        """
+        return self.digest().hex()
 
 
 def crc(byte_list):
-    accumulator = INITIAL_VALUE
-    for byte in byte_list:
-        accumulator = ((accumulator << 8) ^ _TABLE[ ((accumulator >> (BITS - 8)) ^ byte) &0xff ]) & 0xffffffff
-    return accumulator
+    """ Calculate the CRC of a message.
+
+    Args:
+        byte_list (bytes-like or Iterable[int]): message to calculate the CRC of.
+
+    Returns:
+        int: the CRC.
+    """
+    try:
+        return Koopman32(memoryview(byte_list)).value
+    except TypeError:
+        return _crc_bytes(INITIAL_VALUE, byte_list)
+
+
+def benchmark(size=8 * 1024 * 1024, repeat=5):
+    """ Measure the throughput of Koopman32 on a payload of the given size.
+
+    Args:
+        size (int, optional): payload size in bytes. Defaults to 8 MiB (a full resolution image).
+        repeat (int, optional): number of runs, the fastest is reported. Defaults to 5.
+
+    Returns:
+        float: throughput in MB/s.
+    """
+    payload = np.random.default_rng(0).integers(0, 256, size, dtype=np.uint8).tobytes()
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        Koopman32(payload)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return size / best / 1e6
+
+
+def _crc_bytes(value, data):
+    for byte in data:
+        value = ((value << 8) ^ _TABLE[((value >> (BITS - 8)) ^ byte) & 0xff]) & MASK
+    return value
+
+
+def _crc_blocks(value, data):
+    """ CRC of a large buffer using vectorized block processing.
+    """
+    size = len(data)
+    if size < VECTORIZE_THRESHOLD:
+        return _crc_bytes(value, data.tobytes())
+    block_size = _get_block_size(size)
+    count = size // block_size
+    blocked = count * block_size
+
+    # Each block is processed as big endian 32-bit words, four bytes per vectorized step.
+    words = data[:blocked].view('>u4').astype(np.uint32).reshape(count, block_size // 4)
+    # Starting from a value is equivalent to XORing it into the first word and starting from
+    # zero, which leaves every block starting from zero.
+    words[0, 0] ^= value
+
+    tables = _get_shift_tables(4)
+    values = np.zeros(count, dtype=np.uint32)
+    index = np.empty(count, dtype=np.uint32)
+    for column in range(block_size // 4):
+        values ^= words[:, column]
+        # XORing a word in and then advancing over four zero bytes processes the word.
+        np.bitwise_and(values, 0xff, out=index)
+        result = tables[0].take(index)
+        np.right_shift(values, 8, out=index)
+        index &= 0xff
+        result ^= tables[1].take(index)
+        np.right_shift(values, 16, out=index)
+        index &= 0xff
+        result ^= tables[2].take(index)
+        np.right_shift(values, 24, out=index)
+        result ^= tables[3].take(index)
+        values = result
+
+    # Pad at the front to a power of two; leading zero blocks do not change a CRC from zero.
+    padded = 1 << (count - 1).bit_length()
+    values = np.concatenate((np.zeros(padded - count, dtype=np.uint32), values))
+    length = block_size
+    while len(values) > 1:
+        values = _shift(values[0::2], length) ^ values[1::2]
+        length *= 2
+
+    return _crc_bytes(int(values[0]), data[blocked:].tobytes())
+
+
+def _get_block_size(size):
+    # Balance the number of vectorized steps against the length of each step.
+    block_size = 1 << (max(size, 1).bit_length() // 2)
+    return min(max(block_size, MIN_BLOCK_SIZE), MAX_BLOCK_SIZE)
+
+
+def _shift(values, length):
+    """ Advance each CRC value over length zero bytes.
+    """
+    tables = _get_shift_tables(length)
+    return (tables[0][values & 0xff] ^ tables[1][(values >> 8) & 0xff]
+            ^ tables[2][(values >> 16) & 0xff] ^ tables[3][values >> 24])
+
+
+@functools.lru_cache(maxsize=64)
+def _get_shift_tables(length):
+    """ Byte lookup tables for advancing a CRC over length zero bytes.
+
+    Advancing is linear, so it is represented by the images of each of the 32 bits, raised to
+    the required power by repeated squaring.
+    """
+    single = [_crc_bytes(1 << bit, b'\0') for bit in range(BITS)]
+    operator = [1 << bit for bit in range(BITS)]
+    while length:
+        if length & 1:
+            operator = _compose(single, operator)
+        single = _compose(single, single)
+        length >>= 1
+
+    tables = []
+    for offset in range(0, BITS, 8):
+        table = [_apply(operator, byte << offset) for byte in range(256)]
+        tables.append(np.array(table, dtype=np.uint32))
+    return tables
+
+
+def _apply(operator, value):
+    result = 0
+    bit = 0
+    while value:
+        if value & 1:
+            result ^= operator[bit]
+        value >>= 1
+        bit += 1
+    return result
+
+
+def _compose(first, second):
+    """ Operator equivalent to applying second and then first.
+    """
+    return [_apply(first, image) for image in second]
+
+
+if __name__ == '__main__':
+    # Run as a module (python -m util.koopman32) so util.threading does not shadow threading.
+    for payload_size in (64 * 1024, 1024 * 1024, 8 * 1024 * 1024):
+        print(f'{payload_size // 1024} KiB: {benchmark(payload_size):.1f} MB/s')
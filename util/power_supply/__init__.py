@@ -4,16 +4,37 @@ from . import bk_power_supply
 #from . import ametek_power_supply
 #from . import sorensen_power_supply
 from . import manual_power_supply
-from .errors import NotDetected, NoSupply, MultipleSupplies
+from . import adapters
+from . import instrument
+from . import discovery
+from . import sequence
+from . import telemetry
+from .errors import NotDetected, NoSupply, MultipleSupplies, VerificationFailed
 
 
-def detect():
-    """ Opens the first available power supply.
+def detect(known=None, backends=discovery.BACKENDS) -> list[discovery.DetectedSupply]:
+    """ Opens the attached power supply.
 
-        COM port detected automatically
+        Backends and ports are probed concurrently (see discovery.discover).
+
+    Args:
+        known (dict, optional): fingerprint of the supply found last time, tried first.
+            Defaults to None.
+        backends (tuple[str], optional): backends to probe. Defaults to all.
+
+    Raises:
+        NoSupply: if no supply was found.
+        MultipleSupplies: if more than one supply was found.
+
+    Returns:
+        list[discovery.DetectedSupply]: the supply found.
     """
-    supplies = bk_power_supply.open() #or ametek_power_supply.open() or sorensen_power_supply.open()
+    supplies = discovery.discover(known, backends)
     if not supplies:
         raise NoSupply()
+    if len(supplies) > 1:
+        for supply in supplies:
+            supply.close()
+        raise MultipleSupplies([supply.fingerprint for supply in supplies])
 
     return supplies
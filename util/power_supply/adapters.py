@@ -0,0 +1,262 @@
+""" Common interface to the supported power supplies.
+
+The drivers expose different method names (e.g. set_enable() vs enable(), apply_v_and_i() vs
+set_voltage()). Each adapter implements the same channel based interface on top of one of
+them, so the rest of the application (see sequence.PowerSequencer, telemetry.TelemetrySampler
+and instrument.AsyncSupply) does not depend on the attached supply.
+
+Supplies with a single output drive the channel of the settings they are given (channel 0 by
+default) and ignore the rest.
+"""
+import math
+
+from .bk_power_supply import ChannelSetting
+from .errors import VerificationFailed
+
+
+class Supply():
+    """ Interface implemented by every supply adapter.
+
+    Args:
+        supply (object): driver of the supply.
+    """
+    channels = 1
+    # Whether read_all_channels() is supported, see telemetry.TelemetrySampler.
+    measures = True
+    # Whether switching follows the timing of a sequence, see sequence.PowerSequencer. False
+    # for supplies switched by the operator.
+    timed = True
+
+    def __init__(self, supply):
+        self.supply = supply
+
+
+    def identify(self) -> str:
+        """ Returns the identification reported by the supply.
+        """
+        raise NotImplementedError
+
+
+    def configure(self, settings: list[ChannelSetting]):
+        """ Apply and verify the voltage and current of each channel, without changing the
+        outputs.
+        """
+        raise NotImplementedError
+
+
+    def switch(self, settings: list[ChannelSetting]):
+        """ Switch the output of each channel in order, returning as soon as the commands are
+        written. The outputs are checked by verify().
+        """
+        raise NotImplementedError
+
+
+    def verify(self, settings: list[ChannelSetting]):
+        """ Check the voltage, current and output state of each channel.
+
+        Raises:
+            VerificationFailed (or the OperationFailed of the driver): if a channel differs.
+        """
+        raise NotImplementedError
+
+
+    def read_all_channels(self) -> list[float]:
+        """ Returns the voltage, current and power of each channel in turn.
+        """
+        raise NotImplementedError
+
+
+    def close(self):
+        """ Release the connection to the supply.
+        """
+        self.supply.close()
+
+
+
+class SingleChannelSupply(Supply):
+    """ Base class of the adapters of supplies with a single output.
+
+    Args:
+        supply (object): driver of the supply.
+        channel (int, optional): channel of the settings driven by the output. Defaults to 0.
+    """
+    def __init__(self, supply, channel=0):
+        super().__init__(supply)
+        self.channel = channel
+
+
+    def _select(self, settings) -> ChannelSetting:
+        """ Returns the setting of the output, or None if the settings do not include it.
+        """
+        for setting in settings:
+            if setting.channel == self.channel:
+                return setting
+        return None
+
+
+    def _check(self, name, actual, expected):
+        if not math.isclose(actual, expected, abs_tol=1e-3):
+            raise VerificationFailed(
+                f'Power supply reports a {name} of {actual}, expected {expected}.')
+
+
+
+class BKSupply(Supply):
+    """ Adapter of a BK Precision 9140 supply (see bk_power_supply.Power), which natively
+    supports the interface.
+    """
+    channels = 3
+
+    def identify(self) -> str:
+        return self.supply.identify()
+
+
+    def configure(self, settings):
+        self.supply.configure(settings)
+
+
+    def switch(self, settings):
+        self.supply.switch(settings)
+
+
+    def verify(self, settings):
+        self.supply.verify(settings)
+
+
+    def read_all_channels(self) -> list[float]:
+        return self.supply.read_all_channels()
+
+
+
+class AmetekSupply(SingleChannelSupply):
+    """ Adapter of an Ametek supply (see ametek_power_supply.Power).
+    """
+    def identify(self) -> str:
+        return self.supply.identify()
+
+
+    def configure(self, settings):
+        setting = self._select(settings)
+        if setting is not None:
+            self.supply.set_voltage(setting.voltage)
+            self.supply.set_current_limit(setting.current)
+
+
+    def switch(self, settings):
+        setting = self._select(settings)
+        if setting is not None:
+            self.supply.switch_output(setting.enabled)
+
+
+    def verify(self, settings):
+        setting = self._select(settings)
+        if setting is None:
+            return
+        self._check('voltage', self.supply.voltage(), setting.voltage)
+        self._check('current limit', self.supply.current_limit(), setting.current)
+        if bool(self.supply.enabled()) != setting.enabled:
+            raise VerificationFailed('Could not set the enabled status of the power supply.')
+
+
+    def read_all_channels(self) -> list[float]:
+        voltage = self.supply.measured_voltage()
+        current = self.supply.measured_current()
+        return [voltage, current, voltage * current]
+
+
+
+class SorensenSupply(SingleChannelSupply):
+    """ Adapter of a Sorensen DCS supply (see sorensen_power_supply.sorensenPower).
+
+    The supply has no output switch over RS-232, so the output is switched off by
+    programming 0 V and on by programming the voltage of the setting.
+    """
+    def identify(self) -> str:
+        return self.supply.getIdentification()
+
+
+    def configure(self, settings):
+        setting = self._select(settings)
+        if setting is not None and not self.supply.setOutputCurrent(setting.current):
+            raise VerificationFailed(
+                f'Could not set the power supply current to {setting.current}A.')
+
+
+    def switch(self, settings):
+        setting = self._select(settings)
+        if setting is None:
+            return
+        voltage = setting.voltage if setting.enabled else 0.0
+        if not self.supply.setOutputVoltage(voltage, confirm=False):
+            raise VerificationFailed(f'Could not set the power supply voltage to {voltage}V.')
+
+
+    def verify(self, settings):
+        setting = self._select(settings)
+        if setting is not None:
+            self._check('voltage', self.supply.getVoltageSetting(),
+                        setting.voltage if setting.enabled else 0.0)
+
+
+    def read_all_channels(self) -> list[float]:
+        voltage = self.supply.getOutputVoltage()
+        current = self.supply.getOutputCurrent()
+        return [voltage, current, voltage * current]
+
+
+    def close(self):
+        self.supply.disconnect()
+
+
+
+class ManualSupply(AmetekSupply):
+    """ Adapter of the manual supply (see manual_power_supply.Power), which asks the operator
+    to switch the supply. The driver follows the method names of the Ametek driver.
+
+    Switching waits for the operator, so it is not held to the timing of a sequence.
+    """
+    measures = False
+    timed = False
+
+    def identify(self) -> str:
+        return 'Manual'
+
+
+    def switch(self, settings):
+        setting = self._select(settings)
+        if setting is None:
+            return
+        if setting.enabled:
+            self.supply.enable()
+        else:
+            self.supply.disable()
+
+
+    def verify(self, settings):
+        pass
+
+
+    def read_all_channels(self) -> list[float]:
+        raise NotImplementedError
+
+
+
+ADAPTERS = {
+    'bk':BKSupply,
+    'ametek':AmetekSupply,
+    'sorensen':SorensenSupply,
+    'manual':ManualSupply,
+}
+
+
+def create(backend, supply) -> Supply:
+    """ Wrap a supply driver in the adapter of its backend.
+
+    Args:
+        backend (str): name of the backend, one of ADAPTERS (see discovery.BACKENDS).
+        supply (object): driver of the supply.
+
+    Returns:
+        Supply: adapter of the supply.
+    """
+    return ADAPTERS[backend](supply)
@@ -9,13 +9,36 @@ import serial
 import serial.tools.list_ports
 
 from .errors import NotDetected, MultipleSupplies
+from .pacing import AdaptivePacer, VERIFY_FULL, VERIFY_NONE, check_verification
+
+
+class OperationFailed(Exception):
+    pass
+
+
+# Failures worth repeating an operation for; anything else is a programming error.
+RETRY_EXCEPTIONS = (serial.SerialException, ValueError, OperationFailed)
+
+# Seconds a reply may take, as with the previous fixed pacing (a 0.1 s wait before reading
+# plus the 0.1 s serial timeout).
+READ_TIMEOUT = 0.2
+
 
 class Power:
-    def __init__(self, port_name):
+    """Model of an Ametek power supply.
+
+    Commands are paced according to the observed response time of the supply (see
+    pacing.AdaptivePacer), and each change is verified according to the verification level.
+
+    Args:
+        port_name (str): serial port of the supply.
+        verification (str, optional): one of pacing.VERIFICATION_LEVELS. Defaults to VERIFY_FULL.
+    """
+    def __init__(self, port_name, verification=VERIFY_FULL):
         self._serial = serial.Serial(port=port_name, baudrate=9600, timeout=0.1)
         self._stream = io.TextIOWrapper(self._serial)
-        self.command_period = 0.1
-        self.last_command_time = time.time() - self.command_period
+        self.pacer = AdaptivePacer()
+        self.verification = check_verification(verification)
         self.status_clear()
         self.select_address(1)
         self.port_name = port_name
@@ -30,30 +53,49 @@ class Power:
     def flush(self):
         self._stream.flush()
 
-    def duration_until_ready_for_next_command(self):
-        return max(0, self.command_period + self.last_command_time - time.time())
-
-    def wait_until_ready_for_next_command(self):
-        while self.duration_until_ready_for_next_command() > 0:
-            time.sleep(self.duration_until_ready_for_next_command())
+    @property
+    def command_period(self):
+        return self.pacer.period
 
     def write(self, string):
-        self.wait_until_ready_for_next_command()
+        self.pacer.wait()
         self._stream.write(string+"\n")
         self.flush()
-        self.last_command_time = time.time()
+        self.pacer.sent()
 
     def read(self):
-        self.wait_until_ready_for_next_command()
-        return self._stream.readline().strip()
+        # Keep reading past the serial timeout until the reply is complete or READ_TIMEOUT.
+        deadline = time.monotonic() + READ_TIMEOUT
+        line = self._stream.readline()
+        while not line.endswith("\n") and time.monotonic() < deadline:
+            line += self._stream.readline()
+        if line:
+            self.pacer.received()
+        else:
+            # Timed out; slow down until the supply responds again.
+            self.pacer.backoff()
+        return line.strip()
 
     def retry(self, function):
         try:
             return function()
-        except Exception:
+        except RETRY_EXCEPTIONS:
             logging.info('POWER:RETRY')
+            self.pacer.backoff()
             return function()
 
+    def confirm(self, readback=None, message="Error verifying the power supply setting."):
+        """Verify a change according to the verification level.
+
+        Args:
+            readback (Callable, optional): returns True if the setting reads back as expected.
+            message (str, optional): description used if the read back does not match.
+        """
+        if self.verification == VERIFY_FULL:
+            self.check()
+        if readback is not None and self.verification != VERIFY_NONE and not readback():
+            raise OperationFailed(message)
+
     def query_selected_address(self):
         self.write("*ADR?")
         return int(self.read())
@@ -66,7 +108,7 @@ class Power:
 
     def _select_address(self, index):
         self.write("*ADR "+str(index))
-        self.check()
+        self.confirm()
 
     def voltage(self):
         self.write(":VOLT?")
@@ -78,9 +120,7 @@ class Power:
 
     def _set_voltage(self, voltage):
         self.write(":VOLT " + str(voltage) + "V")
-        self.check()
-        if voltage != self.voltage():
-            raise Exception("Error setting the power supply voltage.")
+        self.confirm(lambda: voltage == self.voltage(), "Error setting the power supply voltage.")
 
     def current_limit(self):
         self.write(":CURR?")
@@ -92,15 +132,19 @@ class Power:
 
     def _set_current_limit(self, amps):
         self.write(":CURR " + str(amps) + "A")
-        self.check()
-        if self.current_limit() != amps:
-            raise Exception("Error setting the power supply current.")
+        self.confirm(lambda: self.current_limit() == amps,
+                     "Error setting the power supply current.")
 
     def measured_current(self):
         """Return the current usage in amps"""
         self.write(":MEAS:SCAL:CURR?")
         return float(self.read())
 
+    def measured_voltage(self):
+        """Return the output voltage in volts"""
+        self.write(":MEAS:SCAL:VOLT?")
+        return float(self.read())
+
     def enabled(self):
         return self.retry(self._enabled)
 
@@ -114,22 +158,22 @@ class Power:
 
     def _enable(self):
         self.write("OUTP ON")
-        self.check()
-        if self.enabled() != 1:
-            raise Exception("Could not enable the power supply.")
+        self.confirm(lambda: self.enabled() == 1, "Could not enable the power supply.")
+
+    def switch_output(self, enabled):
+        """Switch the output without waiting to verify it, see enabled()."""
+        self.write("OUTP ON" if enabled else "OUTP OFF")
+        logging.info('POWER:ENABLE' if enabled else 'POWER:DISABLE')
 
     def disable(self):
         self.write("OUTP OFF")
-        self.check()
-        e = self.enabled()
-        if e != 0:
-            raise Exception("Could not disable the power supply: "+str(e))
+        self.confirm(lambda: self.enabled() == 0, "Could not disable the power supply.")
         logging.info('POWER:DISABLE')
 
     def identify(self):
         self.write("*IDN?")
         result = self.read()
-        self.check()
+        self.confirm()
         return result
 
     def error(self):
@@ -139,14 +183,14 @@ class Power:
     def check(self):
         error = self.error()
         if error and error != '0,"No error;"':
-            raise Exception(error)
+            raise OperationFailed(error)
 
     def status_clear(self):
         self.retry(self._status_clear)
 
     def _status_clear(self):
         self.write("*CLS")
-        self.check()
+        self.confirm()
 
     def status_byte(self):
         self.write(":STAT1:SBYTE?")
@@ -222,6 +266,6 @@ def com_ports():
     def _port(port):
         ''' Checks that a provided port is associated with the FTDI manufacturer.
         '''
-        return port.manufacturer.startswith('FTDI')
+        return (port.manufacturer or '').startswith('FTDI')
 
     return filter(_port, serial.tools.list_ports.comports())
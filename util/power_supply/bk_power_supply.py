@@ -3,6 +3,9 @@
 # Copyright Symbotic 2023
 
 import logging
+import threading
+import time
+from dataclasses import dataclass
 import pyvisa
 
 from .errors import NotDetected, MultipleSupplies
@@ -14,6 +17,68 @@ class OperationFailed(Exception):
     pass
 
 
+@dataclass
+class ChannelSetting:
+    """Target state of a single channel, see Power.apply_settings().
+
+    delay is the number of seconds to wait after switching the output of this channel before
+    switching the output of the next channel.
+    """
+    channel: int
+    voltage: float
+    current: float
+    enabled: bool
+    delay: float = 0.0
+
+
+def compile_configuration(settings):
+    """Program applying the voltage and current of each channel, without changing the outputs."""
+    return ';'.join(f"INST {setting.channel};APPL {setting.voltage},{setting.current}"
+                    for setting in settings)
+
+
+def compile_switch(settings):
+    """Program switching the output of each channel in order.
+
+    Channels being disabled are also given their voltage and current, so they are changed
+    together with the output.
+    """
+    commands = []
+    for setting in settings:
+        commands.append(f"INST {setting.channel}")
+        if not setting.enabled:
+            commands.append(f"APPL {setting.voltage},{setting.current}")
+        commands.append(ENABLE_COMMAND[setting.enabled])
+    return ';'.join(commands)
+
+
+def compile_outputs(settings):
+    """Programs switching the output of each channel in order, see compile_switch().
+
+    Consecutive channels without a delay share a program.
+
+    Returns:
+        list[tuple[str, float]]: program and the delay to wait after it.
+    """
+    steps = []
+    group = []
+    for setting in settings:
+        group.append(setting)
+        if setting.delay > 0:
+            steps.append((compile_switch(group), setting.delay))
+            group = []
+    if group:
+        steps.append((compile_switch(group), 0.0))
+    return steps
+
+
+def compile_verification(settings, outputs=True):
+    """Single query reading back the settings of every channel, reselecting the first channel."""
+    queries = ';'.join(f"INST {setting.channel};APPL?" + (";OUTP?" if outputs else "")
+                       for setting in settings)
+    return f"{queries};INST {settings[0].channel}"
+
+
 class Power:
     """Model of a BK Precision 9140-GPIB power supply.
 
@@ -41,18 +106,45 @@ class Power:
         Current value will have one decimal place for models 1687B and 1688B, and two decimal places for Model 1685B.
     """
 
-    def __init__(self):
-        """Open a BK Precision 9140-GPIB power supply."""
-        self._rm = pyvisa.ResourceManager()
-        self._li = self._rm.list_resources()
-        for index in range(len(self._li)):
-            print(str(index)+" - "+self._li[index])
-        self._vi = self._rm.open_resource(self._li[0])
-        self.identity = self.identify()
-        self.selected_channel = self.set_channel(0)
-        self.applied_v_and_i = self.apply_v_and_i(0.000, 2.000)
+    def __init__(self, resource_name=None, resource_manager=None):
+        """Open a BK Precision 9140-GPIB power supply.
+
+        Args:
+            resource_name (str, optional): VISA resource of the supply. Defaults to None, which
+                opens the first VISA resource found.
+            resource_manager (pyvisa.ResourceManager, optional): resource manager to use, which
+                the caller closes. Defaults to None, which creates one closed with the supply.
+        """
+        # Held while the supply is in use, for callers sharing it between threads (normally it
+        # is only used from its I/O thread, see instrument.AsyncSupply).
+        self.lock = threading.RLock()
+        self._owns_rm = resource_manager is None
+        self._rm = resource_manager or pyvisa.ResourceManager()
+        try:
+            if resource_name is None:
+                resources = self._rm.list_resources()
+                for index, resource in enumerate(resources):
+                    logging.debug('POWER:RESOURCE %d - %s', index, resource)
+                if not resources:
+                    raise NotDetected('VISA')
+                resource_name = resources[0]
+            self.resource_name = resource_name
+            self._vi = self._rm.open_resource(resource_name)
+            # Channels are configured and verified when applying settings (see apply_settings()).
+            self.selected_channel = None
+            self.identity = self.identify()
+        except Exception:
+            if self._owns_rm:
+                self._rm.close()
+            raise
         logging.info('POWER:*IDN {}'.format(self.identity))
 
+    def close(self):
+        """Close the VISA resource, and the resource manager if created by the supply."""
+        self._vi.close()
+        if self._owns_rm:
+            self._rm.close()
+
     def apply_v_and_i(self, voltage, current):
         """Description  Set and query the voltage and current of the selected channel.
 
@@ -155,6 +247,18 @@ class Power:
         else:
             raise OperationFailed('Could not read voltage, current, and power of all channels from the Precision 9140-GPIB power supply.')
 
+    def read_all_channels(self):
+        """Query the voltage, current, and power of all channels, without logging.
+
+        Intended for frequent sampling (see telemetry.TelemetrySampler).
+
+        Returns:
+            list[float]: CH1 V, A, W, CH2 V, A, W, CH3 V, A, W in normal operation mode.
+        """
+        with self.lock:
+            response = self._vi.query("MEAS:ALLCH?")
+        return [float(value) for value in response.strip().split(',')]
+
     def measure_current(self):
         """Description  Query the current voltage.
 
@@ -202,6 +306,66 @@ class Power:
         else:
             raise OperationFailed('Could not read voltage from the Precision 9140-GPIB power supply.')
 
+    def apply_settings(self, settings):
+        """Apply voltage, current and output state to several channels with as few round trips
+        as possible.
+
+        Channels being enabled are configured and verified before any output is switched on.
+        Outputs are then switched in order, waiting the delay of each channel, and everything is
+        verified with a single query at the end.
+
+        Args:
+            settings (list[ChannelSetting]): target state of each channel, in switching order.
+        """
+        enabling = [setting for setting in settings if setting.enabled]
+        if enabling:
+            self.configure(enabling)
+        for program, delay in compile_outputs(settings):
+            with self.lock:
+                self._vi.write(program)
+            if delay:
+                time.sleep(delay)
+        self.verify(settings)
+
+    def configure(self, settings):
+        """Apply the voltage and current of several channels with a single program, without
+        changing their outputs, and verify them with a single query."""
+        with self.lock:
+            self._vi.write(compile_configuration(settings))
+            self.verify(settings, outputs=False)
+
+    def switch(self, settings):
+        """Switch the outputs of several channels in order with a single program, without
+        waiting for a response (see verify())."""
+        with self.lock:
+            self._vi.write(compile_switch(settings))
+
+    def verify(self, settings, outputs=True):
+        """Check the settings of every channel with one consolidated query.
+
+        Args:
+            settings (list[ChannelSetting]): expected state of each channel.
+            outputs (bool, optional): also check the output states. Defaults to True.
+        """
+        with self.lock:
+            response = self._vi.query(compile_verification(settings, outputs)).rstrip('\n')
+        values = response.split(';')
+        fields = 2 if outputs else 1
+        if len(values) != fields * len(settings):
+            raise OperationFailed(f'Unexpected verification response from the Precision 9140-GPIB power supply: {response}')
+        for index, setting in enumerate(settings):
+            applied = values[index * fields].strip()
+            formatted = format(setting.voltage, '.3f') + ',' + format(setting.current, '.3f')
+            if applied != formatted:
+                raise OperationFailed(f'Channel {setting.channel + 1} of the Precision 9140-GPIB power supply reports {applied}, expected {formatted}.')
+            if outputs and bool(int(values[index * fields + 1])) != setting.enabled:
+                raise OperationFailed(f'Could not set the enabled status of channel {setting.channel + 1} of the Precision 9140-GPIB power supply.')
+        self.selected_channel = 'CH' + str(settings[0].channel + 1)
+        if outputs:
+            for setting in settings:
+                logging.info(f"POWER:CH{setting.channel + 1} APPL {setting.voltage}V, {setting.current}A "
+                             f"OUTP:STAT {'ON' if setting.enabled else 'OFF'}")
+
     def enable(self):
         """Enable the output of the selected channel."""
         self.set_enable(True)
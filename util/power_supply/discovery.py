@@ -0,0 +1,160 @@
+""" Discovery of attached power supplies.
+
+Every backend and port is probed concurrently, as each probe mostly waits on I/O timeouts.
+A supply found previously can be described by its fingerprint (backend, resource and
+identity), which is tried first so a known station only needs a single identify round trip.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import pyvisa
+
+from . import ametek_power_supply
+from . import bk_power_supply
+from . import sorensen_power_supply
+from .errors import NotDetected
+
+BACKENDS = ('bk', 'ametek', 'sorensen')
+SERIAL_BACKENDS = ('ametek', 'sorensen')
+PROBE_WORKERS = 8
+
+
+@dataclass
+class DetectedSupply:
+    """ A power supply found by discovery.
+
+    Args:
+        backend (str): name of the backend, one of BACKENDS.
+        resource (str): VISA resource or serial port of the supply.
+        identity (str): identification reported by the supply (e.g. *IDN?).
+        supply (object): the opened supply.
+    """
+    backend: str
+    resource: str
+    identity: str
+    supply: object
+
+    @property
+    def fingerprint(self) -> dict:
+        """ Details needed to open the same supply again, see discover().
+        """
+        return {'backend':self.backend, 'resource':self.resource, 'identity':self.identity}
+
+
+    def close(self):
+        """ Close the supply.
+        """
+        if hasattr(self.supply, 'close'):
+            self.supply.close()
+        else:
+            self.supply.disconnect()
+
+
+def discover(known=None, backends=BACKENDS, workers=PROBE_WORKERS) -> list[DetectedSupply]:
+    """ Find the attached power supplies.
+
+    Args:
+        known (dict, optional): fingerprint of the supply found last time
+            (see DetectedSupply.fingerprint). If it is still attached and reports the same
+            identity, it is returned without probing anything else. Defaults to None.
+        backends (tuple[str], optional): backends to probe. Defaults to BACKENDS.
+        workers (int, optional): maximum number of concurrent probes. Defaults to PROBE_WORKERS.
+
+    Returns:
+        list[DetectedSupply]: supplies found, ordered by backend and resource.
+    """
+    if known:
+        try:
+            detected = probe(known['backend'], known['resource'], known.get('identity'))
+        except (KeyError, ValueError):
+            detected = None
+        if detected is not None:
+            return [detected]
+        logging.info('POWER:DISCOVERY %s not found, probing all backends', known)
+
+    serial_backends = [backend for backend in SERIAL_BACKENDS if backend in backends]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='PowerDiscovery') as pool:
+        futures = []
+        if serial_backends:
+            for port in _list_serial_ports():
+                futures.append(pool.submit(_probe_port, port, serial_backends))
+        if 'bk' in backends:
+            # Each supply opens its own resource manager, so the supply kept can be closed
+            # without affecting the others.
+            resource_manager = pyvisa.ResourceManager()
+            try:
+                resources = _list_visa_resources(resource_manager)
+            finally:
+                resource_manager.close()
+            for resource in resources:
+                futures.append(pool.submit(probe, 'bk', resource))
+        found = [future.result() for future in futures]
+
+    detected = [item for item in found if item is not None]
+    detected.sort(key=lambda item: (BACKENDS.index(item.backend), item.resource))
+    logging.info('POWER:DISCOVERY found %s', [item.fingerprint for item in detected])
+    return detected
+
+
+def probe(backend, resource, identity=None, resource_manager=None) -> DetectedSupply:
+    """ Open and identify a supply using a specific backend.
+
+    Args:
+        backend (str): name of the backend, one of BACKENDS.
+        resource (str): VISA resource or serial port to open.
+        identity (str, optional): identity the supply is expected to report.
+            Defaults to None, which accepts any identity.
+        resource_manager (pyvisa.ResourceManager, optional): used by VISA backends.
+
+    Returns:
+        DetectedSupply: the supply, or None if no matching supply could be opened.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f'Unknown power supply backend {backend}')
+    try:
+        if backend == 'bk':
+            supply = bk_power_supply.Power(resource, resource_manager)
+            found = DetectedSupply(backend, resource, supply.identity, supply)
+            if 'B&K' not in supply.identity.upper():
+                found.close()
+                raise NotDetected(resource)
+        elif backend == 'ametek':
+            supply = ametek_power_supply.Power(resource)
+            found = DetectedSupply(backend, resource, supply.identity, supply)
+        else:
+            supply = sorensen_power_supply.sorensenPower(portName=resource, baudrate=9600)
+            found = DetectedSupply(backend, resource, None, supply)
+            if supply.getModel() is None:
+                found.close()
+                raise NotDetected(resource)
+            found.identity = supply.getIdentification()
+    except Exception as err:                                #pylint: disable=broad-except
+        logging.debug('POWER:PROBE %s %s: %s', backend, resource, err)
+        return None
+
+    if identity is not None and found.identity != identity:
+        logging.info('POWER:PROBE %s %s reports %s, expected %s',
+                     backend, resource, found.identity, identity)
+        found.close()
+        return None
+    return found
+
+
+def _probe_port(port, backends) -> DetectedSupply:
+    # A serial port can only be opened once, so its backends are tried in turn.
+    for backend in backends:
+        found = probe(backend, port)
+        if found is not None:
+            return found
+    return None
+
+
+def _list_serial_ports() -> list[str]:
+    return [port.device for port in ametek_power_supply.com_ports()]
+
+
+def _list_visa_resources(resource_manager) -> list[str]:
+    # Serial resources are covered by the serial backends.
+    return [resource for resource in resource_manager.list_resources()
+            if not resource.startswith('ASRL')]
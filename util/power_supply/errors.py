@@ -17,6 +17,23 @@ class NoSupply(Exception):
         return "There must be exactly one Ametek or BK Precision 1685B power supply attached. None was found."              #pylint: disable=line-too-long
 
 class MultipleSupplies(Exception):
-    """ Used to indicate that more than one power supply has been detected on the system. """
+    """ Used to indicate that more than one power supply has been detected on the system.
+
+    Args:
+        fingerprints (list[dict], optional): fingerprints of the supplies found
+            (see discovery.DetectedSupply.fingerprint). Defaults to None.
+    """
+    def __init__(self, fingerprints=None):
+        super().__init__()
+        self.fingerprints = fingerprints or []
+
     def __str__(self):
-        return "There must be exactly one Ametek or BK Precision 1685B power supply attached. More than one was found."     #pylint: disable=line-too-long
+        message = "There must be exactly one Ametek or BK Precision 1685B power supply attached. More than one was found."  #pylint: disable=line-too-long
+        if self.fingerprints:
+            message += " Found: " + "; ".join(
+                f"{item['identity']} ({item['backend']} on {item['resource']})"
+                for item in self.fingerprints)
+        return message
+
+class VerificationFailed(Exception):
+    """ Used to indicate that a power supply does not report the state it was set to. """
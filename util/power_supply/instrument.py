@@ -0,0 +1,173 @@
+""" Non-blocking access to an instrument through a dedicated I/O thread.
+
+Each instrument is owned by a single thread that runs its commands from a priority queue, so
+callers never block on instrument round trips unless they wait on the returned futures, and
+background polling (see telemetry.TelemetrySampler) never delays a command by more than the
+request already in progress.
+"""
+import itertools
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+
+# Lower values run first; requests of the same priority run in the order submitted.
+PRIORITY_COMMAND = 0
+PRIORITY_POLL = 1
+
+
+class InstrumentThread(threading.Thread):
+    """ Runs the requests made of a single instrument, one at a time, in priority order.
+
+    Args:
+        name (str, optional): thread name, e.g. to identify the instrument in logs.
+            Defaults to 'Instrument'.
+    """
+    def __init__(self, name='Instrument'):
+        super().__init__(name=name, daemon=True)
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._closed = False
+        self._lock = threading.Lock()
+
+
+    def submit(self, function, *args, priority=PRIORITY_COMMAND, **kwargs) -> Future:
+        """ Queue a request to run on the I/O thread.
+
+        Args:
+            function (Callable): request to run.
+            priority (int, optional): PRIORITY_COMMAND or PRIORITY_POLL.
+                Defaults to PRIORITY_COMMAND.
+
+        Raises:
+            RuntimeError: if the thread has been stopped.
+
+        Returns:
+            Future: result of the request.
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f'{self.name} has been stopped')
+            self._queue.put((priority, next(self._sequence), future, function, args, kwargs))
+        return future
+
+
+    def run(self):
+        while True:
+            _, _, future, function, args, kwargs = self._queue.get()
+            if future is None:
+                break
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = function(*args, **kwargs)
+            except BaseException as err:                    #pylint: disable=broad-except
+                future.set_exception(err)
+            else:
+                future.set_result(result)
+
+
+    def stop(self, wait=True):
+        """ Stop the thread once the requests already queued have run.
+
+        Args:
+            wait (bool, optional): wait for the thread to finish. Defaults to True.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            # Sorts after every request, whatever its priority.
+            self._queue.put((float('inf'), next(self._sequence), None, None, (), {}))
+        if wait and self.is_alive() and threading.current_thread() is not self:
+            self.join()
+
+
+
+class AsyncSupply():
+    """ Power supply driven through its own I/O thread.
+
+    Wraps a supply adapter (see adapters.Supply); every method queues the request and returns
+    a Future instead of waiting for the supply.
+
+    Args:
+        supply (adapters.Supply): supply to drive.
+        name (str, optional): name of the I/O thread. Defaults to 'PowerSupply'.
+    """
+    def __init__(self, supply, name='PowerSupply'):
+        self.supply = supply
+        self._thread = InstrumentThread(name)
+        self._thread.start()
+
+
+    @property
+    def channels(self) -> int:
+        """ Number of output channels of the supply.
+        """
+        return self.supply.channels
+
+
+    @property
+    def timed(self) -> bool:
+        """ Whether switching follows the timing of a sequence, see adapters.Supply.
+        """
+        return self.supply.timed
+
+
+    def submit(self, function, *args, priority=PRIORITY_COMMAND, **kwargs) -> Future:
+        """ Queue any function of the supply adapter, see InstrumentThread.submit().
+        """
+        return self._thread.submit(function, *args, priority=priority, **kwargs)
+
+
+    def identify(self) -> Future:
+        """ Returns a Future of the identification of the supply.
+        """
+        return self.submit(self.supply.identify)
+
+
+    def configure(self, settings) -> Future:
+        """ Apply and verify voltages and currents without changing the outputs.
+
+        Args:
+            settings (list[ChannelSetting]): target state of each channel.
+        """
+        return self.submit(self.supply.configure, settings)
+
+
+    def switch(self, settings) -> Future:
+        """ Switch the outputs of the channels in order.
+
+        Args:
+            settings (list[ChannelSetting]): target state of each channel.
+        """
+        return self.submit(self.supply.switch, settings)
+
+
+    def verify(self, settings) -> Future:
+        """ Check the voltage, current and output state of the channels.
+
+        Args:
+            settings (list[ChannelSetting]): expected state of each channel.
+        """
+        return self.submit(self.supply.verify, settings)
+
+
+    def read_all_channels(self) -> Future:
+        """ Returns a Future of the voltage, current and power of every channel.
+
+        Queued behind any waiting commands, as it is intended for background polling.
+        """
+        return self.submit(self.supply.read_all_channels, priority=PRIORITY_POLL)
+
+
+    def close(self):
+        """ Close the supply once the requests already queued have run, and stop the thread.
+        """
+        try:
+            self.submit(self.supply.close).result()
+        except Exception as err:                            #pylint: disable=broad-except
+            logging.debug('Unable to close the power supply: %s', err)
+        finally:
+            self._thread.stop()
@@ -2,6 +2,7 @@
 """
 
 import ctypes
+import logging
 
 MB_STYLES_OK = 0
 MB_STYLES_OK_CANCEL = 1
@@ -13,6 +14,10 @@ MB_STYLES_CANCEL_TRYAGAIN_CONTINUE = 6
 
 
 def MessageBox(title, text, style):
+    if not hasattr(ctypes, 'windll'):
+        # No message box support (e.g. headless runs on Linux); record the request instead.
+        logging.warning('%s: %s', title, text)
+        return None
     return ctypes.windll.user32.MessageBoxW(0, text, title, style)
 
 
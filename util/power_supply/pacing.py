@@ -0,0 +1,94 @@
+""" Command pacing and verification levels shared by the serial power supply drivers.
+"""
+import time
+
+# Verification performed after each setting is changed
+VERIFY_NONE = 'none'            # trust the instrument
+VERIFY_READBACK = 'readback'    # read the setting back and compare
+VERIFY_FULL = 'full'            # read back and also check the error queue
+VERIFICATION_LEVELS = (VERIFY_NONE, VERIFY_READBACK, VERIFY_FULL)
+
+
+def check_verification(level) -> str:
+    """ Validate a verification level.
+
+    Raises:
+        ValueError: if the level is not one of VERIFICATION_LEVELS.
+
+    Returns:
+        str: the level.
+    """
+    if level not in VERIFICATION_LEVELS:
+        raise ValueError(
+            f'Unknown verification level {level!r}, expected one of {VERIFICATION_LEVELS}')
+    return level
+
+
+class AdaptivePacer():
+    """ Spaces the commands sent to an instrument according to its observed response time.
+
+    The period between commands follows an exponentially weighted moving average of the
+    response times, scaled by a safety margin and kept within [minimum, maximum]. It starts at
+    maximum until responses have been observed, and returns there after a failure.
+
+    Args:
+        minimum (float, optional): shortest period in seconds. Defaults to .005.
+        maximum (float, optional): longest (and initial) period in seconds. Defaults to .1.
+        margin (float, optional): period as a multiple of the average response time.
+            Defaults to 1.5.
+        smoothing (float, optional): weight of each new observation. Defaults to .2.
+        clock (Callable, optional): monotonic clock. Defaults to time.monotonic.
+        sleep (Callable, optional): sleep function. Defaults to time.sleep.
+    """
+    def __init__(self, minimum=.005, maximum=.1, margin=1.5, smoothing=.2,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.margin = margin
+        self.smoothing = smoothing
+        self.period = maximum
+        self.response_time = None
+        self._clock = clock
+        self._sleep = sleep
+        self.last_command_time = clock() - maximum
+
+
+    def wait(self):
+        """ Wait until the instrument is ready for the next command.
+        """
+        remaining = self.last_command_time + self.period - self._clock()
+        while remaining > 0:
+            self._sleep(remaining)
+            remaining = self.last_command_time + self.period - self._clock()
+
+
+    def sent(self):
+        """ Record that a command has just been sent.
+        """
+        self.last_command_time = self._clock()
+
+
+    def received(self):
+        """ Record that a response to the last command has just been received.
+        """
+        self.observe(self._clock() - self.last_command_time)
+
+
+    def observe(self, response_time):
+        """ Update the period from an observed response time.
+
+        Args:
+            response_time (float): seconds from sending a command to receiving its response.
+        """
+        if self.response_time is None:
+            self.response_time = response_time
+        else:
+            self.response_time += self.smoothing * (response_time - self.response_time)
+        self.period = min(max(self.margin * self.response_time, self.minimum), self.maximum)
+
+
+    def backoff(self):
+        """ Return to the longest period, e.g. after a missing response or a failed command.
+        """
+        self.response_time = None
+        self.period = self.maximum
@@ -0,0 +1,182 @@
+""" Power sequencing driven by a recipe, e.g. from the application settings.
+
+A recipe is a list of steps, each switching the output of one channel. The delay of a step is
+the minimum time between the previous step and this one. Steps are scheduled against a
+monotonic clock, the gaps actually achieved are measured and logged, and a sequence that runs
+later than its tolerance allows fails instead of passing silently.
+"""
+import logging
+import time
+from dataclasses import dataclass
+
+from .bk_power_supply import ChannelSetting
+
+DEFAULT_TOLERANCE = .1
+
+
+class SequenceError(Exception):
+    """ Used to indicate that a power sequence did not meet its timing tolerances.
+    """
+    def __init__(self, violations):
+        super().__init__()
+        self.violations = violations
+
+    def __str__(self):
+        details = ', '.join(
+            f"CH{timing.channel + 1} after {timing.gap * 1e3:.1f} ms (delay {timing.delay * 1e3:.1f} ms)"
+            for timing in self.violations)
+        return f"Power sequence timing out of tolerance: {details}."
+
+
+@dataclass
+class Step:
+    """ Single step of a power sequence recipe.
+
+    Args:
+        channel (int): channel index, 0 = Channel 1.
+        voltage (float): voltage to apply.
+        current (float): current limit to apply.
+        delay (float, optional): seconds to wait after the previous step. Defaults to 0, which
+            switches the channel in the same program as the previous step.
+        tolerance (float, optional): seconds the step may run late by. Defaults to None, which
+            uses the tolerance of the sequence.
+    """
+    channel: int
+    voltage: float
+    current: float
+    delay: float = 0.0
+    tolerance: float = None
+
+
+@dataclass
+class StepTiming:
+    """ Achieved timing of a step.
+
+    Args:
+        channel (int): channel index.
+        delay (float): requested delay in seconds.
+        gap (float): seconds between the previous step (or the start) and this step completing.
+        time (float): seconds from the start of the sequence to this step completing.
+    """
+    channel: int
+    delay: float
+    gap: float
+    time: float
+
+    @property
+    def late(self) -> float:
+        """ Seconds by which the step missed its delay.
+        """
+        return self.gap - self.delay
+
+
+def load_recipe(recipe) -> list[Step]:
+    """ Create the steps of a power sequence from their settings.
+
+    Args:
+        recipe (list[dict]): steps with 'channel', 'voltage', 'current' and optionally 'delay'
+            and 'tolerance' keys.
+
+    Returns:
+        list[Step]: steps in switching order.
+    """
+    steps = []
+    for values in recipe:
+        try:
+            step = Step(**values)
+        except TypeError as err:
+            raise ValueError(f"Invalid power sequence step {values}: {err}") from err
+        if step.delay < 0:
+            raise ValueError(f"Invalid power sequence step {values}: negative delay")
+        steps.append(step)
+    return steps
+
+
+class PowerSequencer:
+    """ Switches the channels of a power supply following a recipe.
+
+    Args:
+        recipe (list[Step]): steps in switching order.
+        tolerance (float, optional): seconds any step may run late by.
+            Defaults to DEFAULT_TOLERANCE.
+        clock (Callable, optional): monotonic clock. Defaults to time.monotonic.
+        sleep (Callable, optional): sleep function. Defaults to time.sleep.
+    """
+    def __init__(self, recipe, tolerance=DEFAULT_TOLERANCE, clock=time.monotonic,
+                 sleep=time.sleep):
+        self.recipe = recipe
+        self.tolerance = tolerance
+        self._clock = clock
+        self._sleep = sleep
+
+
+    def run(self, supply, enabled=True) -> list[StepTiming]:
+        """ Run the sequence, enabling or disabling each channel.
+
+        Channels being enabled are configured and verified before any output is switched on.
+        Every step is run even if one is late, so the sequence always completes, and the state
+        of all channels is verified at the end. A step is timed once its switch command has been
+        written, before anything is verified. Supplies switched by the operator (see
+        adapters.Supply.timed) are not held to the tolerances. Each command is queued on the I/O thread of the
+        supply and waited for, so background polling continues during the delays.
+
+        Args:
+            supply (instrument.AsyncSupply): power supply to switch.
+            enabled (bool, optional): switch outputs on rather than off. Defaults to True.
+
+        Raises:
+            SequenceError: if any step ran later than its tolerance allows.
+
+        Returns:
+            list[StepTiming]: achieved timing of each step.
+        """
+        settings = [ChannelSetting(step.channel, step.voltage, step.current, enabled)
+                    for step in self.recipe]
+        if enabled:
+            supply.configure(settings).result()
+
+        timings = []
+        start = previous = self._clock()
+        for group in self._get_groups():
+            self._wait_until(previous + self.recipe[group[0]].delay)
+            supply.switch([settings[index] for index in group]).result()
+            now = self._clock()
+            for position, index in enumerate(group):
+                gap = now - previous if position == 0 else 0.0
+                timings.append(StepTiming(
+                    self.recipe[index].channel, self.recipe[index].delay, gap, now - start))
+            previous = now
+
+        supply.verify(settings).result()
+
+        violations = []
+        for step, timing in zip(self.recipe, timings):
+            tolerance = self.tolerance if step.tolerance is None else step.tolerance
+            logging.info('POWER:SEQUENCE CH%d %s after %.1f ms (delay %.1f ms)',
+                         timing.channel + 1, 'ON' if enabled else 'OFF', timing.gap * 1e3,
+                         timing.delay * 1e3)
+            if supply.timed and timing.late > tolerance:
+                violations.append(timing)
+        if violations:
+            raise SequenceError(violations)
+        return timings
+
+
+    def _get_groups(self) -> list[list[int]]:
+        """ Indexes of the steps switched by each program; steps without a delay join the
+        previous program.
+        """
+        groups = []
+        for index, step in enumerate(self.recipe):
+            if groups and step.delay == 0:
+                groups[-1].append(index)
+            else:
+                groups.append([index])
+        return groups
+
+
+    def _wait_until(self, deadline):
+        remaining = deadline - self._clock()
+        while remaining > 0:
+            self._sleep(remaining)
+            remaining = deadline - self._clock()
@@ -2,6 +2,8 @@
 
 import serial
 
+from .pacing import AdaptivePacer, VERIFY_FULL, VERIFY_NONE, check_verification
+
 # Assumes the following settings for the DCS M9 RS-232 Interface
 # Baud-rate = 19200
 # Hardware Flow Control = None
@@ -19,10 +21,18 @@ class sorensenPower(object):
     COMMAND_SET_CURRENT             = ":SOUR:CURR {:1.03f}\r"
     COMMAND_GET_STATUS              = ":SOUR:STAT:BLOC?\r"
     COMMAND_RETURN_LOCAL            = ":SYST:LOCAL ON\r"
+    COMMAND_GET_VOLTAGE             = ":SOUR:VOLT?\r"
+    COMMAND_GET_CURRENT             = ":SOUR:CURR?\r"
+    COMMAND_GET_ERROR               = ":SYST:ERR?\r"
 
-    def __init__(self, portName="/dev/ttyUSB0", baudrate=19200, debug=False):
+    def __init__(self, portName="/dev/ttyUSB0", baudrate=19200, debug=False,
+                 verification=VERIFY_NONE):
         self.portName = portName
         self.baudrate = baudrate
+        # Commands are paced by the observed response time rather than by waiting for a
+        # response that set commands never send.
+        self.pacer = AdaptivePacer(maximum=self.DEFAULT_TIMEOUT)
+        self.verification = check_verification(verification)
 
         self.port = serial.Serial()
         self.port.baudrate = self.baudrate
@@ -51,14 +61,40 @@ class sorensenPower(object):
             if (self.debug is True):
                 print(command.encode())
 
+            self.pacer.wait()
             self.port.write(command.encode())
-            result = self.port.readline().decode(encoding='UTF-8')
+            self.pacer.sent()
 
-            if (self.debug is True):
-                print("> " + result)
+            # Only queries respond; waiting for a response to anything else just times out.
+            if '?' in command:
+                result = self.port.readline().decode(encoding='UTF-8')
+                if result:
+                    self.pacer.received()
+                else:
+                    self.pacer.backoff()
+
+                if (self.debug is True):
+                    print("> " + result)
 
         return result
 
+    def _confirm(self, query, expected):
+        """ Verify a change according to the verification level.
+
+        Returns:
+            bool: False if the setting read back differently or the error queue is not empty.
+        """
+        if self.verification == VERIFY_NONE:
+            return True
+        try:
+            if abs(float(self._writeCommand(query).strip()) - expected) > 1e-3:
+                return False
+        except (AttributeError, ValueError):
+            return False
+        if self.verification == VERIFY_FULL:
+            return self._writeCommand(self.COMMAND_GET_ERROR).strip().startswith('0')
+        return True
+
     def connect(self):
         success = False
 
@@ -123,12 +159,18 @@ class sorensenPower(object):
 
         return current
 
-    def setOutputVoltage(self, voltage):
+    def getVoltageSetting(self):
+        voltageASCII = self._writeCommand(self.COMMAND_GET_VOLTAGE)
+        voltage = float(voltageASCII.strip())
+
+        return voltage
+
+    def setOutputVoltage(self, voltage, confirm=True):
         success = False
 
         if ((voltage >= 0.0) and (voltage <= self.maxVoltage)):
             self._writeCommand(self.COMMAND_SET_VOLTAGE.format(voltage))
-            success = True
+            success = self._confirm(self.COMMAND_GET_VOLTAGE, voltage) if confirm else True
 
         return success
 
@@ -145,7 +187,7 @@ class sorensenPower(object):
 
         if ((current >= 0) and (current <= self.maxCurrent)):
             self._writeCommand(self.COMMAND_SET_CURRENT.format(current))
-            success = True
+            success = self._confirm(self.COMMAND_GET_CURRENT, current)
 
         return success
 
@@ -236,6 +278,6 @@ def com_ports():
     def _port(port):
         ''' Checks that a provided port is associated with the FTDI manufacturer.
         '''
-        return port.manufacturer.startswith('FTDI')
+        return (port.manufacturer or '').startswith('FTDI')
 
     return filter(_port, serial.tools.list_ports.comports())
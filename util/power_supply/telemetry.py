@@ -0,0 +1,208 @@
+""" Background sampling of power supply telemetry (voltage, current and power of every channel).
+
+Samples are kept in a preallocated ring buffer, so memory use is fixed however long the unit
+is powered, and can be saved as a NumPy array file for later analysis of e.g. inrush and boot
+current profiles.
+"""
+import concurrent.futures
+import logging
+import threading
+import time
+
+import numpy as np
+
+DEFAULT_RATE = 10.0
+DEFAULT_CAPACITY = 36000
+CHANNELS = 3
+FIELDS = ('voltage', 'current', 'power')
+
+
+class TelemetrySampler():
+    """ Polls the voltage, current and power of all channels of a supply at a fixed rate.
+
+    Reads are queued on the I/O thread of the supply behind any waiting commands (see
+    instrument.AsyncSupply), so polling never delays a command by more than one read. A sample
+    is skipped while the previous read is still waiting.
+
+    Each row of samples is the time in seconds since start() followed by the voltage, current
+    and power of each channel in turn.
+
+    Args:
+        supply (instrument.AsyncSupply): supply to sample.
+        rate (float, optional): samples per second. Defaults to DEFAULT_RATE.
+        capacity (int, optional): number of samples kept, after which the oldest samples are
+            overwritten. Defaults to DEFAULT_CAPACITY.
+        channels (int, optional): number of channels reported by the supply.
+            Defaults to CHANNELS.
+        clock (Callable, optional): monotonic clock. Defaults to time.monotonic.
+    """
+    def __init__(self, supply, rate=DEFAULT_RATE, capacity=DEFAULT_CAPACITY, channels=CHANNELS,
+                 clock=time.monotonic):
+        self._supply = supply
+        self._period = 1 / rate
+        self._channels = channels
+        self._clock = clock
+        self._buffer = np.zeros((capacity, 1 + channels * len(FIELDS)), dtype=np.float32)
+        self._buffer_lock = threading.Lock()
+        self._count = 0
+        self._started = None
+        self._stopped = None
+        self._stop_event = threading.Event()
+        self._pending = None
+        self._thread = threading.Thread(target=self._run, name='TelemetrySampler', daemon=True)
+        self.skipped = 0
+        self.errors = 0
+
+
+    def start(self):
+        """ Start sampling in the background.
+        """
+        self._started = self._clock()
+        self._thread.start()
+
+
+    def stop(self):
+        """ Stop sampling and wait for the background thread to finish.
+        """
+        self._stop_event.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        if self._stopped is None:
+            self._stopped = self._clock()
+
+
+    def _run(self):
+        deadline = self._started
+        while not self._stop_event.wait(max(0.0, deadline - self._clock())):
+            deadline += self._period
+            # Skip missed periods instead of sampling in a burst to catch up.
+            now = self._clock()
+            if deadline < now:
+                deadline = now
+            self._sample()
+
+
+    def _sample(self):
+        if self._pending is None:
+            self._pending = self._supply.read_all_channels()
+        else:
+            # The supply is still busy with other commands.
+            self.skipped += 1
+        try:
+            values = self._pending.result(timeout=self._period)
+        except concurrent.futures.TimeoutError:
+            # Not the builtin TimeoutError before Python 3.11.
+            return
+        except Exception as err:                            #pylint: disable=broad-except
+            self._pending = None
+            self.errors += 1
+            logging.debug('Unable to sample power supply telemetry: %s', err)
+            return
+        self._pending = None
+        self.add(self._clock() - self._started, values)
+
+
+    def add(self, elapsed, values):
+        """ Store a sample.
+
+        Args:
+            elapsed (float): seconds since sampling started.
+            values (list[float]): voltage, current and power of each channel in turn.
+        """
+        width = self._buffer.shape[1] - 1
+        if len(values) != width:
+            self.errors += 1
+            return
+        with self._buffer_lock:
+            row = self._buffer[self._count % len(self._buffer)]
+            row[0] = elapsed
+            row[1:] = values
+            self._count += 1
+
+
+    @property
+    def elapsed(self) -> float:
+        """ Seconds since sampling started.
+        """
+        return self._clock() - self._started
+
+
+    def read_since(self, index):
+        """ Samples stored since an earlier call, for following the samples while running.
+
+        Args:
+            index (int): index returned by the previous call, 0 for the first call.
+
+        Returns:
+            tuple[np.ndarray, int]: new samples oldest first (any already overwritten are
+                lost), and the index to pass to the next call.
+        """
+        with self._buffer_lock:
+            count = self._count
+            capacity = len(self._buffer)
+            indexes = np.arange(max(index, count - capacity), count) % capacity
+            return self._buffer[indexes], count
+
+
+    @property
+    def samples(self) -> np.ndarray:
+        """ Stored samples, oldest first.
+        """
+        with self._buffer_lock:
+            capacity = len(self._buffer)
+            if self._count <= capacity:
+                return self._buffer[:self._count].copy()
+            start = self._count % capacity
+            return np.concatenate((self._buffer[start:], self._buffer[:start]))
+
+
+    def save(self, path):
+        """ Save the stored samples as a NumPy array file (see numpy.load).
+
+        Args:
+            path (str): path to the file, conventionally ending in '.npy'.
+        """
+        np.save(path, self.samples)
+
+
+    def summary(self) -> dict:
+        """ Summary statistics of the stored samples.
+
+        Returns:
+            dict: sample counts and rate, with the mean, minimum and maximum of each field
+                keyed by channel (e.g. summary['CH1']['current']['max']).
+        """
+        samples = self.samples
+        stopped = self._stopped if self._stopped is not None else self._clock()
+        elapsed = stopped - self._started if self._started is not None else 0.0
+        content = {
+            'samples':self._count,
+            'skipped':self.skipped,
+            'errors':self.errors,
+            'rate':self._count / elapsed if elapsed > 0 else 0.0,
+        }
+        if len(samples):
+            for channel in range(self._channels):
+                fields = {}
+                for name in FIELDS:
+                    column = samples[:, get_column(channel, name)]
+                    fields[name] = {
+                        'mean':float(column.mean()),
+                        'min':float(column.min()),
+                        'max':float(column.max()),
+                    }
+                content[f'CH{channel + 1}'] = fields
+        return content
+
+
+def get_column(channel, field) -> int:
+    """ Column of the samples holding a field of a channel.
+
+    Args:
+        channel (int): channel index, 0 = Channel 1.
+        field (str): one of FIELDS.
+
+    Returns:
+        int: column index.
+    """
+    return 1 + channel * len(FIELDS) + FIELDS.index(field)
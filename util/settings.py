@@ -2,14 +2,27 @@
 
 Settings files are written in YAML format.
 A dataclass instance is to be provided as a means for defining the structure and default values.
+
+Loading is skipped while the file's modification time and size are unchanged, and saving only
+writes when the values differ from those last read or written, so both are cheap enough to call
+per unit.
 """
 
+import copy
 import os
 import dataclasses
+import shutil
+import tempfile
+import threading
 from os.path import getmtime
 from datetime import datetime
 import yaml
 
+# Use the C accelerated loader provided by libyaml when available.
+_YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+WATCH_PERIOD = 2.0
+
 
 class ApplicationSettings:
     """ Used to manage a settings files with options for loading, saving, and resetting to defaults.
@@ -23,42 +36,125 @@ class ApplicationSettings:
         self.path = path
         self._defaults = dataclasses.replace(defaults)
         self._current_values = dataclasses.replace(defaults)
+        # (mtime_ns, size) of the settings file when last read or written
+        self._stamp = None
+        # Copy of the values as they were last read from or written to the settings file
+        self._stored = None
+        self._lock = threading.RLock()
 
 
-    def save(self):
+    def save(self, force=False):
         """ Write the current setting values to a settings file.
-        """
-        serialized_data = yaml.dump(
-            self._current_values.__dict__, Dumper=_CustomYamlDumper, default_flow_style=False)
 
-        # Create parent directory if not present
-        parent = os.path.dirname(self.path)
-        if not os.path.exists(parent):
-            os.makedirs(parent)
+        The file is only written if the values differ from those last read or written, or the
+        file has changed since. The file is replaced atomically so that a concurrent reader never
+        sees a partially written file.
 
-        with open(self.path, 'w', encoding='utf-8') as ref:
-            ref.write(serialized_data)
+        Args:
+            force (bool, optional): write even if nothing has changed. Defaults to False.
 
+        Returns:
+            bool: True if the file was written.
+        """
+        with self._lock:
+            data = self._current_values.__dict__
+            if not force and data == self._stored and self._stamp == _get_stamp(self.path):
+                return False
+
+            serialized_data = yaml.dump(data, Dumper=_CustomYamlDumper, default_flow_style=False)
 
-    def load(self):
+            # Create parent directory if not present
+            parent = os.path.dirname(self.path)
+            if not os.path.exists(parent):
+                os.makedirs(parent)
+
+            handle, temp_path = tempfile.mkstemp(
+                dir=parent, prefix=os.path.basename(self.path), suffix='.tmp')
+            try:
+                with os.fdopen(handle, 'w', encoding='utf-8') as ref:
+                    ref.write(serialized_data)
+                if os.path.exists(self.path):
+                    shutil.copymode(self.path, temp_path)
+                else:
+                    os.chmod(temp_path, 0o644)
+                os.replace(temp_path, self.path)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+
+            self._stored = copy.deepcopy(data)
+            self._stamp = _get_stamp(self.path)
+            return True
+
+
+    def load(self, force=False):
         """ Replace the current settings values with those stored in the settings file.
 
         Use the default value if the stored settings file is missing a setting.
-        """
-        if not os.path.exists(self.path):
-            self.reset()
-            return
+        Nothing is read if the file is unchanged since it was last read or written.
 
-        with open(self.path, 'r', encoding='utf-8') as ref:
-            try:
-                deserialized_data = yaml.safe_load(ref.read()) or {}
-            except yaml.scanner.ScannerError:
-                deserialized_data = {}
-            self.reset()
-            self._current_values = dataclasses.replace(self._defaults)
+        Args:
+            force (bool, optional): read the file even if it appears unchanged. Defaults to False.
+
+        Returns:
+            bool: True if the values were (re)loaded.
+        """
+        with self._lock:
+            stamp = _get_stamp(self.path)
+            if not force and stamp is not None and stamp == self._stamp:
+                return False
+
+            if stamp is None:
+                self.reset()
+                self._stamp = None
+                self._stored = None
+                return True
+
+            with open(self.path, 'r', encoding='utf-8') as ref:
+                try:
+                    deserialized_data = yaml.load(ref.read(), Loader=_YamlLoader) or {}
+                except yaml.YAMLError:
+                    deserialized_data = {}
+            values = dataclasses.replace(self._defaults)
             for name, value in deserialized_data.items():
-                if name in self._current_values.__dict__.keys():
-                    setattr(self._current_values, name, value)
+                if name in values.__dict__.keys():
+                    setattr(values, name, value)
+            self._current_values = values
+            self._stamp = stamp
+            # Only known values actually present in the file count as stored, so missing settings
+            # are written out (and unknown ones dropped) by the next save().
+            self._stored = copy.deepcopy(
+                {name:value for name, value in deserialized_data.items() if name in values.__dict__})
+            return True
+
+
+    def refresh(self):
+        """ Load in latest settings and then save merged values.
+
+        Returns:
+            bool: True if the values were reloaded.
+        """
+        with self._lock:
+            loaded = self.load()
+            self.save()
+            return loaded
+
+
+    def watch(self, callback=None, period=WATCH_PERIOD):
+        """ Watch the settings file for external changes, reloading the values when it changes.
+
+        Args:
+            callback (Callable, optional): called with the new values after each reload.
+                Note that this is called on the watcher thread. Defaults to None.
+            period (float, optional): seconds between checks. Defaults to WATCH_PERIOD.
+
+        Returns:
+            SettingsWatcher: started watcher thread, see SettingsWatcher.stop().
+        """
+        watcher = SettingsWatcher(self, callback, period)
+        watcher.start()
+        return watcher
 
 
     def reset(self):
@@ -74,6 +170,37 @@ class ApplicationSettings:
         return self._current_values
 
 
+
+class SettingsWatcher(threading.Thread):
+    """ Background thread that reloads settings when the settings file changes.
+
+    Args:
+        settings (ApplicationSettings): settings to keep up to date.
+        callback (Callable, optional): called with the new values after each reload.
+        period (float, optional): seconds between checks. Defaults to WATCH_PERIOD.
+    """
+    def __init__(self, settings, callback=None, period=WATCH_PERIOD):
+        super().__init__(name='SettingsWatcher', daemon=True)
+        self._settings = settings
+        self._callback = callback
+        self._period = period
+        self._stop_event = threading.Event()
+
+
+    def run(self):
+        while not self._stop_event.wait(self._period):
+            if self._settings.load() and self._callback:
+                self._callback(self._settings.values)
+
+
+    def stop(self):
+        """ Stop watching and wait for the thread to finish.
+        """
+        self._stop_event.set()
+        if self.is_alive() and self is not threading.current_thread():
+            self.join()
+
+
 # Example of method for getting default settings
 def _get_default_settings():
     # Define the default values used for settings.
@@ -111,6 +238,16 @@ def get_install_timestamp():
     return timestring
 
 
+def _get_stamp(path):
+    """ Modification time and size of a file, or None if the file does not exist.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
 class _CustomYamlDumper(yaml.Dumper):                    #pylint: disable=too-many-ancestors
     """ Customized Yaml Dumper provided to make lists indented and a little nicer to read.
     """
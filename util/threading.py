@@ -3,54 +3,182 @@
 
 import threading
 import queue
+import tkinter as tk
+
+
+class Message():                                            #pylint: disable=too-few-public-methods
+    """ Base class for messages posted by a background worker for handling on the UI thread.
+
+    PRIORITY messages are handled ahead of all other waiting messages, and only the latest
+    message of each PRIORITY type is handled per batch.
+    """
+    PRIORITY = False
+
+    def merge(self, other):                                 #pylint: disable=unused-argument
+        """ Combine this message with the message that immediately follows it.
+
+        Args:
+            other (Message): the following message.
+
+        Returns:
+            Message: a single message equivalent to both, or None if they cannot be combined.
+        """
+        return None
+
 
 
 class BackgroundWorkerGeneric(threading.Thread):
     """ Wrapped thread with monitor calls handled in primary thread.
 
-    NOTE: takes in a tkinter frame as it uses the built in .after() method to reschedule the monitor.
+    Messages are handled in batches on the UI thread.  Posting a message wakes the UI thread
+    with a virtual event rather than waiting for a polling period to expire.
+
+    NOTE: takes in a tkinter frame as it uses the built in event handling to schedule the monitor.
     """
-    MONITOR_PERIOD = 100
+    WAKE_EVENT = '<<BackgroundWorkerWake>>'
+    # Safety net for wakes that cannot be delivered (e.g. posted before the mainloop started).
+    MONITOR_PERIOD = 500
 
     def __init__(self, frame, update, final, func=None):
         super().__init__()
         self.queue = queue.Queue()
+        self.priority_queue = queue.Queue()
         self.frame = frame
         self.update = update
         self.final = final
         self._func = func
+        self._wake_pending = threading.Event()
+        self._finished = False
+        self._finalized = False
 
 
     def run(self):
         """ Placeholder run() method to use for when func is passed in instead of overriden.
         """
-        if self._func:
-            self._func()
+        try:
+            if self._func:
+                self._func()
+        finally:
+            self._finished = True
+            self._wake()
 
 
     def start(self):
+        self.frame.bind(self.WAKE_EVENT, lambda _: self.process_messages())
         super().start()
         self._monitor(self)
 
 
+    def post(self, message: Message):
+        """ Post a message to be handled on the UI thread.
+
+        Args:
+            message (Message): message to pass to the update handler.
+        """
+        if message.PRIORITY:
+            self.priority_queue.put(message)
+        else:
+            self.queue.put(message)
+        self._wake()
+
+
+    def _wake(self):
+        """ Wake the UI thread, unless a wake is already pending.
+        """
+        if self._wake_pending.is_set():
+            return
+        self._wake_pending.set()
+        try:
+            self.frame.event_generate(self.WAKE_EVENT, when='tail')
+        except (RuntimeError, tk.TclError):
+            # UI is not running (yet); the monitor picks the messages up instead.
+            pass
+
+
     def _monitor(self, thread):
         """ Monitor shared queue for messages while rescheduling the monitor function if thread is alive.
 
         Args:
             thread (threading.Thread): [description]
         """
-        keep_checking = thread.is_alive()
-
         # Check for messages and pass to update if available
-        for _ in range(thread.queue.qsize()):
-            try:
-                message = thread.queue.get(0)
-                self.update(message)
-            except queue.Empty:
-                pass
-
-        # Reschedule based on whether the thread was still alive at the top of the method
-        if keep_checking:
+        self.process_messages()
+
+        # Reschedule until the thread has been finalized
+        if not self._finalized:
             self.frame.after(self.MONITOR_PERIOD, lambda: self._monitor(thread))
-        else:
-            thread.final()
+
+
+    def process_messages(self):
+        """ Pass all messages currently waiting to the update handler.
+
+        Priority messages are handled first, then the remaining messages in order with
+        consecutive messages merged where possible (see Message.merge).
+        """
+        self._wake_pending.clear()
+        finished = self._finished
+
+        latest = {}
+        for message in _drain(self.priority_queue):
+            latest[type(message)] = message
+        for message in latest.values():
+            self.update(message)
+
+        pending = None
+        for message in _drain(self.queue):
+            if pending is not None:
+                merged = pending.merge(message)
+                if merged is not None:
+                    pending = merged
+                    continue
+                self.update(pending)
+            pending = message
+        if pending is not None:
+            self.update(pending)
+
+        if finished and not self._finalized:
+            self._finalized = True
+            self.final()
+
+
+
+class BackgroundWorkerHeadless(BackgroundWorkerGeneric):
+    """ Background worker for use without a tkinter event loop.
+
+    Messages are not dispatched automatically; the owning thread is expected to call poll()
+    regularly, which passes waiting messages to the update handler on the calling thread.
+    """
+    def __init__(self, update, final, func=None):
+        super().__init__(None, update, final, func=func)
+        self.daemon = True
+
+
+    def start(self):
+        threading.Thread.start(self)
+
+
+    def _wake(self):
+        self._wake_pending.set()
+
+
+    def poll(self, timeout=None):
+        """ Wait for messages and pass them to the update handler.
+
+        Args:
+            timeout (float, optional): maximum number of seconds to wait for a message.
+                Defaults to None, which returns immediately if no messages are waiting.
+        """
+        if timeout:
+            self._wake_pending.wait(timeout)
+        self.process_messages()
+
+
+
+def _drain(source: queue.Queue) -> list:
+    messages = []
+    for _ in range(source.qsize()):
+        try:
+            messages.append(source.get(0))
+        except queue.Empty:
+            break
+    return messages
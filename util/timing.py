@@ -1,7 +1,8 @@
 ''' Timing utility module with support for timing tasks with Timer class and writing results to a
-    TimeLog file.
+    TimeLog file.  SpanTimer records nested durations into a tree.
 '''
 import os
+import threading
 import time
 import csv
 
@@ -70,12 +71,255 @@ class Timer():
 
 
 
+class _SpanNode():                                          #pylint: disable=too-few-public-methods
+    __slots__ = ('seconds', 'calls', 'children')
+
+    def __init__(self):
+        self.seconds = 0.
+        self.calls = 0
+        self.children = {}
+
+
+    def to_dict(self) -> dict:
+        content = {'seconds':self.seconds, 'calls':self.calls} if self.calls else {}
+        for name, child in self.children.items():
+            content[name] = child.to_dict()
+        return content
+
+
+
+class _Span():
+    """ Context manager timing a single entry into a span (see SpanTimer.span).
+    """
+    __slots__ = ('_timer', '_name', '_node', '_start')
+
+    def __init__(self, timer, name):
+        self._timer = timer
+        self._name = name
+        self._node = None
+        self._start = None
+
+
+    def __enter__(self):
+        stack = self._timer._get_stack()                    #pylint: disable=protected-access
+        self._node = self._timer._get_node(                 #pylint: disable=protected-access
+            stack[-1] if stack else self._timer._root,      #pylint: disable=protected-access
+            self._name)
+        stack.append(self._node)
+        self._start = time.perf_counter()
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        elapsed = time.perf_counter() - self._start
+        self._timer._get_stack().pop()                      #pylint: disable=protected-access
+        node = self._node
+        node.seconds += elapsed
+        node.calls += 1
+
+
+
+class SpanTimer():
+    """ Records the duration of nested, named spans into a tree.
+
+    Span names are dotted paths relative to the span currently open on the calling thread,
+    so these are equivalent:
+
+        with timer.span('acquire.transfer'):
+            ...
+
+        with timer.span('acquire'):
+            with timer.span('transfer'):
+                ...
+
+    Durations are accumulated in float seconds along with the number of calls, so a span can be
+    entered repeatedly (e.g. around every remote call).
+    """
+    def __init__(self):
+        self._root = _SpanNode()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+
+    def span(self, name: str) -> _Span:
+        """ Returns a context manager that times the enclosed block.
+
+        Args:
+            name (str): dotted name of the span.
+        """
+        return _Span(self, name)
+
+
+    def _get_stack(self) -> list:
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+
+    def _get_node(self, parent: _SpanNode, name: str) -> _SpanNode:
+        node = parent
+        for part in name.split('.'):
+            child = node.children.get(part)
+            if child is None:
+                with self._lock:
+                    child = node.children.setdefault(part, _SpanNode())
+            node = child
+        return node
+
+
+    def to_dict(self) -> dict:
+        """ Returns the tree of spans.
+
+        Each span is a dictionary holding its 'seconds' and 'calls' (omitted for spans that
+        were only entered through a dotted name) along with its child spans by name.
+        """
+        return self._root.to_dict()
+
+
+
+class P2Quantile():
+    """ Streaming estimate of a single quantile using the P-square algorithm.
+
+    Uses constant memory regardless of the number of samples (Jain & Chlamtac, 1985).
+
+    Args:
+        quantile (float): quantile to estimate, between 0 and 1.
+    """
+    def __init__(self, quantile):
+        self.quantile = quantile
+        self._heights = []
+        self._positions = [1, 2, 3, 4, 5]
+        self._desired = [1, 1 + 2*quantile, 1 + 4*quantile, 3 + 2*quantile, 5]
+        self._increments = [0, quantile/2, quantile, (1 + quantile)/2, 1]
+
+
+    def add(self, value):
+        """ Add a sample to the estimate.
+        """
+        heights = self._heights
+        if len(heights) < 5:
+            heights.append(value)
+            heights.sort()
+            return
+
+        # Find the cell the value falls in, extending the extremes where required
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = max(heights[4], value)
+            cell = 3
+        else:
+            cell = next(index for index in range(4) if value < heights[index + 1])
+
+        positions = self._positions
+        for index in range(cell + 1, 5):
+            positions[index] += 1
+        for index in range(5):
+            self._desired[index] += self._increments[index]
+
+        # Adjust the middle markers if they are off their desired positions
+        for index in range(1, 4):
+            delta = self._desired[index] - positions[index]
+            if (delta >= 1 and positions[index + 1] - positions[index] > 1) or \
+                    (delta <= -1 and positions[index - 1] - positions[index] < -1):
+                step = 1 if delta > 0 else -1
+                height = self._parabolic(index, step)
+                if not heights[index - 1] < height < heights[index + 1]:
+                    height = self._linear(index, step)
+                heights[index] = height
+                positions[index] += step
+
+
+    def _parabolic(self, index, step):
+        heights, positions = self._heights, self._positions
+        return heights[index] + step / (positions[index + 1] - positions[index - 1]) * (
+            (positions[index] - positions[index - 1] + step)
+            * (heights[index + 1] - heights[index]) / (positions[index + 1] - positions[index])
+            + (positions[index + 1] - positions[index] - step)
+            * (heights[index] - heights[index - 1]) / (positions[index] - positions[index - 1]))
+
+
+    def _linear(self, index, step):
+        heights, positions = self._heights, self._positions
+        return heights[index] + step * (heights[index + step] - heights[index]) / (
+            positions[index + step] - positions[index])
+
+
+    @property
+    def value(self):
+        """ Current estimate of the quantile, None if no samples have been added.
+        """
+        heights = self._heights
+        if not heights:
+            return None
+        if len(heights) < 5:
+            # Exact (nearest rank) until there are enough samples for the markers
+            return heights[min(len(heights) - 1, int(self.quantile * len(heights)))]
+        return heights[2]
+
+
+
+class RunningStatistics():
+    """ Running count, mean, extremes and quantile estimates of a series of values.
+
+    Args:
+        quantiles (tuple, optional): quantiles to estimate. Defaults to (.5, .95, .99).
+    """
+    def __init__(self, quantiles=(.5, .95, .99)):
+        self.count = 0
+        self.mean = 0.
+        self.minimum = None
+        self.maximum = None
+        self._quantiles = [P2Quantile(quantile) for quantile in quantiles]
+
+
+    def add(self, value):
+        """ Add a value to the statistics.
+        """
+        self.count += 1
+        self.mean += (value - self.mean) / self.count
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+        for quantile in self._quantiles:
+            quantile.add(value)
+
+
+    def summary(self) -> dict:
+        """ Returns the statistics as a dictionary, with quantiles named e.g. 'p95'.
+        """
+        content = {
+            'count':self.count,
+            'mean':self.mean,
+            'min':self.minimum,
+            'max':self.maximum,
+        }
+        for quantile in self._quantiles:
+            content[f'p{quantile.quantile*100:g}'] = quantile.value
+        return content
+
+
+
 class TimeLog():
     """ Supports logging timing values to a file.
+
+    The file is kept open between writes and the header in effect is cached, so each row only
+    costs a buffered write.  Running statistics are kept for every numeric field logged.
+
+    Args:
+        path (str, optional): default path written to by write(). Defaults to None.
     """
-    def __init__(self):
+    def __init__(self, path=None):
+        self.path = path
         self._names = []
         self._values = []
+        self._file = None
+        self._writer = None
+        self._file_path = None
+        self._header = None
+        self._statistics = {}
 
 
     def clear(self):
@@ -86,21 +330,62 @@ class TimeLog():
     def log(self, name, value):
         self._names.append(name)
         self._values.append(value)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            self._statistics.setdefault(name, RunningStatistics()).add(value)
 
 
-    def write(self, path):
-        needs_header = True
-        if os.path.exists(path):
-            with open(path, 'r', newline='', encoding='utf-8') as fref:
-                timelog = csv.DictReader(
-                    fref, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
-                needs_header = timelog.fieldnames != self._names
+    def write(self, path=None):
+        """ Append the logged values to the file as a row, preceded by a header if the names
+        differ from the header currently in effect.
 
-        with open(path, 'a', newline='', encoding='utf-8') as fref:
-            timelog = csv.writer(fref, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
-            if needs_header:
-                timelog.writerow(self._names)
-            timelog.writerow(self._values)
+        Args:
+            path (str, optional): file to write to. Defaults to the path given on creation.
+        """
+        self._open(path or self.path)
+        if self._header != self._names:
+            self._writer.writerow(self._names)
+            self._header = list(self._names)
+        self._writer.writerow(self._values)
 
         # Reset names and values for next log line
         self.clear()
+
+
+    def _open(self, path):
+        if self._file is not None and path == self._file_path:
+            return
+        self.close()
+
+        # Only read the existing header when the file is first opened
+        self._header = None
+        if os.path.exists(path):
+            with open(path, 'r', newline='', encoding='utf-8') as fref:
+                self._header = next(csv.reader(
+                    fref, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL), None)
+        self._file = open(path, 'a', newline='', encoding='utf-8')     #pylint: disable=consider-using-with
+        self._file_path = path
+        self._writer = csv.writer(
+            self._file, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+
+
+    def flush(self):
+        """ Write any buffered rows to disk.
+        """
+        if self._file is not None:
+            self._file.flush()
+
+
+    def close(self):
+        """ Close the file; it is reopened by the next write.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._writer = None
+
+
+    @property
+    def statistics(self) -> dict:
+        """ Running statistics (see RunningStatistics.summary) of each numeric field.
+        """
+        return {name:statistics.summary() for name, statistics in self._statistics.items()}
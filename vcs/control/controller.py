@@ -1,37 +1,57 @@
 ''' Controller used by the test executive
 '''
+import collections
 import os
 import shutil
+import sqlite3
 import threading
 import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 
 from util import power_supply
 from util import timing
 from util.fsm import FSM
-from util.threading import BackgroundWorkerGeneric
+from util.threading import BackgroundWorkerGeneric, BackgroundWorkerHeadless
 from vcs.model import application
+from vcs.model import archive
+from vcs.model import boot
 from vcs.model import camera
+from vcs.model import export
 from vcs.model import images
 from vcs.model import log
+from vcs.model import messages
 from vcs.model import report
-from vcs.model import vcu
 from vcs.model.bgstates import BGStates
 from vcs.model.equipment import Equipment
+from vcs.model.job import Job
 from vcs.model.resources import VCSResources
 from vcs.model.session import Session
+from vcs.model.store import MeasurementStore
 
 
 EXPECTED_NUMBER_OF_IMAGES = 8
+MAX_RETESTS = 2
+TELEMETRY_FILENAME = "telemetry.npy"
 fsm = FSM() # instance of finite state machine definition
 
 
 class ExecutorController():
     """ Business logic for Test Executor.
+
+    Args:
+        parent (tk.Widget): tkinter widget used to schedule message handling on the UI thread.
+            When None, a headless worker is used and the owner is expected to call
+            worker.poll() to dispatch messages.
+        update (Callable): handler for messages issued by the controller.
+        final (Callable): handler called once the background worker has finished.
     """
     DWELL_STANDARD = .1
     def __init__(self, parent, update, final):
-        self.worker = BackgroundWorkerGeneric(parent, update, final, func=self._main)
+        if parent is None:
+            self.worker = BackgroundWorkerHeadless(update, final, func=self._main)
+        else:
+            self.worker = BackgroundWorkerGeneric(parent, update, final, func=self._main)
 
         #TODO: Update to use two state machines, one for state, one for step.
         #NOTE: states --> IDLE, RUNNING, CANCELLING, WAITING
@@ -49,10 +69,25 @@ class ExecutorController():
         self._cancelled = False
         self._equipment = None
         self._state_lock = threading.Lock()
+        self._log_handler = None
+
+        # Queue of jobs waiting to run; each is prepared in the background as soon as it is queued.
+        self._jobs = collections.deque()
+        self._jobs_lock = threading.Lock()
+        self._job_available = threading.Event()
+        self._preparer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='JobPreparer')
 
         self.camera_position_lookup = {}
+        self._baselines = None
+        self._retest_count = 0
         self._session: Session = Session()
         self._enable_transaction_log = False
+        self._store: MeasurementStore = None
+        self._archiver: archive.BackgroundArchiver = None
+        self._export_thread = None
+        self._timelog = timing.TimeLog()
+        self._telemetry: power_supply.telemetry.TelemetrySampler = None
+        self._last_completion = None
 
         self.worker.start()
 
@@ -66,11 +101,17 @@ class ExecutorController():
             try:
                 fsm.handlers[self.state](self)
             except Exception:                               #pylint: disable=broad-except
-                self._log(f"An error has occurred: {traceback.format_exc()}")
+                self._log(f"An error has occurred: {traceback.format_exc()}", level=log.logging.ERROR)
+                self._session.close()
                 try:
+                    self._stop_telemetry()
                     self.system.cleanup()
                 except Exception:                           #pylint: disable=broad-except
                     pass
+                if self.system is not None:
+                    # The error may have left the power supply connections unusable, so the
+                    # next unit detects them again.
+                    self.system.close_power_supplies()
                 self._update_state(BGStates.IDLE)
 
 
@@ -82,33 +123,80 @@ class ExecutorController():
         """
         self._cancelled = True
         self.running = False
+        self.clear_queue()
+        self._preparer.shutdown(wait=False)
+        if self._archiver is not None:
+            self._archiver.stop()
 
 
     def abort(self):
         """ Aborts the current process and sets the next state to ABORT.
 
+        Any units waiting in the queue are discarded as well.
         The ABORT state is useful in handling and specific cleanup actions
         needed by front or back end.
         """
         self._cancelled = True
+        self.clear_queue()
         self._update_state(BGStates.ABORT)
 
 
     def start(self, resources: VCSResources):
         """ Starts the Camera Test procedure on the background worker thread.
 
+        If a test is already running, the unit is queued and started as soon as the current
+        test has been cleaned up.
+
         Args:
             resources (dict): a set of equipment and parameters passed by the UI
                 for use on BG thread.
         """
-        if self.state == BGStates.IDLE:
-            self._session = Session()
-            self._enable_transaction_log = resources.enable_transaction_log
-            self._response = None
-            self._vcresources = resources
-            self._set_resources(resources)
-            self._cancelled = False
-            self._update_state(BGStates.SETUP)
+        self.enqueue(resources)
+
+
+    def enqueue(self, resources: VCSResources) -> int:
+        """ Queue a unit to be tested and begin preparing it in the background.
+
+        Preparation covers the equipment objects so the unit can start the instant the
+        controller becomes available. Its batch directory and log files are created as it starts
+        (see Job.start).
+
+        Args:
+            resources (VCSResources): a set of equipment and parameters passed by the UI
+                for use on BG thread.
+
+        Returns:
+            int: number of units waiting in the queue.
+        """
+        job = Job(resources)
+        job.future = self._preparer.submit(job.prepare)
+        with self._jobs_lock:
+            self._jobs.append(job)
+            waiting = len(self._jobs)
+        self._job_available.set()
+
+        if self.state is not BGStates.IDLE:
+            self._log(f"Queued next unit ({waiting} waiting)")
+        return waiting
+
+
+    def clear_queue(self):
+        """ Discard any units waiting in the queue.
+        """
+        with self._jobs_lock:
+            jobs = list(self._jobs)
+            self._jobs.clear()
+            self._job_available.clear()
+        for job in jobs:
+            job.future.add_done_callback(lambda _, job=job: job.discard())
+
+
+    @property
+    def queue_length(self) -> int:
+        """ Number of units waiting in the queue.
+        """
+        with self._jobs_lock:
+            return len(self._jobs)
 
     def resume(self, value):
         """ Restarts the background process after it has been paused to wait on user input.
@@ -132,6 +220,48 @@ class ExecutorController():
         self._log(f"Opening logging directory: {path}")
 
 
+    def export_logs(self, destination):
+        """ Exports the logging directory, e.g. to a thumb drive, in the background.
+
+        Only files not already exported to the destination are copied (see vcs.model.export).
+
+        Args:
+            destination (str): directory to export the logs to.
+        """
+        if not destination:
+            return
+        if self._export_thread is not None and self._export_thread.is_alive():
+            self._log("An export is already in progress.", level=log.logging.WARNING)
+            return
+        self._export_thread = threading.Thread(
+            target=self._export_logs, args=(destination,), name='LogExport', daemon=True)
+        self._export_thread.start()
+
+
+    def _export_logs(self, destination):
+        source = application.settings.values.logging_path
+        self._log(f"Exporting logs to {destination}")
+        log.flush()
+
+        def progress(bytes_done, bytes_total, files_done, files_total):
+            self.worker.post(messages.Status(
+                f"Exporting logs: {files_done}/{files_total} files, "
+                f"{bytes_done/1e6:.0f}/{bytes_total/1e6:.0f} MB"))
+
+        try:
+            result = export.export_logs(source, destination, progress=progress)
+        except OSError as err:
+            self._log(f"Unable to export logs: {err}", level=log.logging.ERROR)
+            return
+
+        self._log(f"Exported {result.files} files ({result.bytes/1e6:.1f} MB) in "
+                  f"{result.seconds:.1f} s at {result.throughput:.1f} MB/s; "
+                  f"{result.skipped} files were already exported")
+        for failure in result.failures:
+            self._log(f"    Export failed: {failure}", level=log.logging.ERROR)
+        self.worker.post(messages.Status(f"{self.state}"))
+
+
     def update_baseline_images(self, path):
         """ Updates the baseline images with those from a provided directory.
 
@@ -139,6 +269,7 @@ class ExecutorController():
             path (str): path to directory to pull new baseline images from.
         """
         if path:
+            self._baselines = None
             image_list = [os.path.join(path, i) for i in os.listdir(path) if i.endswith(".png")]
 
             if len(image_list) >= EXPECTED_NUMBER_OF_IMAGES:
@@ -171,7 +302,7 @@ class ExecutorController():
             question (str): Yes/No question and additional details to provide the user.
         """
         self._update_state(BGStates.WAITING)
-        self.worker.queue.put({'ask':(statement, question)})
+        self.worker.post(messages.Ask(statement, question))
 
 
     def _prompt(self, statement: str, details: str):
@@ -184,7 +315,7 @@ class ExecutorController():
             details (str): additional details that may prove useful to the user.
         """
         self._update_state(BGStates.WAITING)
-        self.worker.queue.put({'prompt':(statement, details)})
+        self.worker.post(messages.Prompt(statement, details))
 
 
     @property
@@ -202,54 +333,82 @@ class ExecutorController():
         assert self._session.timestamp is not None, "Timestamp not set before usage!"
         return log.batch_dir(application.settings.values.logging_path, self._session.timestamp)
 
-    def _set_resources(self, resources: VCSResources):
+    def _next_job(self):
+        with self._jobs_lock:
+            job = self._jobs.popleft() if self._jobs else None
+            if not self._jobs:
+                self._job_available.clear()
+        return job
+
+
+    def _activate(self, job: Job):
+        """ Make a prepared job the current unit under test and start it.
+        """
         try:
-            vcu_instance = vcu.VCU(resources.deserializer_lookup)
-            self._equipment = Equipment(resources, vcu_instance)
+            job.future.result()
+            job.start(application.settings.values.logging_path)
         except Exception as err:                            #pylint: disable=broad-except
-            self._equipment = None
-            self._log(f'Error!  An issue occured while trying to update resources: {err}')
-            raise
+            job.discard()
+            self._log(f'Error!  An issue occured while trying to update resources: {err}',
+                      level=log.logging.ERROR)
+            self._update_state(BGStates.IDLE)
+            return
+
+        job.equipment.reuse_power_supplies(self._equipment)
+        self._session = job.session
+        self._equipment = job.equipment
+        self._log_handler = job.log_handler
+        self._enable_transaction_log = job.resources.enable_transaction_log
+        self._response = None
+        self._vcresources = job.resources
+        self._retest_count = 0
+        self._cancelled = False
+        self.worker.post(messages.UnitStarted(job.resources))
+        self._update_state(BGStates.SETUP)
 
 
     def _update_state(self, target):
         log.logging.info(f"Step: {target}")
-        self.worker.queue.put({
-            'state':target,
-        })
+        # Update the state before notifying so listeners never observe a stale state.
         with self._state_lock:
             self._previous_state = self.state
             self.state = target
+        self.worker.post(messages.Status(str(target)))
+        self.worker.post(messages.StateChanged(target))
 
 
-    def _log(self, msg, newline=True):
-        log.logging.info(msg)
-        self.worker.queue.put({'msg':(msg,newline)})
+    def _log(self, msg, newline=True, level=log.logging.INFO):
+        log.logging.log(level, msg)
+        self.worker.post(messages.Log(msg, newline, level))
 
 
     def _display_camera_images(self):
-        self.worker.queue.put(
-            {'cameras':self._equipment.camera_list}
-        )
+        self.worker.post(messages.CamerasReady(self._equipment.camera_list))
+
+
+    def _report_completion(self):
+        self.worker.post(messages.UnitComplete(
+            batch_dir=self._batch_dir,
+            result=self._session.result,
+            failures=self._session.failures,
+        ))
 
 
     def _mark_camera(self, status, index):
         if status is not None:
-            if status:
-                self.worker.queue.put(
-                    {'pass':index}
-                )
-            else:
-                self.worker.queue.put(
-                    {'fail':index}
-                )
+            self.worker.post(messages.CameraMarked(index, status))
 
 
     @fsm.state_handler(BGStates.IDLE)
     def _state_idle(self):
         """ Handler for the IDLE state waits for next state input.
+
+        Starts the next queued unit immediately if one is available.
         """
-        time.sleep(self.DWELL_STANDARD)
+        if self._job_available.wait(self.DWELL_STANDARD) and self.running:
+            job = self._next_job()
+            if job is not None:
+                self._activate(job)
 
 
     @fsm.state_handler(BGStates.WAITING)
@@ -267,30 +426,59 @@ class ExecutorController():
                 *
         """
         self._session.start()
-        log.open_log(self._batch_dir)
         log.makedirs(self._batch_dir)
+        log.open_log(self._batch_dir, self._log_handler)
+        self._session.stream_report(os.path.join(self._batch_dir, "measurements.jsonl"))
         if self._response is None or self._response is True:
             try:
-                self.system.setup()
+                with self._session.span('setup'):
+                    self.system.setup()
             except power_supply.NoSupply:
                 self._prompt(
                     'Unable to detect a power supply!',
                     'Check that a power supply is powered on and connected to the system and try again.',   #pylint: disable=line-too-long
                 )
                 return
+            except power_supply.MultipleSupplies as err:
+                found = '\n'.join(f"    {item['identity']} ({item['backend']} on {item['resource']})"
+                                  for item in err.fingerprints)
+                self._prompt(
+                    'More than one power supply detected!',
+                    f'Found:\n{found}\nDisconnect all but one power supply, or limit the '
+                    'power_supply_backends setting, and try again.',
+                )
+                return
             self._update_state(BGStates.CONNECTING)
             self._response = None
         else:
             self._update_state(BGStates.ABORT)
-            self._log("Unable to setup system; cancelling operation.")
+            self._log("Unable to setup system; cancelling operation.", level=log.logging.ERROR)
 
 
     @fsm.state_handler(BGStates.CONNECTING)
     def _state_connecting(self):
-        self.system.enable_supply()
-
-        # Wait for IP address?
-        time.sleep(1)
+        self._telemetry = self.system.start_telemetry(
+            application.settings.values.telemetry_rate,
+            application.settings.values.telemetry_capacity)
+        with self._session.span('power on'):
+            sequence_timing = self.system.enable_supply()
+        self._session.add_section_details('power sequence', {
+            f'CH{timing.channel + 1}':{'delay':timing.delay, 'gap':timing.gap}
+            for timing in sequence_timing})
+
+        monitor = None
+        if self._telemetry is None:
+            # Wait for IP address?
+            time.sleep(1)
+        else:
+            monitor = self._get_boot_monitor(self._telemetry.elapsed)
+            with self._session.span('boot detection'):
+                monitor.wait(until_ready=True, cancelled=lambda: self._cancelled)
+        if self._cancelled:
+            return
+        if not self._check_boot_profile(monitor):
+            self._update_state(BGStates.REVIEW)
+            return
 
         #AV this will show logs in in GUI
 
@@ -305,33 +493,43 @@ class ExecutorController():
         timer = timing.Timer()
         timer.start()
         for _ in range(20):
+            if self._cancelled:
+                return
             self._log('.', newline=False)
             try:
-                self.system.vcu.connect()
+                with self._session.span('connect'):
+                    self.system.vcu.connect()
                 self._log(' done')
                 break
             except Exception:                             #pylint: disable=broad-except
+                if not self._check_boot_profile(monitor):
+                    self._update_state(BGStates.REVIEW)
+                    return
                 time.sleep(1)
         timer.stop()
         self._log('', newline=True)
+        self._report_boot_profile(monitor)
         if _ < 18:
-            boot_time = self.system.vcu.get_boot_time()
+            with self._session.span('boot time'):
+                boot_time = self.system.vcu.get_boot_time()
             self._log(f"    Boot time:\t{boot_time}\tPASS")
             self._log(f"    Connect time:\t{timer.total_in_minutes_and_seconds}\tPASS")
             self._session.add_section_details('boot time', boot_time)
-            self._session.add_section_details('connect time', timer.total_in_minutes_and_seconds)
+            self._session.add_section_details('connect time', timer.total)
 # 10/6/22, SL, toggle comment for next state: VERSION_CHECK | CAMERA_CHECK
 #        self._update_state(BGStates.VERSION_CHECK)
             self._update_state(BGStates.CAMERA_CHECK)
         else:
-            self._log("    Boot time:       FAIL")
-            self._log("    Connect time:    FAIL")
+            self._log("    Boot time:       FAIL", level=log.logging.WARNING)
+            self._log("    Connect time:    FAIL", level=log.logging.WARNING)
+            self._session.add_failure('connecting', 'unable to connect to the VCU')
             self._update_state(BGStates.REVIEW)
 
 
     @fsm.state_handler(BGStates.VERSION_CHECK)
     def _state_version_check(self):
-        hashes, server_version = self.system.vcu.software_version_check()
+        with self._session.span('version check'):
+            hashes, server_version = self.system.vcu.software_version_check()
 
         self._log("    Hashes:")
         for key, value in hashes.items():
@@ -349,7 +547,8 @@ class ExecutorController():
 
     @fsm.state_handler(BGStates.CAMERA_CHECK)
     def _state_camera_presence_check(self):
-        self.camera_position_lookup = self.system.vcu.generate_camera_position_lookup()
+        with self._session.span('camera check'):
+            self.camera_position_lookup = self.system.vcu.generate_camera_position_lookup()
 
         for key, value in self.camera_position_lookup.items():
             self._log(f"    Camera {key+1} == Device {value}")
@@ -358,7 +557,10 @@ class ExecutorController():
         if len(self.camera_position_lookup) == 8:
             self._log(f"    Camera detection count:    {len(self.camera_position_lookup)} / {EXPECTED_NUMBER_OF_IMAGES}    PASS")
         else:
-            self._log(f"    Camera detection count:    {len(self.camera_position_lookup)} / {EXPECTED_NUMBER_OF_IMAGES}    FAIL")
+            self._log(f"    Camera detection count:    {len(self.camera_position_lookup)} / {EXPECTED_NUMBER_OF_IMAGES}    FAIL",
+                      level=log.logging.WARNING)
+            self._session.add_failure(
+                'camera check', f'detected {len(self.camera_position_lookup)} cameras')
 
         self._session.add_section_details(
             'camera check', {
@@ -370,7 +572,8 @@ class ExecutorController():
 
     @fsm.state_handler(BGStates.THERMAL_CHECK)
     def _state_thermal_check(self):
-        temperatures = self.system.vcu.get_thermal_data()
+        with self._session.span('thermal check'):
+            temperatures = self.system.vcu.get_thermal_data()
 
         for key, value in temperatures.items():
             self._log(f"    {key+':':<20} {value:.2f}")
@@ -386,63 +589,284 @@ class ExecutorController():
 
     @fsm.state_handler(BGStates.ACQUIRE_IMAGES)
     def _state_acquire_images(self):
-        self.system.vcu.acquire_images(self._batch_dir)
+        with self._session.span('acquire.capture'):
+            self.system.vcu.capture_images()
+        with self._session.span('acquire.transfer'):
+            self.system.vcu.download_images(self._batch_dir)
         camera.assign_images_to_cameras(
             self.system.camera_list, self._batch_dir, self.camera_position_lookup)
         self._display_camera_images()
 # 10/6/22, SL, toggle comment for next state: PROCESS_IMAGES | REVIEW
-#        self._update_state(BGStates.PROCESS_IMAGES)
-        self._update_state(BGStates.REVIEW)
+        # Scoring is off by default (see process_images_enabled), in which case the cameras
+        # are never failed and REVIEW does not offer a retest.
+        if application.settings.values.process_images_enabled:
+            self._update_state(BGStates.PROCESS_IMAGES)
+        else:
+            self._update_state(BGStates.REVIEW)
 
 
     @fsm.state_handler(BGStates.PROCESS_IMAGES)
     def _state_process_images(self):
-        baselines = images.Baselines(images.PATH_TO_BASELINES)
+        self._process_cameras(self.system.camera_list)
+        self._update_state(BGStates.REVIEW)
 
-        reports_from_all_cameras = {}
-        for target_camera in self.system.camera_list:
-            status, image_report = images.evaluate_camera_images(target_camera, baselines)
-            reports_from_all_cameras[f"Camera {target_camera.index + 1}"] = image_report
+
+    def _process_cameras(self, camera_list):
+        """ Score the images of the given cameras and merge the results into the session report.
+        """
+        if self._baselines is None:
+            self._baselines = images.Baselines(images.PATH_TO_BASELINES)
+
+        transaction_reports = []
+        for target_camera in camera_list:
+            with self._session.span('process images'):
+                status, image_report = images.evaluate_camera_images(
+                    target_camera, self._baselines)
+            # Streamed to the report as each camera completes
+            self._session.update_section_details(
+                "process images", {f"Camera {target_camera.index + 1}":image_report})
 
             self._mark_camera(status, target_camera.index)
             self._log(target_camera.get_status_message())
+            self._session.remove_failure('process images', f'camera {target_camera.index + 1}')
+            if status is False:
+                self._session.add_failure('process images', f'camera {target_camera.index + 1}')
 
-            # Format and writout log files (Camera test only)
             if self._enable_transaction_log:
-                assessment_report = report.CameraAssessmentReport(
-                    target_camera.index, status, image_report)
-                assessment_report.write(
-                    log.get_transaction_log_path(
-                        application.ITEM_NUM_VCAMENC,
-                        target_camera.serial_number,
-                        application.settings.values.logging_path,
-                    )
+                transaction_reports.append(report.CameraAssessmentReport(
+                    target_camera.index, status, image_report, target_camera.serial_number))
+
+        # Format and writout log files in one batch (Camera test only)
+        if transaction_reports:
+            report.write_camera_reports(
+                transaction_reports,
+                application.ITEM_NUM_VCAMENC,
+                application.settings.values.logging_path,
+            )
+
+
+    def _get_boot_monitor(self, start) -> boot.BootMonitor:
+        """ Returns a monitor of the boot profile, following the telemetry.
+
+        Args:
+            start (float): telemetry time at which the power on sequence completed.
+        """
+        profile = boot.load_profile(application.settings.values.boot_profile)
+        # Overcurrent is judged against the current limit the channel was powered on with.
+        current_limit = next((step['current'] for step in
+                              application.settings.values.power_on_sequence
+                              if step['channel'] == profile.channel), None)
+        return boot.BootMonitor(self._telemetry, profile, current_limit, start)
+
+
+    def _check_boot_profile(self, monitor) -> bool:
+        """ Check whether the boot profile so far shows the unit cannot boot, recording the
+        failure if so.
+
+        Args:
+            monitor (boot.BootMonitor): monitor of the boot profile, None without telemetry.
+
+        Returns:
+            bool: False if the unit cannot boot.
+        """
+        result = None if monitor is None else monitor.poll()
+        if result is None or not result.fatal:
+            return True
+        self._session.add_section_details('boot profile', result.get_report())
+        self._log(f"    Boot profile:    FAIL ({result.reason})", level=log.logging.WARNING)
+        self._session.add_failure('boot profile', result.reason)
+        return False
+
+
+    def _report_boot_profile(self, monitor):
+        """ Add the boot profile outcome, if known by the end of connecting, to the report.
+
+        Args:
+            monitor (boot.BootMonitor): monitor of the boot profile, None without telemetry.
+        """
+        result = None if monitor is None else monitor.poll()
+        if result is None:
+            return
+        self._session.add_section_details('boot profile', result.get_report())
+        if result.booted:
+            self._log(f"    Boot detected after {result.elapsed:.1f} s")
+        else:
+            self._log(f"    Boot profile anomalous: {result.reason}", level=log.logging.WARNING)
+
+
+    def _stop_telemetry(self):
+        """ Stop sampling the power supply, saving the samples to the batch directory and adding
+        their summary to the report.
+        """
+        sampler, self._telemetry = self._telemetry, None
+        if sampler is None:
+            return
+        sampler.stop()
+        try:
+            sampler.save(os.path.join(self._batch_dir, TELEMETRY_FILENAME))
+        except OSError as err:
+            self._log(f'Error!  Unable to save power supply telemetry: {err}',
+                      level=log.logging.ERROR)
+        self._session.add_section_details('power telemetry', sampler.summary())
+
+
+    def _record_results(self):
+        """ Append the session and camera results to the measurement store.
+        """
+        try:
+            if self._store is None:
+                self._store = MeasurementStore(application.settings.values.measurement_store_path)
+            with self._store:
+                session_id = self._session.record(
+                    self._store,
+                    application.settings.values.station_name,
+                    self._vcresources,
+                    self._batch_dir,
                 )
+                for target_camera in self.system.camera_list:
+                    report.CameraAssessmentReport(
+                        target_camera.index,
+                        target_camera.status,
+                        target_camera.report,
+                        target_camera.serial_number,
+                    ).record(self._store, session_id)
+        except sqlite3.Error as err:
+            self._log(f"Unable to record results: {err}", level=log.logging.WARNING)
 
-        self._session.add_section_details("process images", reports_from_all_cameras)
-        self._update_state(BGStates.REVIEW)
+
+    def _log_timing(self):
+        """ Add the unit's timing to the time log and publish the running statistics.
+
+        Cycle time is measured between consecutive completions, so it includes any time the
+        station spent waiting for the next unit.
+        """
+        now = time.perf_counter()
+        test_time = self._session.elapsed
+        cycle_time = test_time if self._last_completion is None else now - self._last_completion
+        self._last_completion = now
+
+        report_content = self._session.get_report()
+        self._timelog.log('timestamp', self._session.timestamp)
+        self._timelog.log('vcu number', self._vcresources.vcu_number)
+        self._timelog.log('result', self._session.result)
+        self._timelog.log('boot time', report_content.get('boot time'))
+        self._timelog.log('test time', test_time)
+        self._timelog.log('cycle time', cycle_time)
+        if application.settings.values.timelog_enabled:
+            try:
+                self._timelog.write(
+                    os.path.join(application.settings.values.logging_path, "timelog.csv"))
+                self._timelog.flush()
+            except OSError as err:
+                self._log(f"Unable to write time log: {err}", level=log.logging.WARNING)
+        self._timelog.clear()
+        self.worker.post(messages.Statistics(self.statistics))
+
+
+    @property
+    def statistics(self) -> dict:
+        """ Running timing statistics for the units tested so far (see timing.TimeLog).
+        """
+        return self._timelog.statistics
+
+
+    def _request_archive(self):
+        """ Archive old batch directories in the background, leaving those still in use.
+        """
+        if self._archiver is None:
+            values = application.settings.values
+            self._archiver = archive.BackgroundArchiver(archive.Archiver(
+                values.logging_path,
+                values.archive_after_days,
+                values.retention_days,
+                int(values.retention_max_gb * 1024**3) if values.retention_max_gb else None,
+            ))
+            self._archiver.start()
+        # Queued jobs have no batch directory until they start (see Job.start).
+        self._archiver.request([self._batch_dir])
+
+
+    @property
+    def _failed_cameras(self) -> list:
+        return [target_camera for target_camera in self.system.camera_list
+                if target_camera.status is False]
 
 
     @fsm.state_handler(BGStates.REVIEW)
     def _state_review(self):
+        failed_cameras = self._failed_cameras
+        if failed_cameras and self._retest_count < MAX_RETESTS:
+            if self._response is None:
+                self._ask(
+                    'Retest failed cameras?',
+                    'Failed: ' + ', '.join(f'Camera {camera.index + 1}' for camera in
+                                           failed_cameras) +
+                    '\nRecapture and re-score only the failed cameras?',
+                )
+                return
+            if self._response is True:
+                self._response = None
+                self._update_state(BGStates.RETEST)
+                return
+        self._response = None
         self._update_state(BGStates.CLEANUP)
 
 
+    @fsm.state_handler(BGStates.RETEST)
+    def _state_retest(self):
+        """ Recapture, transfer and re-score only the cameras that failed, keeping the session
+        (power, connection, results) open.
+        """
+        self._retest_count += 1
+        failed_cameras = self._failed_cameras
+        sensor_ids = camera.get_sensor_ids(failed_cameras, self.camera_position_lookup)
+        self._log(f"    Retest {self._retest_count}: sensors {sensor_ids}")
+
+        with self._session.span('retest.capture'):
+            self.system.vcu.capture_images(sensor_ids)
+        with self._session.span('retest.transfer'):
+            image_paths = self.system.vcu.download_images(self._batch_dir, sensor_ids)
+        for target_camera in failed_cameras:
+            target_camera.clear_images()
+        camera.assign_image_paths(
+            self.system.camera_list, image_paths, self.camera_position_lookup)
+        self._display_camera_images()
+
+        # Refreshing the grid clears the marks, so restore those of the cameras that passed.
+        for target_camera in self.system.camera_list:
+            if target_camera not in failed_cameras:
+                self._mark_camera(target_camera.status, target_camera.index)
+        self._process_cameras(failed_cameras)
+        self._session.add_section_details('retests', self._retest_count)
+        self._update_state(BGStates.REVIEW)
+
+
     @fsm.state_handler(BGStates.ABORT)
     def _state_abort(self):
+        self._session.add_failure('abort', 'operation was aborted')
         self._update_state(BGStates.CLEANUP)
 
 
     @fsm.state_handler(BGStates.CLEANUP)
     def _state_cleanup(self):
+        self._stop_telemetry()
+        self.system.vcu.disconnect()
+        # Power off while the results are written.
+        power_off = self.system.start_cleanup()
         total_time = self._session.stop()
         self._log(f'Total time: {total_time}')
         report.write(
             os.path.join(self._batch_dir, "measurements.log"),
             self._session.get_report(),
         )
-        self.system.vcu.disconnect()
-        self.system.cleanup()
+        self._record_results()
+        try:
+            power_off.result()
+        except power_supply.sequence.SequenceError as err:
+            self._log(f'Error!  {err}', level=log.logging.ERROR)
+        self._log_timing()
+        self._report_completion()
+        self._request_archive()
 
         #NOTE: While this is where a log transfer would have originally
         #   occurred. Based on lack of connectivity to our network from the CM
@@ -0,0 +1,221 @@
+''' Headless runner used to drive the test executive without a graphical user interface.
+
+Useful for unattended soak tests and throughput measurements where no display is available.
+'''
+import collections
+import csv
+import datetime
+import json
+import sys
+import time
+from dataclasses import dataclass, field
+
+from vcs.control.controller import ExecutorController
+from vcs.model import messages
+from vcs.model.bgstates import BGStates
+from vcs.model.resources import VCSResources
+
+
+POLL_PERIOD = .1
+RESULT_ERROR = 'ERROR'
+
+
+@dataclass
+class UnitRequest:
+    """ Details of a single unit to be tested by the headless runner.
+    """
+    operator_name: str
+    vcu_number: str = ""
+    serial_numbers: list = field(default_factory=list)
+
+
+def read_unit_queue(path: str, operator_name: str = "") -> list[UnitRequest]:
+    """ Read a queue of units to test from a CSV file.
+
+    The file is expected to have a header row. Recognized columns are 'vcu_number',
+    'operator_name' and 'serial_numbers', where serial numbers are separated by semicolons.
+    Missing operator names fall back to the provided default. Rows without any values are
+    skipped, as are values beyond the header columns.
+
+    Args:
+        path (str): path to the CSV file.
+        operator_name (str, optional): default operator name. Defaults to "".
+
+    Returns:
+        list[UnitRequest]: units in the order they appear in the file.
+    """
+    units = []
+    with open(path, 'r', newline='', encoding='utf-8') as fref:
+        for row in csv.DictReader(fref):
+            if not any(value.strip() for key, value in row.items()
+                       if key is not None and value is not None):
+                continue
+            serial_numbers = row.get('serial_numbers') or ''
+            units.append(UnitRequest(
+                operator_name=row.get('operator_name') or operator_name,
+                vcu_number=row.get('vcu_number') or '',
+                serial_numbers=[part.strip() for part in serial_numbers.split(';')
+                                if part.strip()],
+            ))
+    return units
+
+
+class HeadlessRunner():
+    """ Drives ExecutorController directly, answering any requests by policy.
+
+    The next unit is always queued while the current one runs, so it has been prepared by the
+    time the current unit finishes and cycles run back to back.
+
+    Args:
+        mapper (object): maps unique elements of the test (see vcs.model.application).
+        answer_ask (bool, optional): answer given to yes/no questions. Defaults to False.
+        answer_prompt (bool, optional): answer given to ok/cancel prompts. Defaults to False.
+        results_path (str, optional): path of a JSON Lines file to append per-unit results to.
+            Defaults to None.
+        stream (file, optional): stream used for machine-readable output. Defaults to stdout.
+        verbose (bool, optional): echo controller log messages to stderr. Defaults to False.
+    """
+    def __init__(self, mapper, answer_ask=False, answer_prompt=False, results_path=None,
+                 stream=sys.stdout, verbose=False):
+        self._mapper = mapper
+        self._answer_ask = answer_ask
+        self._answer_prompt = answer_prompt
+        self._results_path = results_path
+        self._stream = stream
+        self._verbose = verbose
+
+        self._pending = collections.deque()
+        self._queued = collections.deque()
+        self._current = None
+        self._completion = None
+        self._finalized = False
+        self.results = []
+
+        self.controller = ExecutorController(None, self.update_handler, self.reset_handler)
+
+
+    def run(self, units: list[UnitRequest]) -> dict:
+        """ Test each of the provided units in order.
+
+        Args:
+            units (list[UnitRequest]): units to test.
+
+        Returns:
+            dict: throughput statistics for the run.
+        """
+        started = time.perf_counter()
+        self._pending.extend(enumerate(units, start=1))
+        try:
+            self._enqueue_next()
+            while (self._queued or self._current) and not self._finalized:
+                self.controller.worker.poll(POLL_PERIOD)
+        finally:
+            self.controller.shutdown()
+
+        statistics = self._get_statistics(time.perf_counter() - started)
+        self._emit({'statistics':statistics})
+        return statistics
+
+
+    def _enqueue_next(self):
+        if not self._pending:
+            return
+        number, unit = self._pending.popleft()
+        start_time = str(datetime.datetime.now().strftime('%Y-%m-%d T%H:%M:%S'))
+        resources = VCSResources(
+            vcu_number=unit.vcu_number,
+            start_time=start_time,
+            operator_name=unit.operator_name,
+            serial_numbers=self._mapper.get_serial_numbers(unit.serial_numbers),
+            enable_transaction_log=self._mapper.enable_transaction_log,
+            deserializer_lookup=self._mapper.get_deserializer_lookup(),
+        )
+        self._queued.append((number, unit, start_time))
+        self.controller.enqueue(resources)
+
+
+    def _unit_started(self):
+        self._current = self._queued.popleft() + (time.perf_counter(),)
+        self._completion = None
+        self._enqueue_next()
+
+
+    def _unit_finished(self):
+        if self._current is None:
+            # The unit at the head of the queue could not be prepared and never started.
+            number, unit, start_time = self._queued.popleft()
+            started = time.perf_counter()
+            self._enqueue_next()
+        else:
+            number, unit, start_time, started = self._current
+        cycle_time = time.perf_counter() - started
+
+        completion = self._completion or messages.UnitComplete(None, RESULT_ERROR)
+        result = {
+            'unit':number,
+            'vcu_number':unit.vcu_number,
+            'operator_name':unit.operator_name,
+            'serial_numbers':unit.serial_numbers,
+            'start_time':start_time,
+            'result':completion.result,
+            'failures':completion.failures,
+            'batch_dir':completion.batch_dir,
+            'cycle_time':round(cycle_time, 3),
+        }
+        self._current = None
+        self._completion = None
+        self.results.append(result)
+        self._emit(result)
+
+
+    def _get_statistics(self, elapsed) -> dict:
+        cycle_times = [result['cycle_time'] for result in self.results]
+        count = len(self.results)
+        return {
+            'units':count,
+            'passed':sum(result['result'] == 'PASS' for result in self.results),
+            'failed':sum(result['result'] == 'FAIL' for result in self.results),
+            'errors':sum(result['result'] == RESULT_ERROR for result in self.results),
+            'elapsed':round(elapsed, 3),
+            'mean_cycle_time':round(sum(cycle_times) / count, 3) if count else None,
+            'units_per_hour':round(count * 3600 / elapsed, 2) if elapsed > 0 else None,
+            'timing':self.controller.statistics,
+        }
+
+
+    def _emit(self, content: dict):
+        line = json.dumps(content)
+        print(line, file=self._stream, flush=True)
+        if self._results_path and 'unit' in content:
+            with open(self._results_path, 'a', encoding='utf-8') as fref:
+                fref.write(line + '\n')
+
+
+    def reset_handler(self):
+        """ Called once the background worker has finished.
+        """
+        self._finalized = True
+
+
+    def update_handler(self, message: messages.Message):
+        """ Handle messages from the controller.
+
+        Args:
+            message (messages.Message): message posted by the controller.
+        """
+        if isinstance(message, messages.StateChanged):
+            if self._verbose:
+                print(f'Step: {message.state}', file=sys.stderr)
+            if message.state is BGStates.SETUP and self._current is None:
+                self._unit_started()
+            elif message.state is BGStates.IDLE:
+                self._unit_finished()
+        elif isinstance(message, messages.Log):
+            if self._verbose:
+                print(message.text, end='\n' if message.newline else '', file=sys.stderr)
+        elif isinstance(message, messages.Ask):
+            self.controller.resume(self._answer_ask)
+        elif isinstance(message, messages.Prompt):
+            self.controller.resume(self._answer_prompt)
+        elif isinstance(message, messages.UnitComplete):
+            self._completion = message
@@ -2,6 +2,7 @@
 """
 from os.path import join
 import dataclasses
+import platform
 import appdirs
 
 from util.settings import ApplicationSettings, set_default, get_install_timestamp
@@ -83,6 +84,48 @@ class _DefaultSettings:
     """
     installation_timestamp: str = set_default(get_install_timestamp())
     logging_path: str = join(APPLICATION_DATA_PATH, "logs")
+    measurement_store_path: str = join(APPLICATION_DATA_PATH, "measurements.db")
+    station_name: str = platform.node()
+    archive_after_days: float = 7
+    retention_days: float = 365
+    retention_max_gb: float = 100
+    timelog_enabled: bool = True
+    power_supply_backends: list = set_default(['bk', 'ametek', 'sorensen'])
+    # Supply found by the last discovery, tried first next time (see power_supply.discovery)
+    power_supply_fingerprint: dict = set_default({})
+    # Checking after each change: 'none', 'readback' or 'full' (read back and error queue)
+    power_supply_verification: str = 'full'
+    power_on_sequence: list = set_default([
+        {'channel':0, 'voltage':12.0, 'current':1.5, 'delay':0.0},
+        {'channel':1, 'voltage':5.0, 'current':3.0, 'delay':0.5},
+        {'channel':2, 'voltage':3.3, 'current':3.0, 'delay':0.0},
+        ])
+    power_off_sequence: list = set_default([
+        {'channel':0, 'voltage':0.0, 'current':1.5, 'delay':0.0},
+        {'channel':1, 'voltage':0.0, 'current':3.0, 'delay':0.1},
+        {'channel':2, 'voltage':0.0, 'current':3.0, 'delay':0.1},
+        ])
+    power_sequence_tolerance: float = 0.1
+    telemetry_rate: float = 10.0
+    telemetry_capacity: int = 36000
+    # Scoring of the captured images against the baselines, which also enables the retest of
+    # failed cameras. Off while the images are assessed by the operator on screen instead.
+    process_images_enabled: bool = False
+    # Fields of vcs.model.boot.BootProfile, kept as plain values so the settings do not depend on
+    # the power supply drivers.
+    boot_profile: dict = set_default({
+        'channel':0,
+        'min_current':.05,
+        'max_current':None,
+        'max_current_ratio':.97,
+        'overcurrent_time':.5,
+        'steady_range':[.2, 1.4],
+        'steady_window':3.0,
+        'steady_tolerance':.03,
+        'min_boot_time':5.0,
+        'power_timeout':5.0,
+        'boot_timeout':120.0,
+        })
     vcu_hostname: str = r'botuser@vis08170'
     vcu_password: str = 'root'
     deserializer_lookup: dict = set_default(
@@ -124,8 +167,7 @@ def get_application_settings():
         path=APPLICATION_SETTINGS_PATH,
         defaults=_DefaultSettings(),
     )
-    temp.load()
-    temp.save()
+    temp.refresh()
 
     return temp
 
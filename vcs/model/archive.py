@@ -0,0 +1,305 @@
+''' Archival and retention of batch log directories.
+
+Completed batch directories are compressed into a single zip archive each once they reach a
+configurable age, and archives are removed once they exceed the retention limits.  The zip
+central directory acts as an index, so individual images can be read back without unpacking
+the whole archive.
+'''
+import datetime
+import logging
+import os
+import shutil
+import threading
+import zipfile
+
+from vcs.model import log
+
+
+BATCH_PREFIX = 'VCU_Test_BatchLogs_'
+ARCHIVE_DIRECTORY = 'archive'
+ARCHIVE_EXTENSION = '.zip'
+# Suffix of an archive still being written, see archive_batch().
+PARTIAL_EXTENSION = '.partial'
+# Already compressed formats are stored as is, everything else is deflated.
+STORED_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.zip', '.npy')
+TIMESTAMP_FORMAT = '%Y%m%dT%H%M%S'
+
+
+def get_archive_directory(logging_path: str) -> str:
+    """ Returns the directory archives are kept in.
+    """
+    return os.path.join(logging_path, ARCHIVE_DIRECTORY)
+
+
+def get_archive_path(batch_dir: str) -> str:
+    """ Returns the path of the archive for a batch directory.
+
+    Args:
+        batch_dir (str): batch directory (see log.batch_dir).
+
+    Returns:
+        str: path to the archive, whether or not it exists yet.
+    """
+    parent, name = os.path.split(os.path.normpath(batch_dir))
+    return os.path.join(get_archive_directory(parent), name + ARCHIVE_EXTENSION)
+
+
+def get_batch_time(name: str):
+    """ Returns the time encoded in a batch directory or archive name, None if not a batch.
+    """
+    name = os.path.basename(name)
+    if not name.startswith(BATCH_PREFIX):
+        return None
+    timestamp = name[len(BATCH_PREFIX):len(BATCH_PREFIX) + 15]
+    try:
+        return datetime.datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+    except ValueError:
+        return None
+
+
+def find_batches(logging_path: str) -> list[tuple[datetime.datetime, str]]:
+    """ Returns the batch directories under the logging path, oldest first.
+
+    Batches are dated by name, so no per-directory stat calls are needed.
+    """
+    batches = []
+    with os.scandir(logging_path) as entries:
+        for entry in entries:
+            batch_time = get_batch_time(entry.name)
+            if batch_time is not None and entry.is_dir():
+                batches.append((batch_time, entry.path))
+    return sorted(batches)
+
+
+def find_archives(logging_path: str) -> list[tuple[datetime.datetime, str, int]]:
+    """ Returns the archives under the logging path with their sizes, oldest first.
+    """
+    directory = get_archive_directory(logging_path)
+    if not os.path.isdir(directory):
+        return []
+    archives = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            batch_time = get_batch_time(entry.name)
+            if batch_time is not None and entry.name.endswith(ARCHIVE_EXTENSION):
+                archives.append((batch_time, entry.path, entry.stat().st_size))
+    return sorted(archives)
+
+
+def archive_batch(batch_dir: str) -> str:
+    """ Compress a batch directory into its archive and remove the directory.
+
+    The archive is written under a temporary name and renamed once complete, so an
+    interrupted archive never replaces the original directory.
+
+    Args:
+        batch_dir (str): batch directory to archive.
+
+    Returns:
+        str: path to the archive.
+    """
+    archive_path = get_archive_path(batch_dir)
+    log.makedirs(os.path.dirname(archive_path))
+    partial_path = archive_path + PARTIAL_EXTENSION
+    with zipfile.ZipFile(partial_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for root, _, filenames in os.walk(batch_dir):
+            for filename in sorted(filenames):
+                path = os.path.join(root, filename)
+                compression = zipfile.ZIP_STORED if filename.lower().endswith(STORED_EXTENSIONS) \
+                    else zipfile.ZIP_DEFLATED
+                archive.write(path, os.path.relpath(path, batch_dir), compress_type=compression)
+    os.replace(partial_path, archive_path)
+    shutil.rmtree(batch_dir)
+    return archive_path
+
+
+def remove_partial_archives(logging_path: str) -> list[str]:
+    """ Delete the partial archives left behind by an interrupted archive_batch().
+
+    The batch directory of an interrupted archive is only removed once its archive is
+    complete, so partial archives hold nothing that is not kept elsewhere.
+
+    Returns:
+        list[str]: paths of the deleted partial archives.
+    """
+    directory = get_archive_directory(logging_path)
+    if not os.path.isdir(directory):
+        return []
+    removed = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.name.endswith(ARCHIVE_EXTENSION + PARTIAL_EXTENSION):
+                continue
+            try:
+                os.remove(entry.path)
+            except OSError as err:
+                logging.warning('Unable to remove partial archive "%s" --> %s', entry.path, err)
+                continue
+            removed.append(entry.path)
+    return removed
+
+
+def list_members(archive_path: str) -> list[str]:
+    """ Returns the names of the files held in an archive.
+    """
+    with zipfile.ZipFile(archive_path) as archive:
+        return archive.namelist()
+
+
+def read_member(archive_path: str, member: str) -> bytes:
+    """ Read a single file from an archive without extracting the rest.
+
+    Args:
+        archive_path (str): path to the archive.
+        member (str): name of the file within the archive, e.g. an image filename.
+
+    Returns:
+        bytes: file contents.
+    """
+    with zipfile.ZipFile(archive_path) as archive:
+        return archive.read(member)
+
+
+def extract_member(archive_path: str, member: str, destination: str) -> str:
+    """ Extract a single file from an archive.
+
+    Args:
+        archive_path (str): path to the archive.
+        member (str): name of the file within the archive.
+        destination (str): directory to extract to.
+
+    Returns:
+        str: path to the extracted file.
+    """
+    with zipfile.ZipFile(archive_path) as archive:
+        return archive.extract(member, destination)
+
+
+class Archiver():
+    """ Archives old batch directories and enforces the retention limits.
+
+    Args:
+        logging_path (str): parent logging directory holding the batch directories.
+        archive_after_days (float): age at which a batch directory is archived.
+        retention_days (float, optional): age at which an archive is deleted.
+            Defaults to None, meaning no age limit.
+        retention_bytes (int, optional): maximum total size of the archives; the oldest are
+            deleted first. Defaults to None, meaning no size limit.
+    """
+    def __init__(self, logging_path, archive_after_days, retention_days=None,
+                 retention_bytes=None):
+        self.logging_path = logging_path
+        self.archive_after = datetime.timedelta(days=archive_after_days)
+        self.retention = None if retention_days is None else \
+            datetime.timedelta(days=retention_days)
+        self.retention_bytes = retention_bytes
+
+
+    def run(self, exclude=(), now=None) -> tuple[list[str], list[str]]:
+        """ Archive batch directories old enough, then apply the retention limits.
+
+        Args:
+            exclude (iterable, optional): batch directories that must not be archived,
+                e.g. those in use. Defaults to ().
+            now (datetime, optional): current time. Defaults to datetime.now().
+
+        Returns:
+            tuple[list[str], list[str]]: paths of the archives created and deleted.
+        """
+        now = now or datetime.datetime.now()
+        excluded = {os.path.normcase(os.path.abspath(path)) for path in exclude}
+        created = []
+        if os.path.isdir(self.logging_path):
+            for batch_time, batch_dir in find_batches(self.logging_path):
+                if now - batch_time < self.archive_after:
+                    break
+                if os.path.normcase(os.path.abspath(batch_dir)) in excluded:
+                    continue
+                try:
+                    created.append(archive_batch(batch_dir))
+                except OSError as err:
+                    logging.warning('Unable to archive "%s" --> %s', batch_dir, err)
+        return created, self.apply_retention(now)
+
+
+    def apply_retention(self, now=None) -> list[str]:
+        """ Delete archives beyond the age limit, then the oldest until within the size limit.
+
+        Partial archives left by an interrupted pass are deleted first. Passes run one at a
+        time, so none of them can still be in progress.
+
+        Returns:
+            list[str]: paths of the deleted archives.
+        """
+        now = now or datetime.datetime.now()
+        for path in remove_partial_archives(self.logging_path):
+            logging.info('Removed partial archive "%s"', path)
+        archives = find_archives(self.logging_path)
+        total = sum(size for _, _, size in archives)
+        deleted = []
+        for batch_time, path, size in archives:
+            expired = self.retention is not None and now - batch_time > self.retention
+            oversize = self.retention_bytes is not None and total > self.retention_bytes
+            if not (expired or oversize):
+                break
+            try:
+                os.remove(path)
+            except OSError as err:
+                logging.warning('Unable to remove archive "%s" --> %s', path, err)
+                continue
+            total -= size
+            deleted.append(path)
+        return deleted
+
+
+
+class BackgroundArchiver(threading.Thread):
+    """ Runs an Archiver on a low-priority background thread.
+
+    A pass runs every period seconds, or sooner when requested (e.g. after each unit).
+
+    Args:
+        archiver (Archiver): archiver to run.
+        period (float, optional): seconds between passes. Defaults to one hour.
+    """
+    def __init__(self, archiver: Archiver, period=3600):
+        super().__init__(name='BatchArchiver', daemon=True)
+        self.archiver = archiver
+        self.period = period
+        self._exclude = ()
+        self._requested = threading.Event()
+        self._stopped = False
+
+
+    def request(self, exclude=()):
+        """ Request an archive pass as soon as possible.
+
+        Args:
+            exclude (iterable, optional): batch directories that must not be archived.
+                Defaults to ().
+        """
+        self._exclude = tuple(exclude)
+        self._requested.set()
+
+
+    def stop(self):
+        """ Stop after the current pass, if any.
+        """
+        self._stopped = True
+        self._requested.set()
+
+
+    def run(self):
+        while not self._stopped:
+            self._requested.wait(self.period)
+            self._requested.clear()
+            if self._stopped:
+                break
+            try:
+                created, deleted = self.archiver.run(self._exclude)
+            except OSError as err:
+                logging.warning('Archive pass failed --> %s', err)
+                continue
+            if created or deleted:
+                logging.info('Archived %d batch(es), removed %d archive(s)',
+                             len(created), len(deleted))
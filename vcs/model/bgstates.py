@@ -16,5 +16,6 @@ class BGStates:                                             #pylint: disable=too
     ACQUIRE_IMAGES = State("Acquiring images")
     PROCESS_IMAGES = State("Processing images")
     REVIEW = State("Reviewing results")
+    RETEST = State("Retesting failed cameras")
     ABORT = State("Aborting")
     CLEANUP = State("Cleaning up")
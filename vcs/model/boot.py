@@ -0,0 +1,294 @@
+''' Detection of VCU boot progress from the current drawn from the power supply.
+
+While the Jetson boots its supply current varies as the bootloader, kernel and services load.
+Once userland is up the current settles into a steady band. Units that never draw current or
+draw too much can be failed without waiting out connection timeouts, connecting can start as
+soon as the unit has drawn power for long enough to boot, and the steady state current and any
+anomaly are recorded for the report.
+'''
+import collections
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+
+from util.power_supply import telemetry
+
+POLL_PERIOD = .1
+
+
+@dataclass
+class BootProfile:
+    """ Expected boot profile, normally loaded from the boot_profile setting.
+
+    Args:
+        channel (int): supply channel powering the Jetson, 0 = Channel 1.
+        min_current (float): amps above which the unit is considered to be drawing power.
+        max_current (float): amps above which the unit is considered to be faulty. None to use
+            max_current_ratio of the current limit of the channel instead.
+        max_current_ratio (float): fraction of the current limit above which the unit is
+            considered to be faulty, i.e. the supply is current limiting.
+        overcurrent_time (float): seconds the current must stay above the maximum to be a
+            fault, so the inrush at power on is not mistaken for one.
+        steady_range (list[float]): range of the steady state current once booted, in amps.
+        steady_window (float): seconds over which the current must be steady.
+        steady_tolerance (float): maximum standard deviation of a steady current, in amps.
+        min_boot_time (float): seconds after power on before a steady current counts as booted,
+            so a unit held in reset or stuck early in boot is not mistaken for a booted one.
+        power_timeout (float): seconds after power on to start drawing current.
+        boot_timeout (float): seconds after power on to reach a steady current.
+
+    Power on is the end of the power on sequence.
+    """
+    channel: int = 0
+    min_current: float = .05
+    max_current: Optional[float] = None
+    max_current_ratio: float = .97
+    overcurrent_time: float = .5
+    steady_range: list = field(default_factory=lambda: [.2, 1.4])
+    steady_window: float = 3.0
+    steady_tolerance: float = .03
+    min_boot_time: float = 5.0
+    power_timeout: float = 5.0
+    boot_timeout: float = 120.0
+
+
+@dataclass
+class BootResult:
+    """ Outcome of boot detection.
+
+    Args:
+        booted (bool): a steady state current within range was found.
+        elapsed (float): seconds from power on to the outcome.
+        reason (str, optional): description of an anomalous profile, None if normal.
+        fatal (bool, optional): the anomaly means the unit cannot boot, so there is no point in
+            trying to connect. Defaults to False.
+        steady_current (float, optional): mean of the steady state current, in amps.
+    """
+    booted: bool
+    elapsed: float
+    reason: Optional[str] = None
+    fatal: bool = False
+    steady_current: Optional[float] = None
+
+
+    def get_report(self) -> dict:
+        """ Returns:
+            dict: content for the session report.
+        """
+        content = {'booted':self.booted, 'elapsed':self.elapsed}
+        if self.steady_current is not None:
+            content['steady current'] = self.steady_current
+        if self.reason is not None:
+            content['anomaly'] = self.reason
+        return content
+
+
+
+class BootDetector():
+    """ Recognizes the steady state current that indicates the VCU has booted.
+
+    Feed the current samples in order with add(), and check for timeouts with expire() when no
+    samples are arriving.
+
+    Args:
+        profile (BootProfile): expected boot profile.
+        current_limit (float, optional): current limit of the channel, in amps. Defaults to
+            None, in which case only profile.max_current is checked.
+    """
+    def __init__(self, profile: BootProfile, current_limit=None):
+        self.profile = profile
+        self.powered_at = None
+        self._window = collections.deque()
+        self._overcurrent_at = None
+        if profile.max_current is not None:
+            self.max_current = profile.max_current
+        elif current_limit is not None:
+            self.max_current = profile.max_current_ratio * current_limit
+        else:
+            self.max_current = None
+
+
+    def add(self, elapsed, current) -> Optional[BootResult]:
+        """ Add a current sample.
+
+        Args:
+            elapsed (float): seconds since power on.
+            current (float): measured current in amps.
+
+        Returns:
+            BootResult: the outcome, or None if the unit is still booting.
+        """
+        profile = self.profile
+        if self.max_current is not None and current > self.max_current:
+            if self._overcurrent_at is None:
+                self._overcurrent_at = elapsed
+            if elapsed - self._overcurrent_at >= profile.overcurrent_time:
+                return BootResult(False, elapsed, f'overcurrent of {current:.3f} A for '
+                                  f'{elapsed - self._overcurrent_at:.1f} s', fatal=True)
+        else:
+            self._overcurrent_at = None
+
+        if self.powered_at is None:
+            if current < profile.min_current:
+                return self.expire(elapsed)
+            self.powered_at = elapsed
+
+        self._window.append((elapsed, current))
+        while self._window[0][0] < elapsed - profile.steady_window:
+            self._window.popleft()
+
+        span = elapsed - self._window[0][0]
+        # Allow for the sampling period when deciding whether the window is full.
+        if span >= .9 * profile.steady_window and elapsed - self.powered_at >= profile.min_boot_time:
+            currents = np.array([value for _, value in self._window])
+            if currents.std() <= profile.steady_tolerance:
+                mean = float(currents.mean())
+                low, high = profile.steady_range
+                if low <= mean <= high:
+                    return BootResult(True, elapsed, steady_current=mean)
+                if mean < profile.min_current:
+                    return BootResult(False, elapsed, 'current dropped after power on',
+                                      fatal=True, steady_current=mean)
+                return BootResult(False, elapsed, f'steady current of {mean:.3f} A out of range',
+                                  steady_current=mean)
+        return self.expire(elapsed)
+
+
+    def ready(self, elapsed) -> bool:
+        """ Whether the unit has drawn power for long enough to be worth connecting to.
+
+        Args:
+            elapsed (float): seconds since power on.
+        """
+        return self.powered_at is not None and \
+            elapsed - self.powered_at >= self.profile.min_boot_time
+
+
+    def expire(self, elapsed) -> Optional[BootResult]:
+        """ Check whether the unit has run out of time to power on or boot.
+
+        Args:
+            elapsed (float): seconds since power on.
+
+        Returns:
+            BootResult: the outcome, or None if the unit is still booting.
+        """
+        if self.powered_at is None and elapsed > self.profile.power_timeout:
+            return BootResult(False, elapsed, 'no current drawn after power on', fatal=True)
+        if elapsed > self.profile.boot_timeout:
+            return BootResult(False, elapsed, 'current did not settle')
+        return None
+
+
+def load_profile(values: dict) -> BootProfile:
+    """ Create a boot profile from its settings.
+
+    Args:
+        values (dict): BootProfile fields; missing fields use their defaults.
+
+    Returns:
+        BootProfile: the profile.
+    """
+    try:
+        return BootProfile(**values)
+    except TypeError as err:
+        raise ValueError(f"Invalid boot profile {values}: {err}") from err
+
+
+class BootMonitor():
+    """ Follows the samples taken by a running sampler through a BootDetector.
+
+    Args:
+        sampler (telemetry.TelemetrySampler): running sampler.
+        profile (BootProfile): expected boot profile.
+        current_limit (float, optional): current limit of the channel, see BootDetector.
+        start (float, optional): sampler time (see TelemetrySampler.elapsed) at which the power
+            on sequence completed. Earlier samples are ignored and times are measured from it.
+            Defaults to 0.
+    """
+    def __init__(self, sampler: telemetry.TelemetrySampler, profile: BootProfile,
+                 current_limit=None, start=0.0):
+        self.detector = BootDetector(profile, current_limit)
+        self.result = None
+        self._sampler = sampler
+        self._start = start
+        self._column = telemetry.get_column(profile.channel, 'current')
+        self._index = 0
+
+
+    @property
+    def elapsed(self) -> float:
+        """ Seconds since power on.
+        """
+        return self._sampler.elapsed - self._start
+
+
+    @property
+    def ready(self) -> bool:
+        """ Whether the unit has drawn power for long enough to be worth connecting to.
+        """
+        return self.detector.ready(self.elapsed)
+
+
+    def poll(self) -> Optional[BootResult]:
+        """ Check the samples taken since the last poll.
+
+        Returns:
+            BootResult: the outcome, or None if the unit is still booting.
+        """
+        if self.result is not None:
+            return self.result
+        samples, self._index = self._sampler.read_since(self._index)
+        for sample in samples:
+            if sample[0] < self._start:
+                continue
+            self.result = self.detector.add(float(sample[0]) - self._start,
+                                            float(sample[self._column]))
+            if self.result is not None:
+                break
+        else:
+            self.result = self.detector.expire(self.elapsed)
+        if self.result is not None:
+            logging.info('Boot profile: %s', self.result)
+        return self.result
+
+
+    def wait(self, until_ready=False, cancelled=lambda: False,
+             sleep=time.sleep) -> Optional[BootResult]:
+        """ Follow the samples until the outcome is known.
+
+        Args:
+            until_ready (bool, optional): stop waiting as soon as the unit is ready (see
+                ready), so only the outcomes known by then are returned, e.g. no current
+                drawn or overcurrent. Defaults to False.
+            cancelled (Callable, optional): returns True to stop waiting. Defaults to never.
+            sleep (Callable, optional): sleep function. Defaults to time.sleep.
+
+        Returns:
+            BootResult: the outcome, or None if ready or cancelled first.
+        """
+        while not cancelled():
+            result = self.poll()
+            if result is not None:
+                return result
+            if until_ready and self.ready:
+                return None
+            sleep(POLL_PERIOD)
+        return None
+
+
+def wait_for_boot(sampler: telemetry.TelemetrySampler, profile: BootProfile,
+                  current_limit=None, start=0.0, cancelled=lambda: False,
+                  sleep=time.sleep) -> Optional[BootResult]:
+    """ Follow the samples taken by a running sampler until the boot outcome is known.
+
+    See BootMonitor for the arguments.
+
+    Returns:
+        BootResult: the outcome, or None if cancelled.
+    """
+    return BootMonitor(sampler, profile, current_limit, start).wait(
+        cancelled=cancelled, sleep=sleep)
@@ -60,12 +60,32 @@ class Camera:
             (self.serial_number != "" and len(self.images) > 0)
 
 
+    def clear_images(self):
+        """ Remove all associated image paths, e.g. before the camera is recaptured.
+        """
+        self._image_paths = []
+
+
+    @property
+    def status(self) -> Optional[bool]:
+        """ Pass/fail status of the camera, None if it has not been assessed.
+        """
+        return self._status
+
+
     def set_status(self, status):
         """ Set the pass/fail status of the camera.
         """
         self._status = status
 
 
+    @property
+    def report(self) -> dict:
+        """ Image report for the camera.
+        """
+        return self._report
+
+
     def set_report(self, report):
         """ Set the image report for the camera.
         """
@@ -101,7 +121,25 @@ def assign_images_to_cameras(camera_list: list[Camera], path_to_image_folder: st
         path_to_image_folder (str): path to directory containing images.
         camera_position_lookup (dict): lookup table of listed camera index to actual position.
     """
-    for path in os.listdir(path_to_image_folder):
+    assign_image_paths(
+        camera_list,
+        [os.path.join(path_to_image_folder, path) for path in os.listdir(path_to_image_folder)],
+        camera_position_lookup,
+    )
+
+
+def assign_image_paths(camera_list: list[Camera], image_paths: list[str],
+                       camera_position_lookup: dict):
+    """ Assigns a list of image paths to the related Camera objects as determined by the camera
+    lookup table (see assign_images_to_cameras).
+
+    Args:
+        camera_list (list[Camera]): list of Camera objects with which to associate images.
+        image_paths (list[str]): paths to the images.
+        camera_position_lookup (dict): lookup table of listed camera index to actual position.
+    """
+    for full_path in image_paths:
+        path = os.path.basename(full_path)
         if path.endswith('.png'):
             match = index_extractor.match(path)
             assert match is not None, f'Unable to extract index from path "{path}"'
@@ -109,5 +147,19 @@ def assign_images_to_cameras(camera_list: list[Camera], path_to_image_folder: st
             if camera_index in camera_position_lookup:
                 actual_camera_index = camera_position_lookup[camera_index]
                 camera = camera_list[actual_camera_index]
-                full_path = os.path.join(path_to_image_folder, path)
                 camera.associate_image_path(full_path)
+
+
+def get_sensor_ids(cameras: list[Camera], camera_position_lookup: dict) -> list[int]:
+    """ Returns the sensor (device) indexes that capture images for the given cameras.
+
+    Args:
+        cameras (list[Camera]): cameras of interest.
+        camera_position_lookup (dict): lookup table of listed camera index to actual position.
+
+    Returns:
+        list[int]: sorted list of sensor indexes.
+    """
+    positions = {camera.index for camera in cameras}
+    return sorted(sensor_id for sensor_id, position in camera_position_lookup.items()
+                  if position in positions)
@@ -1,85 +1,153 @@
 ''' Module to support organizing the system equipment.
 '''
+from concurrent.futures import Future, ThreadPoolExecutor
+
 from util import power_supply
+from util.power_supply import adapters
+from util.power_supply import instrument
+from util.power_supply import sequence
+from util.power_supply import telemetry
+from util.power_supply.pacing import check_verification
+from vcs.model import application
 from vcs.model.resources import VCSResources
 from vcs.model.vcu import VCU
 from vcs.model.camera import Camera
 
-import time
-
-#VOLTAGE = 46.5
-#CURRENT_LIMIT = 1
-VOLTAGE = [12.0, 5.0, 3.3]
-CURRENT_LIMIT = [1.5, 3.0, 3.0]
-
 
 class Equipment:                                            #pylint: disable=too-few-public-methods
     """ Collection of all system equipment.
     """
     def __init__(self, resources: VCSResources, vcu):
         self.resources = resources
-        self._power_supplies = []   # None  #: list[Power] = []
+        self._power_supplies: list[instrument.AsyncSupply] = []
         self.vcu: VCU = vcu
         self.camera_list = [Camera(index, serial_number) for index, serial_number in \
             enumerate(self.resources.serial_numbers)]
 
 
+    @property
+    def power_supplies(self) -> list[instrument.AsyncSupply]:
+        """ Power supplies in use, empty until setup() has run.
+        """
+        return self._power_supplies
+
+
+    def reuse_power_supplies(self, other):
+        """ Adopt the power supplies already detected by another Equipment instance.
+
+        Avoids repeating power supply detection between back-to-back units. The manual supply
+        is closed instead, so an attached supply is detected again for each unit.
+
+        Args:
+            other (Equipment): previously used equipment, may be None.
+        """
+        if other is None or other is self or self._power_supplies:
+            return
+        if any(isinstance(supply.supply, adapters.ManualSupply)
+               for supply in other.power_supplies):
+            other.close_power_supplies()
+            return
+        self._power_supplies = other.power_supplies
+
+
+    def close_power_supplies(self):
+        """ Close the power supplies, so they are detected again by the next setup().
+        """
+        supplies, self._power_supplies = self._power_supplies, []
+        for supply in supplies:
+            supply.close()
+
+
     def setup(self):
         """ Make connections to system equipment.
+
+        Each power supply is driven through its own I/O thread (see instrument.AsyncSupply).
+        Falls back to the manual supply if none is detected.
+
+        Raises:
+            power_supply.MultipleSupplies: if more than one supply is detected.
         """
         if not self._power_supplies:    # is None:
+            known = application.settings.values.power_supply_fingerprint or None
             try:
-                self._power_supplies = power_supply.detect()
+                detected = power_supply.detect(
+                    known, tuple(application.settings.values.power_supply_backends))
             except power_supply.NoSupply:
-                self._power_supplies = power_supply.manual_power_supply.open()
+                self._power_supplies = [instrument.AsyncSupply(
+                    adapters.ManualSupply(power_supply.manual_power_supply.open()))]
+                return
+            for item in detected:
+                if hasattr(item.supply, 'verification'):
+                    item.supply.verification = check_verification(
+                        application.settings.values.power_supply_verification)
+            self._power_supplies = [
+                instrument.AsyncSupply(adapters.create(item.backend, item.supply),
+                                       name=f'PowerSupply-{item.backend}')
+                for item in detected]
+            if detected[0].fingerprint != known:
+                application.settings.values.power_supply_fingerprint = detected[0].fingerprint
+                application.settings.save()
+
+
+    def enable_supply(self) -> list[sequence.StepTiming]:
+        """ Set the expected voltage and current limits and then enable the power supply,
+        following the power on sequence from the settings.
+
+        Returns:
+            list[sequence.StepTiming]: achieved timing of each step of the sequence.
+        """
+        sequencer = _get_sequencer(application.settings.values.power_on_sequence)
+        timings = []
+        for supply in self._power_supplies:
+            timings = sequencer.run(supply, enabled=True)
+        return timings
+
 
+    def start_telemetry(self, rate, capacity) -> telemetry.TelemetrySampler:
+        """ Start sampling the voltage, current and power of the power supply in the background.
 
-    def enable_supply(self):
-        """ Set the expected voltage and current limits and then enable the power supply.
+        Args:
+            rate (float): samples per second, 0 to disable sampling.
+            capacity (int): number of samples kept.
+
+        Returns:
+            telemetry.TelemetrySampler: running sampler, or None if sampling is disabled or the
+                power supply does not support it.
         """
-#        for i in range(0, len(self._power_supplies)):
-#            self._power_supplies[i].set_voltage(VOLTAGE[i])
-#            self._power_supplies[i].set_current_limit(CURRENT_LIMIT[i])
-#            self._power_supplies[i].enable()
-        for i in range(0, len(self._power_supplies)):
-#            with self._power_supplies[i] as ps:
-#                ps.set_channel(0)
-#                ps.apply_v_and_i(VOLTAGE[0], CURRENT_LIMIT[0])
-#                time.sleep(500e-3)
-#                ps.set_channel(1)
-#                ps.apply_v_and_i(VOLTAGE[1], CURRENT_LIMIT[1])
-#                time.sleep(100e-6)
-#                ps.set_channel(2)
-#                ps.apply_v_and_i(VOLTAGE[2], CURRENT_LIMIT[2])
-            self._power_supplies[i].set_channel(0)
-            self._power_supplies[i].apply_v_and_i(VOLTAGE[0], CURRENT_LIMIT[0])
-            self._power_supplies[i].enable()
-            time.sleep(500e-3)
-            self._power_supplies[i].set_channel(1)
-            self._power_supplies[i].apply_v_and_i(VOLTAGE[1], CURRENT_LIMIT[1])
-            self._power_supplies[i].enable()
-            time.sleep(100e-6)
-            self._power_supplies[i].set_channel(2)
-            self._power_supplies[i].apply_v_and_i(VOLTAGE[2], CURRENT_LIMIT[2])
-            self._power_supplies[i].enable()
+        supplies = [supply for supply in self._power_supplies or [] if supply.supply.measures]
+        if rate <= 0 or not supplies:
+            return None
+        sampler = telemetry.TelemetrySampler(
+            supplies[0], rate, capacity, channels=supplies[0].channels)
+        sampler.start()
+        return sampler
 
 
     def cleanup(self):
         """ Places equipment back into known state.
 
-        Disables the power on the power supply.
+        Disables the power on the power supply, following the power off sequence from the
+        settings.
         """
-        if self._power_supplies:
-            for i in range(0, len(self._power_supplies)):
-                self._power_supplies[i].set_channel(0)
-                self._power_supplies[i].apply_v_and_i(0.0, 1.5)
-                self._power_supplies[i].disable()
-                time.sleep(100e-3)
-                self._power_supplies[i].set_channel(1)
-                self._power_supplies[i].apply_v_and_i(0.0, 3.0)
-                self._power_supplies[i].disable()
-                time.sleep(100e-3)
-                self._power_supplies[i].set_channel(2)
-                self._power_supplies[i].apply_v_and_i(0.0, 3.0)
-                self._power_supplies[i].disable()
-                self._power_supplies[i].set_channel(0)
+        sequencer = _get_sequencer(application.settings.values.power_off_sequence)
+        for supply in self._power_supplies or []:
+            sequencer.run(supply, enabled=False)
+
+
+    def start_cleanup(self) -> Future:
+        """ Start placing the equipment back into a known state in the background (see
+        cleanup()), so other work can continue while the power off sequence runs.
+
+        Returns:
+            Future: completes once the equipment has been cleaned up.
+        """
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='EquipmentCleanup')
+        try:
+            return executor.submit(self.cleanup)
+        finally:
+            executor.shutdown(wait=False)
+
+
+def _get_sequencer(recipe) -> sequence.PowerSequencer:
+    return sequence.PowerSequencer(
+        sequence.load_recipe(recipe), application.settings.values.power_sequence_tolerance)
@@ -0,0 +1,204 @@
+''' Export of the logging directory to removable media.
+
+The station has no network connection, so logs are exported on request, e.g. to a thumb drive.
+Exports are incremental: a manifest kept on the destination records every file already
+exported (size, modification time and SHA-256), so only new or changed files are copied.
+Files are copied in parallel with large buffers, hashed while they are copied and verified by
+reading the copy back.
+'''
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+from vcs.model import log
+
+
+MANIFEST_FILENAME = 'export-manifest.json'
+BUFFER_SIZE = 4 * 1024 * 1024
+DEFAULT_WORKERS = 4
+
+
+class ExportError(Exception):
+    """ Raised when an exported file does not match its source.
+    """
+
+
+@dataclass
+class ExportResult:
+    """ Summary of an export.
+    """
+    files: int = 0
+    skipped: int = 0
+    bytes: int = 0
+    seconds: float = 0.
+    failures: list = field(default_factory=list)
+
+    @property
+    def throughput(self) -> float:
+        """ Export throughput in MB/s.
+        """
+        return self.bytes / 1e6 / self.seconds if self.seconds > 0 else 0.
+
+
+
+def load_manifest(destination: str) -> dict:
+    """ Returns the manifest of files already exported to the destination.
+    """
+    try:
+        with open(os.path.join(destination, MANIFEST_FILENAME), 'r', encoding='utf-8') as fref:
+            return json.load(fref)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(destination: str, manifest: dict):
+    """ Write the manifest to the destination, replacing the previous one atomically.
+    """
+    path = os.path.join(destination, MANIFEST_FILENAME)
+    with open(path + '.partial', 'w', encoding='utf-8') as fref:
+        json.dump(manifest, fref, indent=1, sort_keys=True)
+    os.replace(path + '.partial', path)
+
+
+def find_files(source: str) -> dict:
+    """ Returns every file under the source directory with its size and modification time.
+
+    Returns:
+        dict: (size, mtime_ns) keyed by path relative to source, using '/' as separator.
+    """
+    files = {}
+    pending = ['']
+    while pending:
+        relative = pending.pop()
+        with os.scandir(os.path.join(source, relative)) as entries:
+            for entry in entries:
+                name = f'{relative}/{entry.name}' if relative else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(name)
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat()
+                    files[name] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+
+def get_pending_files(source: str, manifest: dict) -> tuple[dict, int]:
+    """ Returns the files that are new or have changed since they were last exported.
+
+    Returns:
+        tuple[dict, int]: (size, mtime_ns) of each pending file keyed by relative path, and
+            the number of files already up to date.
+    """
+    exported = manifest.get('files', {})
+    pending = {}
+    files = find_files(source)
+    for name, (size, mtime_ns) in files.items():
+        entry = exported.get(name)
+        if entry is None or entry['size'] != size or entry['mtime_ns'] != mtime_ns:
+            pending[name] = (size, mtime_ns)
+    return pending, len(files) - len(pending)
+
+
+def hash_file(path: str, buffer_size=BUFFER_SIZE) -> str:
+    """ Returns the SHA-256 of a file, reading it in large blocks.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fref:
+        while True:
+            block = fref.read(buffer_size)
+            if not block:
+                break
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def copy_file(source: str, destination: str, buffer_size=BUFFER_SIZE, verify=True) -> str:
+    """ Copy a file, hashing it as it is copied and optionally verifying the copy.
+
+    The copy is written under a temporary name and renamed once complete and verified.
+
+    Args:
+        source (str): file to copy.
+        destination (str): path of the copy.
+        buffer_size (int, optional): size of each read/write. Defaults to BUFFER_SIZE.
+        verify (bool, optional): read the copy back and compare hashes. Defaults to True.
+
+    Raises:
+        ExportError: if the copy does not match the source.
+
+    Returns:
+        str: SHA-256 of the file.
+    """
+    log.makedirs(os.path.dirname(destination))
+    partial = destination + '.partial'
+    digest = hashlib.sha256()
+    with open(source, 'rb') as src, open(partial, 'wb') as dst:
+        while True:
+            block = src.read(buffer_size)
+            if not block:
+                break
+            digest.update(block)
+            dst.write(block)
+        dst.flush()
+        os.fsync(dst.fileno())
+
+    checksum = digest.hexdigest()
+    if verify and hash_file(partial, buffer_size) != checksum:
+        os.remove(partial)
+        raise ExportError(f'Verification failed for "{destination}"')
+    os.replace(partial, destination)
+    stat = os.stat(source)
+    os.utime(destination, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    return checksum
+
+
+def export_logs(source: str, destination: str, workers=DEFAULT_WORKERS, verify=True,
+                progress=None) -> ExportResult:
+    """ Copy every file not yet exported from the source directory to the destination.
+
+    Args:
+        source (str): logging directory to export.
+        destination (str): export directory, e.g. on a thumb drive.
+        workers (int, optional): number of files copied at once. Defaults to DEFAULT_WORKERS.
+        verify (bool, optional): verify each copy against its source. Defaults to True.
+        progress (callable, optional): called as progress(bytes_done, bytes_total,
+            files_done, files_total) after each file. Defaults to None.
+
+    Returns:
+        ExportResult: summary of the export.
+    """
+    started = time.perf_counter()
+    log.makedirs(destination)
+    manifest = load_manifest(destination)
+    exported = manifest.setdefault('files', {})
+    pending, skipped = get_pending_files(source, manifest)
+    result = ExportResult(skipped=skipped)
+    total = sum(size for size, _ in pending.values())
+
+    def copy(name):
+        return copy_file(os.path.join(source, *name.split('/')),
+                         os.path.join(destination, *name.split('/')), verify=verify)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='LogExport') as pool:
+            futures = {pool.submit(copy, name):name for name in pending}
+            for future in as_completed(futures):
+                name = futures[future]
+                size, mtime_ns = pending[name]
+                try:
+                    checksum = future.result()
+                except (OSError, ExportError) as err:
+                    result.failures.append(f'{name}: {err}')
+                    continue
+                exported[name] = {'size':size, 'mtime_ns':mtime_ns, 'sha256':checksum}
+                result.files += 1
+                result.bytes += size
+                if progress is not None:
+                    progress(result.bytes, total, result.files, len(pending))
+    finally:
+        # Keep track of whatever was exported, even if interrupted.
+        save_manifest(destination, manifest)
+        result.seconds = time.perf_counter() - started
+    return result
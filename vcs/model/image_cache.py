@@ -0,0 +1,142 @@
+''' Process-wide cache of decoded images.
+
+Captured images are used both for analysis (vcs.model.images) and for display
+(vcs.view.camera_grid); reading them through this cache means each file is only decoded once.
+Entries are keyed by path, size and modification time so replaced files are decoded again.
+'''
+import collections
+import os
+import threading
+from concurrent.futures import Future
+
+import numpy as np
+from skimage.io import imread
+
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+class ImageCache():
+    """ Thread-safe, memory-bounded least-recently-used cache of decoded images.
+
+    Cached arrays are shared between callers so they are marked read-only.
+
+    Args:
+        max_bytes (int, optional): maximum total size of the cached arrays.
+            Defaults to DEFAULT_MAX_BYTES.
+        loader (callable, optional): function used to decode an image file into an array.
+            Defaults to skimage.io.imread.
+    """
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, loader=imread):
+        self.max_bytes = max_bytes
+        self._loader = loader
+        self._items = collections.OrderedDict()
+        self._loading = {}
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+
+    @staticmethod
+    def get_key(path: str) -> tuple:
+        """ Returns the cache key for an image file.
+
+        Raises:
+            FileNotFoundError: if the file does not exist.
+        """
+        stat = os.stat(path)
+        return (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+
+    def read(self, path: str) -> np.ndarray:
+        """ Returns the decoded image, decoding the file only if it is not already cached.
+
+        Concurrent reads of the same file wait for a single decode.
+
+        Args:
+            path (str): path to the image.
+
+        Returns:
+            np.ndarray: read-only image data.
+        """
+        key = self.get_key(path)
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            future = self._loading.get(key)
+            owner = future is None
+            if owner:
+                future = self._loading[key] = Future()
+                self.misses += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            image = np.asarray(self._loader(path))
+            image.setflags(write=False)
+        except BaseException as err:
+            with self._lock:
+                del self._loading[key]
+            future.set_exception(err)
+            raise
+
+        with self._lock:
+            del self._loading[key]
+            self._store(key, image)
+        future.set_result(image)
+        return image
+
+
+    def _store(self, key, image):
+        if image.nbytes > self.max_bytes:
+            return
+        self._items[key] = image
+        self.nbytes += image.nbytes
+        while self.nbytes > self.max_bytes:
+            _, evicted = self._items.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+
+
+    def clear(self):
+        """ Discard all cached images.
+        """
+        with self._lock:
+            self._items.clear()
+            self.nbytes = 0
+
+
+    def __len__(self):
+        return len(self._items)
+
+
+    def __contains__(self, path):
+        try:
+            key = self.get_key(path)
+        except OSError:
+            return False
+        return key in self._items
+
+
+_cache = ImageCache()
+
+
+def read(path: str) -> np.ndarray:
+    """ Returns the decoded image from the process-wide cache.
+
+    Args:
+        path (str): path to the image.
+
+    Returns:
+        np.ndarray: read-only image data.
+    """
+    return _cache.read(path)
+
+
+def get_cache() -> ImageCache:
+    """ Returns the process-wide image cache.
+    """
+    return _cache
@@ -8,10 +8,11 @@ import logging
 import os
 from typing import Optional
 import cv2
+import numpy as np
 import piq
 import torch
-from skimage.io import imread
 from util.path import get_path_relative_to_application
+from vcs.model import image_cache
 from vcs.model.camera import Camera, index_extractor
 
 
@@ -36,7 +37,8 @@ class Image():
     """ loads image data for image processing.
     Keeps both as skimage and tensor formats.
 
-    Removes alpha channel for use with Tensor.
+    Removes alpha channel for use with Tensor.  Image data is shared through the
+    process-wide image cache (see vcs.model.image_cache) and is read-only.
     """
     @torch.no_grad()
     def __init__(self, target_path):
@@ -45,8 +47,9 @@ class Image():
         Args:
             target_path (str): path to image
         """
-        self.image = imread(target_path)
-        self.tensor = torch.Tensor(self.image[:,:,:3]).permute(2,0,1)[None, ...] / 255.
+        self.image = image_cache.read(target_path)
+        rgb = self.image[:,:,:3].astype(np.float32)
+        self.tensor = torch.from_numpy(rgb).permute(2,0,1)[None, ...] / 255.
         if torch.cuda.is_available():
             self.tensor = self.tensor.cuda()
 
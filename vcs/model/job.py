@@ -0,0 +1,62 @@
+""" Module for queued units of work.
+Intended to let the next unit be prepared while the current unit is still being tested.
+
+Nothing is written to the logging directory until the job starts, so units removed from the
+queue leave no trace and each batch is named by the time its unit started.
+"""
+import os
+import time
+
+from vcs.model import log
+from vcs.model import vcu
+from vcs.model.equipment import Equipment
+from vcs.model.resources import VCSResources
+from vcs.model.session import Session
+
+
+class Job():
+    """ A unit of work waiting to be run by the controller.
+
+    Args:
+        resources (VCSResources): set of equipment and parameters provided by the UI.
+    """
+    def __init__(self, resources: VCSResources):
+        self.resources = resources
+        self.session = Session()
+        self.equipment: Equipment = None
+        self.batch_dir = None
+        self.log_handler = None
+        self.future = None
+
+
+    def prepare(self):
+        """ Build everything the job needs ahead of time, i.e. the equipment objects.
+        """
+        self.equipment = Equipment(self.resources, vcu.VCU(self.resources.deserializer_lookup))
+
+
+    def start(self, logging_path: str):
+        """ Reserve the session timestamp and create the batch directory and diagnostic log file,
+        as the job is taken from the queue to run.
+
+        Args:
+            logging_path (str): parent logging directory.
+        """
+        self.session.reserve()
+        self.batch_dir = log.batch_dir(logging_path, self.session.timestamp)
+
+        # Batch directories are named by timestamp, so wait for a fresh one if already taken.
+        while os.path.exists(self.batch_dir):
+            time.sleep(.25)
+            self.session.reserve(force=True)
+            self.batch_dir = log.batch_dir(logging_path, self.session.timestamp)
+
+        log.makedirs(self.batch_dir)
+        self.log_handler = log.create_file_handler(log.get_diagnostic_log_path(self.batch_dir))
+
+
+    def discard(self):
+        """ Release any resources held by a job that will not be run.
+        """
+        if self.log_handler is not None:
+            self.log_handler.close()
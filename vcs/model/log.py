@@ -4,10 +4,15 @@ Provides a list of functions to assist with tailoring the logging module
 to this given application.
 """
 
+import atexit
 import os
+import queue
 import re
 import datetime
 import logging
+import logging.handlers
+import threading
+import time
 import unicodedata
 from os.path import dirname, join
 
@@ -15,38 +20,238 @@ from . import application
 from vcs.model.resources import VCSResources
 
 
+LOG_FORMAT = '%(asctime)-15s;%(levelname)8s;%(message)s'
+
+# Buffered records are written to disk at least this often (seconds)...
+FLUSH_INTERVAL = 1.0
+# ...or immediately when a record of at least this level is logged.
+FLUSH_LEVEL = logging.WARNING
+
+
 def close(logger):
     "Reset the logger by removing all event handlers."
     while logger.handlers:
-        logger.removeHandler(logger.handlers[0])
+        handler = logger.handlers[0]
+        logger.removeHandler(handler)
+        handler.close()
 
 
 
-def initialize(filename, console_stream=None, transaction_filename=None):
-    """Set the default logger.
+class BufferedFileHandler(logging.FileHandler):
+    """ File handler that leaves records in the file buffer until explicitly flushed.
+
+    Intended to sit behind the LogListener, which flushes on a timer or when an important
+    record arrives instead of after every record.
+    """
+    def flush(self):
+        """ Called after every record; writing is deferred until force_flush().
+        """
+
+
+    def force_flush(self):
+        """ Write any buffered records to disk.
+        """
+        super().flush()
+
+
+
+class _Control():                                           #pylint: disable=too-few-public-methods
+    """ Request passed through the log queue so it is applied in order with the records.
+    """
+    def __init__(self, handlers=None):
+        self.handlers = handlers
+        self.done = threading.Event()
+
+
 
-    Write to the given file as well as the console_stream."""
+class LogListener(logging.handlers.QueueListener):
+    """ Long-lived writer thread for the records queued by the application.
+
+    Records are buffered and flushed every flush_interval seconds, or as soon as a record of
+    at least flush_level arrives.  The set of handlers can be swapped (e.g. per batch)
+    without stopping the listener.
+
+    Args:
+        log_queue (queue.Queue): queue the records are posted to.
+        flush_interval (float, optional): maximum seconds between flushes.
+            Defaults to FLUSH_INTERVAL.
+        flush_level (int, optional): records of this level or above are flushed immediately.
+            Defaults to FLUSH_LEVEL.
+    """
+    def __init__(self, log_queue, flush_interval=FLUSH_INTERVAL, flush_level=FLUSH_LEVEL):
+        super().__init__(log_queue, respect_handler_level=True)
+        self.flush_interval = flush_interval
+        self.flush_level = flush_level
+
+
+    def set_handlers(self, handlers, wait=True):
+        """ Replace the handlers that records are written to.
+
+        Records already queued are written to the previous handlers, which are then flushed
+        and closed unless they are part of the new set.
+
+        Args:
+            handlers (list[logging.Handler]): new set of handlers.
+            wait (bool, optional): wait until the swap has been applied. Defaults to True.
+        """
+        self._request(_Control(tuple(handlers)), wait)
+
+
+    def flush(self, wait=True):
+        """ Write all records queued so far to disk.
+
+        Args:
+            wait (bool, optional): wait until the records have been written. Defaults to True.
+        """
+        self._request(_Control(), wait)
+
+
+    def _request(self, control, wait):
+        if self._thread is None:
+            self._apply(control)
+            return
+        self.queue.put_nowait(control)
+        if wait:
+            control.done.wait()
+
+
+    def _apply(self, control):
+        self._flush_handlers()
+        if control.handlers is not None:
+            for handler in self.handlers:
+                if handler not in control.handlers:
+                    handler.close()
+            self.handlers = control.handlers
+        control.done.set()
+
+
+    def _flush_handlers(self):
+        for handler in self.handlers:
+            if isinstance(handler, BufferedFileHandler):
+                handler.force_flush()
+            else:
+                handler.flush()
+
+
+    def _monitor(self):
+        """ Write queued records, flushing on the interval, on important records, on request
+        and when stopped.
+        """
+        pending = False
+        deadline = None
+        while True:
+            timeout = max(0, deadline - time.monotonic()) if pending else None
+            try:
+                item = self.queue.get(True, timeout)
+            except queue.Empty:
+                flush = True
+            else:
+                if item is self._sentinel:
+                    self._flush_handlers()
+                    break
+                if isinstance(item, _Control):
+                    self._apply(item)
+                    pending = False
+                    continue
+                self.handle(item)
+                if not pending:
+                    pending = True
+                    deadline = time.monotonic() + self.flush_interval
+                flush = item.levelno >= self.flush_level or time.monotonic() >= deadline
+
+            if flush:
+                self._flush_handlers()
+                pending = False
+
+
+
+_listener = None
+_listener_lock = threading.Lock()
+
+
+def get_listener() -> LogListener:
+    """ Returns the application's log listener, starting it on first use.
+    """
+    global _listener                                        #pylint: disable=global-statement
+    with _listener_lock:
+        if _listener is None:
+            _listener = LogListener(queue.SimpleQueue())
+            _listener.start()
+            atexit.register(shutdown)
+        return _listener
+
+
+def flush():
+    """ Block until everything logged so far has been written to disk.
+    """
+    if _listener is not None:
+        _listener.flush()
+
+
+def shutdown():
+    """ Write any remaining records and stop the log listener.
+    """
+    global _listener                                        #pylint: disable=global-statement
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener.set_handlers([])
+            _listener = None
+
+
+
+def create_file_handler(filename, level=logging.DEBUG):
+    """ Create a handler that writes to the given file using the application log format.
+
+    Useful for opening a log file ahead of time (see initialize).
+
+    Args:
+        filename (str): path to the log file.
+        level (int, optional): minimum level to record. Defaults to logging.DEBUG.
+
+    Returns:
+        BufferedFileHandler: handler for the log file.
+    """
     makedirs(dirname(filename))
+    handler = BufferedFileHandler(filename)
+    handler.setLevel(level)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    return handler
+
+
+
+def initialize(filename, console_stream=None, transaction_filename=None, file_handler=None):
+    """Set the default logger.
+
+    Write to the given file as well as the console_stream.
+    A handler for the primary file may be provided if it was created ahead of time.
+
+    Records are queued by the calling thread and written by the log listener, so only the
+    listener's handlers are replaced here; the root logger keeps its queue handler."""
+    listener = get_listener()
     logger = logging.getLogger()
-    close(logger)
+    logger.setLevel(logging.DEBUG)
+    if not any(isinstance(handler, logging.handlers.QueueHandler)
+               and handler.queue is listener.queue for handler in logger.handlers):
+        close(logger)
+        logger.addHandler(logging.handlers.QueueHandler(listener.queue))
 
     # Setup logging for primary file
-    logging.basicConfig(filename=filename, level=logging.DEBUG,
-                        format='%(asctime)-15s;%(levelname)8s;%(message)s')
+    if file_handler is None:
+        file_handler = create_file_handler(filename)
+    handlers = [file_handler]
     if console_stream:
         stream_handler = logging.StreamHandler(console_stream)
         stream_handler.setLevel(logging.DEBUG)
         stream_handler.setFormatter(logging.Formatter('%(message)s'))
-        logger.addHandler(stream_handler)
+        handlers.append(stream_handler)
 
     # Setup transaction file logging where required
     if transaction_filename:
-        makedirs(dirname(transaction_filename))
-        transaction_handler = logging.FileHandler(transaction_filename)
-        transaction_handler.setLevel(logging.INFO)
-        transaction_handler.setFormatter(
-            logging.Formatter('%(asctime)-15s;%(levelname)8s;%(message)s'))
-        logger.addHandler(transaction_handler)
+        transaction_handler = create_file_handler(transaction_filename, logging.INFO)
+        handlers.append(transaction_handler)
+
+    listener.set_handlers(handlers)
 
 
 def makedirs(directory):
@@ -94,7 +299,8 @@ def get_diagnostic_log_path(directory: str) -> str:
     return join(directory, "diagnostic.log")
 
 
-def get_transaction_log_path(part_number, serial_number, directory):
+def get_transaction_log_path(part_number, serial_number, directory, timestamp=None,
+                             camera_id=None):
     """ Build path for the current transaction log.
 
     NOTE: transaction logs are kept in a subfolder under the parent logging directory.
@@ -103,13 +309,18 @@ def get_transaction_log_path(part_number, serial_number, directory):
         part_number (str): part number of camera used in log name.
         serial_number (str): serial number of camera used in log name.
         directory (str): parent logging directory
+        timestamp (str, optional): timestamp used in log name. Defaults to the current time.
+        camera_id (object, optional): camera identity used in log name, to tell apart cameras
+            logged with the same serial number and timestamp. Defaults to None.
 
     Returns:
         str: path to the current transaction log file.
     """
-    timestamp = datetime.datetime.now().strftime('%Y%m%dT%H%M%S')
+    timestamp = timestamp or get_timestamp()
     transactions_directory = get_transactions_directory_path(directory)
     serial_number = slugify(serial_number)
+    if camera_id is not None:
+        serial_number = f'{serial_number}_camera{camera_id}'
     return join(transactions_directory, f'VCU_Test_{part_number}_{serial_number}_{timestamp}.log')
 
 
@@ -125,11 +336,11 @@ def get_transactions_directory_path(directory: str) -> str:
     return join(directory, 'transactions')
 
 
-def open_log(log_directory):
+def open_log(log_directory, file_handler=None):
     "Open a log file named with the module's serial number."
 
     primary_log_path = get_diagnostic_log_path(log_directory)
-    initialize(primary_log_path)
+    initialize(primary_log_path, file_handler=file_handler)
     logging.info('----------')
     logging.info('PRODUCT:%s %s', application.COMPANY, application.PRODUCT)
     logging.info('VERSION:%s', application.VERSION)
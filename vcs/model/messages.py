@@ -0,0 +1,99 @@
+''' Messages passed from the controller to the user interface.
+
+Messages are posted on the background worker (see util.threading) and handled on the UI thread.
+'''
+import logging
+from dataclasses import dataclass, field
+
+from util.fsm import State
+from util.threading import Message
+from vcs.model.resources import VCSResources
+
+
+@dataclass
+class Status(Message):
+    """ Short description of the current activity, e.g. for a status bar.
+    """
+    PRIORITY = True
+    text: str
+
+
+@dataclass
+class StateChanged(Message):
+    """ The controller has moved to a new state.
+    """
+    state: State
+
+
+@dataclass
+class Log(Message):
+    """ Text to add to the output log.
+
+    Consecutive log messages of the same level are merged so they can be displayed with a
+    single insert.
+    """
+    text: str
+    newline: bool = True
+    level: int = logging.INFO
+
+    def merge(self, other):
+        if isinstance(other, Log) and other.level == self.level:
+            return Log(self.text + ('\n' if self.newline else '') + other.text, other.newline,
+                       self.level)
+        return None
+
+
+@dataclass
+class Ask(Message):
+    """ Yes/No question for the user; the answer is returned using ExecutorController.resume().
+    """
+    statement: str
+    question: str
+
+
+@dataclass
+class Prompt(Message):
+    """ Alert for the user; the answer is returned using ExecutorController.resume().
+    """
+    statement: str
+    details: str
+
+
+@dataclass
+class UnitStarted(Message):
+    """ A new unit has started testing.
+    """
+    resources: VCSResources
+
+
+@dataclass
+class UnitComplete(Message):
+    """ The unit under test has finished testing.
+    """
+    batch_dir: str
+    result: str
+    failures: list = field(default_factory=list)
+
+
+@dataclass
+class Statistics(Message):
+    """ Running timing statistics, updated as each unit completes.
+
+    Keyed by field name (e.g. 'cycle time'), see util.timing.RunningStatistics.summary.
+    """
+    statistics: dict
+
+
+@dataclass
+class CamerasReady(Message):
+    """ Images have been assigned to the cameras and are ready to display.
+    """
+    camera_list: list
+
+
+@dataclass
+class CameraMarked(Message):
+    """ A camera has been assessed.
+    """
+    index: int
+    status: bool
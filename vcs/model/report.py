@@ -1,8 +1,11 @@
 ''' Reporting related classes used by utility.
 
 CameraAssessmentReport: used to store summary and details on the image quality assessment.
+ReportStream: used to write report sections to disk as soon as they complete.
 '''
 import json
+import os
+
 from vcs.model import log
 
 
@@ -12,9 +15,104 @@ def write(path: str, content):
     Args:
         path (str): path to where the report should be written.
     """
-    log.makedirs(log.dirname(path))
+    directory = os.path.dirname(path)
+    if directory:
+        log.makedirs(directory)
     with open(path, 'w', encoding='utf-8') as file:
-        file.write(json.dumps(content, indent=4))
+        json.dump(content, file, indent=4)
+
+
+def write_camera_reports(camera_reports: list, part_number: str, directory: str,
+                         timestamp: str = None) -> list[str]:
+    """ Write the transaction logs for a set of cameras in one batch.
+
+    All logs share a single timestamp so the set can be identified afterwards, and are told
+    apart by camera, as cameras may share a serial number (e.g. empty for an unpopulated slot).
+
+    Args:
+        camera_reports (list[CameraAssessmentReport]): reports to write.
+        part_number (str): part number used in the log names.
+        directory (str): parent logging directory.
+        timestamp (str, optional): timestamp used in the log names.
+            Defaults to the current time.
+
+    Returns:
+        list[str]: paths of the written logs.
+    """
+    timestamp = timestamp or log.get_timestamp()
+    log.makedirs(log.get_transactions_directory_path(directory))
+    paths = []
+    for camera_report in camera_reports:
+        path = log.get_transaction_log_path(
+            part_number, camera_report.serial_number, directory, timestamp,
+            camera_report.camera_id)
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(camera_report.content, file, indent=4)
+        paths.append(path)
+    return paths
+
+
+class ReportStream:
+    """ Appends report sections to a JSON Lines file as each one completes.
+
+    Each line holds either a complete section ('value') or details merged into a section
+    ('update'), so a partial report survives if the session is interrupted.
+    See read_stream() to rebuild the report.
+
+    Args:
+        path (str): path of the JSON Lines file.
+    """
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            log.makedirs(directory)
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8')     #pylint: disable=consider-using-with
+
+
+    def write(self, section: str, value, update=False):
+        """ Append a section to the report.
+
+        Args:
+            section (str): name of the section.
+            value (object): content of the section.
+            update (bool, optional): merge the value into the existing section instead of
+                replacing it. Defaults to False.
+        """
+        line = json.dumps({'section':section, 'update' if update else 'value':value}, default=str)
+        self._file.write(line + '\n')
+        self._file.flush()
+
+
+    def close(self):
+        """ Close the report file.
+        """
+        self._file.close()
+
+
+def read_stream(path: str) -> dict:
+    """ Rebuild a report from the sections written by a ReportStream.
+
+    An incomplete final line, e.g. from an interrupted session, is ignored.
+
+    Args:
+        path (str): path of the JSON Lines file.
+
+    Returns:
+        dict: report sections.
+    """
+    content = {}
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                break
+            if 'update' in entry:
+                content.setdefault(entry['section'], {}).update(entry['update'])
+            else:
+                content[entry['section']] = entry['value']
+    return content
 
 
 class CameraAssessmentReport:
@@ -24,11 +122,13 @@ class CameraAssessmentReport:
         camera_id (object): camera identity.
         camera_status (boolean): pass/fail summary of the image quality assessment.
         iqa_report (dict): image quality assessment details.
+        serial_number (str, optional): camera serial number. Defaults to None.
     """
-    def __init__(self, camera_id, camera_status, iqa_report: dict):
+    def __init__(self, camera_id, camera_status, iqa_report: dict, serial_number=None):
         self._camera_id = camera_id
         self._camera_status = camera_status
         self._iqa_report = iqa_report
+        self._serial_number = serial_number
 
 
     def write(self, path: str):
@@ -37,7 +137,32 @@ class CameraAssessmentReport:
         Args:
             path (str): path to where the report should be written.
         """
-        write(path, self._content)
+        write(path, self.content)
+
+
+    @property
+    def camera_id(self):
+        """ Identity of the assessed camera.
+        """
+        return self._camera_id
+
+
+    @property
+    def serial_number(self):
+        """ Serial number of the assessed camera.
+        """
+        return self._serial_number
+
+
+    def record(self, store, session_id: int):
+        """ Append the assessment to the measurement store.
+
+        Args:
+            store (MeasurementStore): store to write to.
+            session_id (int): id of the session the camera was tested in (see Session.record).
+        """
+        store.add_camera(session_id, self._camera_id, self._serial_number,
+                         self._camera_status, self._iqa_report)
 
 
     def read(self, path: str):
@@ -50,7 +175,9 @@ class CameraAssessmentReport:
 
 
     @property
-    def _content(self):
+    def content(self):
+        """ Report content as written to disk.
+        """
         content = {
             'camera_id':self._camera_id,
             'camera_status':self._camera_status,
@@ -6,6 +6,7 @@ Useful for tracking timing information and common logging details.
 
 from util import timing
 from vcs.model import log
+from vcs.model import report
 
 
 class Session():
@@ -13,32 +14,159 @@ class Session():
     """
     def __init__(self):
         self._report = {}
+        self._failures = []
+        self._stream = None
         self.timestamp = None
         self._timer = timing.Timer()
+        self._spans = timing.SpanTimer()
+
+
+    def reserve(self, force=False):
+        """ Assigns the session timestamp ahead of starting the session.
+
+        Args:
+            force (bool, optional): replace any previously reserved timestamp. Defaults to False.
+        """
+        if force or self.timestamp is None:
+            self.timestamp = log.get_timestamp()
 
 
     def start(self):
         """ Starts the session timers.
+
+        The session timestamp is kept if it has already been reserved.
         """
-        self.timestamp = log.get_timestamp()
+        self.reserve()
         self._timer.start()
 
 
     def stop(self):
         """ Stops the session timers.
+
+        Returns:
+            str: total session time in minutes and seconds.
         """
         self._timer.stop()
-        self.add_section_details('total time', self._timer.total_in_minutes_and_seconds)
+        self.add_section_details('total time', self._timer.total)
+        self.add_section_details('timing', self._spans.to_dict())
+        self.add_section_details('result', self.result)
+        self.add_section_details('failures', self.failures)
+        self.close()
         return self._timer.total_in_minutes_and_seconds
 
 
+    def close(self):
+        """ Close the streamed report (see stream_report), e.g. when the session ends in an
+        error without being stopped.
+        """
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+
+    def span(self, name):
+        """ Time a block of the session, recorded in the 'timing' section of the session logs.
+
+            with session.span('acquire.transfer'):
+                ...
+
+        Args:
+            name (str): dotted name of the span (see timing.SpanTimer).
+        """
+        return self._spans.span(name)
+
+
+    @property
+    def elapsed(self) -> float:
+        """ Seconds the session has been running.
+        """
+        return self._timer.total
+
+
+    def stream_report(self, path):
+        """ Write each section of the session logs to disk as soon as it is added.
+
+        Args:
+            path (str): path of the JSON Lines report (see report.ReportStream).
+        """
+        if self._stream is None:
+            self._stream = report.ReportStream(path)
+            for key, value in self._report.items():
+                self._stream.write(key, value)
+
+
     def add_section_details(self, key, value):
         """ Add a section to the session logs.
         """
         self._report[key] = value
+        if self._stream is not None:
+            self._stream.write(key, value)
+
+
+    def update_section_details(self, key, value: dict):
+        """ Merge details into an existing section of the session logs.
+        """
+        self._report.setdefault(key, {}).update(value)
+        if self._stream is not None:
+            self._stream.write(key, value, update=True)
+
+
+    def add_failure(self, step, reason):
+        """ Record a failure against the session.
+
+        Args:
+            step (str): name of the step where the failure occurred.
+            reason (str): short description of the failure.
+        """
+        self._failures.append(f'{step}: {reason}')
+
+
+    def remove_failure(self, step, reason):
+        """ Remove a previously recorded failure, e.g. after a successful retest.
+
+        Args:
+            step (str): name of the step where the failure occurred.
+            reason (str): short description of the failure.
+        """
+        failure = f'{step}: {reason}'
+        if failure in self._failures:
+            self._failures.remove(failure)
+
+
+    @property
+    def failures(self) -> list[str]:
+        """ List of failures recorded during the session.
+        """
+        return list(self._failures)
+
+
+    @property
+    def result(self) -> str:
+        """ Overall result of the session, either 'PASS' or 'FAIL'.
+        """
+        return 'FAIL' if self._failures else 'PASS'
 
 
     def get_report(self):
         """ Generate a report of all the logged sections.
         """
         return dict(self._report)
+
+
+    def record(self, store, station, resources, batch_dir=None) -> int:
+        """ Append the session results to the measurement store.
+
+        Args:
+            store (MeasurementStore): store to write to.
+            station (str): name of the test station.
+            resources (VCSResources): resources the session was run with.
+            batch_dir (str, optional): batch directory holding the session logs.
+                Defaults to None.
+
+        Returns:
+            int: id of the session within the store.
+        """
+        return store.add_session(
+            self.timestamp, station, self.get_report(), result=self.result,
+            vcu_number=resources.vcu_number, operator_name=resources.operator_name,
+            batch_dir=batch_dir)
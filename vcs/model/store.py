@@ -0,0 +1,310 @@
+''' Append-only store of test results across all sessions.
+
+Results are kept in a local SQLite database alongside the per-batch log files so that history
+queries (e.g. every result for a serial number, or a temperature trend over a month) do not
+have to walk and parse the logging directory.
+
+Numeric values found in the session and camera reports are also stored individually as
+measurements, named by their dotted path within the report (e.g. 'thermal check.temperatures.cpu').
+'''
+import datetime
+import json
+import os
+import sqlite3
+import threading
+from typing import Optional
+
+from vcs.model import log
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    station TEXT NOT NULL,
+    vcu_number TEXT,
+    operator_name TEXT,
+    result TEXT,
+    batch_dir TEXT,
+    report TEXT
+);
+CREATE TABLE IF NOT EXISTS cameras (
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    position INTEGER NOT NULL,
+    serial_number TEXT,
+    status INTEGER,
+    report TEXT
+);
+CREATE TABLE IF NOT EXISTS measurements (
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    position INTEGER,
+    name TEXT NOT NULL,
+    value REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_timestamp ON sessions(timestamp);
+CREATE INDEX IF NOT EXISTS sessions_station ON sessions(station, timestamp);
+CREATE INDEX IF NOT EXISTS sessions_vcu_number ON sessions(vcu_number);
+CREATE INDEX IF NOT EXISTS cameras_session ON cameras(session_id);
+CREATE INDEX IF NOT EXISTS cameras_serial_number ON cameras(serial_number);
+CREATE INDEX IF NOT EXISTS cameras_position ON cameras(position);
+CREATE INDEX IF NOT EXISTS measurements_name ON measurements(name, session_id);
+'''
+
+# Session report sections holding per-camera details; their measurements are recorded against
+# the camera position through add_camera instead.
+CAMERA_SECTIONS = ('process images',)
+
+
+class MeasurementStore():
+    """ Append-only, indexed store of session and camera results.
+
+    Safe to share between threads.  Use as a context manager to group writes into a single
+    transaction, e.g. a session and all of its cameras.
+
+    Args:
+        path (str): path to the database file.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if path != ':memory:' and directory:
+            log.makedirs(directory)
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        with self._lock:
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.executescript(SCHEMA)
+
+
+    def __enter__(self):
+        self._lock.acquire()
+        self._depth += 1
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self._depth -= 1
+            if self._depth == 0:
+                if exc_type is None:
+                    self._connection.commit()
+                else:
+                    self._connection.rollback()
+        finally:
+            self._lock.release()
+
+
+    def close(self):
+        """ Close the database.
+        """
+        with self._lock:
+            self._connection.close()
+
+
+    def add_session(self, timestamp: str, station: str, report: dict, result: str = None,
+                    vcu_number: str = None, operator_name: str = None,
+                    batch_dir: str = None) -> int:
+        """ Append the results of a session.
+
+        Args:
+            timestamp (str): session timestamp (see log.get_timestamp).
+            station (str): name of the test station.
+            report (dict): session report (see Session.get_report).
+            result (str, optional): overall result. Defaults to None.
+            vcu_number (str, optional): VCU number of the unit under test. Defaults to None.
+            operator_name (str, optional): name of the operator. Defaults to None.
+            batch_dir (str, optional): batch directory holding the session logs. Defaults to None.
+
+        Returns:
+            int: id of the new session, used to add the related cameras.
+        """
+        with self:
+            cursor = self._connection.execute(
+                'INSERT INTO sessions (timestamp, station, vcu_number, operator_name, result, '
+                'batch_dir, report) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (timestamp, station, vcu_number, operator_name, result, batch_dir,
+                 json.dumps(report, default=str)))
+            self._add_measurements(cursor.lastrowid, None, _flatten(
+                {key:value for key, value in report.items() if key not in CAMERA_SECTIONS}))
+        return cursor.lastrowid
+
+
+    def add_camera(self, session_id: int, position: int, serial_number: str,
+                   status: Optional[bool], report: dict):
+        """ Append the results of a camera assessed during a session.
+
+        Args:
+            session_id (int): id returned by add_session.
+            position (int): camera position (index).
+            serial_number (str): camera serial number.
+            status (Optional[bool]): pass/fail status, None if not assessed.
+            report (dict): image quality assessment scores keyed by image path.  Scores are
+                recorded as 'image quality.<score>' measurements.
+        """
+        with self:
+            self._connection.execute(
+                'INSERT INTO cameras (session_id, position, serial_number, status, report) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (session_id, position, serial_number, status, json.dumps(report, default=str)))
+            self._add_measurements(session_id, position, [
+                measurement for scores in report.values()
+                for measurement in _flatten(scores, 'image quality.')])
+
+
+    def _add_measurements(self, session_id, position, measurements):
+        self._connection.executemany(
+            'INSERT INTO measurements (session_id, position, name, value) VALUES (?, ?, ?, ?)',
+            [(session_id, position, name, value) for name, value in measurements])
+
+
+    def sessions(self, serial_number: str = None, vcu_number: str = None, station: str = None,
+                 since=None, until=None, result: str = None, limit: int = None) -> list[dict]:
+        """ Find sessions, most recent first.
+
+        Args:
+            serial_number (str, optional): only sessions that tested this camera serial number.
+            vcu_number (str, optional): only sessions for this VCU number.
+            station (str, optional): only sessions run on this station.
+            since (str or datetime, optional): only sessions at or after this time.
+            until (str or datetime, optional): only sessions before this time.
+            result (str, optional): only sessions with this result, e.g. 'FAIL'.
+            limit (int, optional): maximum number of sessions to return.
+
+        Returns:
+            list[dict]: matching sessions, with the report decoded.
+        """
+        query = 'SELECT sessions.* FROM sessions'
+        conditions, parameters = self._session_conditions(station, since, until)
+        if serial_number is not None:
+            conditions.append(
+                'id IN (SELECT session_id FROM cameras WHERE serial_number = ?)')
+            parameters.append(serial_number)
+        if vcu_number is not None:
+            conditions.append('vcu_number = ?')
+            parameters.append(vcu_number)
+        if result is not None:
+            conditions.append('result = ?')
+            parameters.append(result)
+        rows = self._select(query, conditions, parameters, 'timestamp DESC, id DESC', limit)
+        return [_decode(row) for row in rows]
+
+
+    def cameras(self, serial_number: str = None, position: int = None, station: str = None,
+                since=None, until=None, limit: int = None) -> list[dict]:
+        """ Find camera results, most recent first.
+
+        Args:
+            serial_number (str, optional): only cameras with this serial number.
+            position (int, optional): only cameras in this position.
+            station (str, optional): only cameras tested on this station.
+            since (str or datetime, optional): only results at or after this time.
+            until (str or datetime, optional): only results before this time.
+            limit (int, optional): maximum number of results to return.
+
+        Returns:
+            list[dict]: matching camera results with the session timestamp, station and
+                VCU number.
+        """
+        query = ('SELECT cameras.*, sessions.timestamp, sessions.station, sessions.vcu_number '
+                 'FROM cameras JOIN sessions ON sessions.id = cameras.session_id')
+        conditions, parameters = self._session_conditions(station, since, until)
+        if serial_number is not None:
+            conditions.append('serial_number = ?')
+            parameters.append(serial_number)
+        if position is not None:
+            conditions.append('position = ?')
+            parameters.append(position)
+        rows = self._select(query, conditions, parameters, 'timestamp DESC, session_id DESC',
+                            limit)
+        return [_decode(row) for row in rows]
+
+
+    def measurements(self, name: str, position: int = None, station: str = None,
+                     since=None, until=None) -> list[tuple[str, float]]:
+        """ Trend of a single measurement over time, oldest first.
+
+        Args:
+            name (str): dotted measurement name, e.g. 'thermal check.temperatures.cpu'.
+            position (int, optional): only measurements for this camera position.
+            station (str, optional): only measurements taken on this station.
+            since (str or datetime, optional): only measurements at or after this time.
+            until (str or datetime, optional): only measurements before this time.
+
+        Returns:
+            list[tuple[str, float]]: (session timestamp, value) pairs.
+        """
+        query = ('SELECT sessions.timestamp, measurements.value '
+                 'FROM measurements JOIN sessions ON sessions.id = measurements.session_id')
+        conditions, parameters = self._session_conditions(station, since, until)
+        conditions.append('name = ?')
+        parameters.append(name)
+        if position is not None:
+            conditions.append('position = ?')
+            parameters.append(position)
+        rows = self._select(query, conditions, parameters, 'timestamp, session_id')
+        return [tuple(row) for row in rows]
+
+
+    def measurement_names(self) -> list[str]:
+        """ Names of all the measurements recorded so far.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT DISTINCT name FROM measurements ORDER BY name').fetchall()
+        return [row[0] for row in rows]
+
+
+    @staticmethod
+    def _session_conditions(station, since, until):
+        conditions, parameters = [], []
+        if station is not None:
+            conditions.append('station = ?')
+            parameters.append(station)
+        if since is not None:
+            conditions.append('timestamp >= ?')
+            parameters.append(_to_timestamp(since))
+        if until is not None:
+            conditions.append('timestamp < ?')
+            parameters.append(_to_timestamp(until))
+        return conditions, parameters
+
+
+    def _select(self, query, conditions, parameters, order, limit=None):
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += f' ORDER BY {order}'
+        if limit is not None:
+            query += ' LIMIT ?'
+            parameters.append(limit)
+        with self._lock:
+            return self._connection.execute(query, parameters).fetchall()
+
+
+
+def _to_timestamp(value) -> str:
+    """ Convert a datetime to the session timestamp format; strings are used as is.
+    """
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.strftime('%Y%m%dT%H%M%S')
+    return value
+
+
+def _decode(row) -> dict:
+    content = dict(row)
+    if content.get('report') is not None:
+        content['report'] = json.loads(content['report'])
+    if content.get('status') is not None:
+        content['status'] = bool(content['status'])
+    return content
+
+
+def _flatten(content, prefix=''):
+    """ Yields (dotted name, value) for every numeric value in a nested report.
+    """
+    if isinstance(content, dict):
+        for key, value in content.items():
+            yield from _flatten(value, f'{prefix}{key}.')
+    elif isinstance(content, (int, float)) and not isinstance(content, bool):
+        yield prefix[:-1], float(content)
@@ -1,5 +1,7 @@
 ''' Classes to support interaction with the VCU.
 '''
+import hashlib
+import os
 import re
 import logging
 from fabric import Connection
@@ -9,6 +11,19 @@ VISALPHAC_PATH = r'~/abc3dv2/visalphac'
 I2C_ID_FOR_DESERIALIZER_1 = 9
 I2C_ID_FOR_DESERIALIZER_2 = 10
 PASSWORD = application.settings.values.vcu_password
+CAPTURE_DIRECTORY = 'camera-capture/images'
+# Number of times a file is downloaded before giving up on a corrupt or short transfer
+TRANSFER_ATTEMPTS = 3
+
+# Single sensor pipeline, matching the pipelines used in assets/capture.sh.
+CAPTURE_PIPELINE = (
+    'nvarguscamerasrc num-buffers=25 sensor-id={sensor_id} '
+    '! "video/x-raw(memory:NVMM),width=1280,height=720" '
+    '! nvvidconv ! "video/x-raw, format=RGBA, width=1280,height=720" '
+    '! queue leaky=2 max-size-buffers=1 ! pngenc '
+    '! multifilesink location=$HOME/camera-capture/images/device{sensor_id}_'
+    "`date +'%Y%m%dT%H%M%S'`.png"
+)
 
 i2cdetect_extractor = re.compile(
     r'^40:\s(--|UU)\s(--|UU)\s(--|UU)\s(--|UU)', re.DOTALL|re.MULTILINE)
@@ -48,16 +63,51 @@ class VCU:
         self._connection.close()
 
 
-    def acquire_images(self, destination):
+    def acquire_images(self, destination, sensor_ids=None) -> list[str]:
         """ Capture and download a set of images and movies from all 8 cameras.
 
-        Uses SCP to copy images back to host machine.
+        Uses SFTP to copy images back to host machine, verifying each file against a checksum
+        calculated on the VCU.
 
         Args:
             destination (str): path to the folder where images will be copied
+            sensor_ids (list[int], optional): only capture and download images from these
+                sensors. Defaults to None, which uses all cameras.
+
+        Returns:
+            list[str]: paths to the downloaded files.
+        """
+        self.capture_images(sensor_ids)
+        return self.download_images(destination, sensor_ids)
+
+
+    def capture_images(self, sensor_ids=None):
+        """ Capture a set of images on the VCU.
+
+        Args:
+            sensor_ids (list[int], optional): only capture images from these sensors.
+                Defaults to None, which uses all cameras.
+        """
+        if sensor_ids is None:
+            _capture_camera_output_v3(self._connection)
+        else:
+            _capture_sensor_output(self._connection, sensor_ids)
+
+
+    def download_images(self, destination, sensor_ids=None) -> list[str]:
+        """ Download captured images from the VCU.
+
+        Args:
+            destination (str): path to the folder where images will be copied
+            sensor_ids (list[int], optional): only download images from these sensors.
+                Defaults to None, which downloads everything.
+
+        Returns:
+            list[str]: paths to the downloaded files.
         """
-        _capture_camera_output_v3(self._connection)
-        _get_contents(self._connection, 'camera-capture/images', destination)
+        prefixes = None if sensor_ids is None else \
+            tuple(f'device{sensor_id}_' for sensor_id in sensor_ids)
+        return _get_contents(self._connection, CAPTURE_DIRECTORY, destination, prefixes)
 
 
     def generate_camera_position_lookup(self) -> dict:
@@ -214,14 +264,102 @@ def _capture_camera_output_v3(connection):
     logging.debug(output)
 
 
-def _list_contents(connection, target):
-    parts = [part for part in connection.run(f'ls {target}').stdout.split('\n') if part]
-    logging.debug("List contents of %s: %s", target, parts)
-    return parts
+def _build_capture_command(sensor_ids: list[int]) -> str:
+    pipelines = ' '.join(CAPTURE_PIPELINE.format(sensor_id=sensor_id) for sensor_id in sensor_ids)
+    return f'gst-launch-1.0 -v {pipelines}'
+
+
+def _capture_sensor_output(connection, sensor_ids: list[int]):
+    """ Capture images from a subset of sensors, replacing any earlier images from them.
+    """
+    stale = ' '.join(f'{CAPTURE_DIRECTORY}/device{sensor_id}_*' for sensor_id in sensor_ids)
+    output = connection.run(f'mkdir -p {CAPTURE_DIRECTORY} && rm -f {stale}')
+    logging.debug(output)
+    output = connection.run(_build_capture_command(sensor_ids), echo=True)
+    logging.debug(output)
+
+    # Restart the argus daemon to avoid issues with repeatablility (see _capture_camera_output_v3)
+    output = connection.run(f'echo {PASSWORD} | sudo -S systemctl restart nvargus-daemon')
+    logging.debug(output)
+
+
+def _list_checksums(connection, target) -> dict[str, str]:
+    """ List the files in a remote directory along with their SHA-1 checksums in one command.
+
+    Returns:
+        dict[str, str]: checksum keyed by file name, in listing order.
+    """
+    response = connection.run(
+        f'cd {target} && find . -maxdepth 1 -type f -exec sha1sum {{}} + | sort -k 2')
+    checksums = {}
+    for match in hash_extractor.finditer(response.stdout):
+        filehash, filename = match.groups()
+        checksums[os.path.basename(filename.strip())] = filehash
+    logging.debug("List checksums of %s: %s", target, checksums)
+    return checksums
+
+
+class _HashingWriter():                                     #pylint: disable=too-few-public-methods
+    """ File-like wrapper that calculates the SHA-1 checksum of the data written through it.
+    """
+    def __init__(self, fref):
+        self._fref = fref
+        self.hash = hashlib.sha1()
+        self.size = 0
+
+
+    def write(self, data):
+        self.hash.update(data)
+        self.size += len(data)
+        return self._fref.write(data)
+
 
+def _get_file(connection, src, dst, checksum, attempts=TRANSFER_ATTEMPTS) -> bool:
+    """ Download a file, checking it against the checksum as the data arrives.
 
-def _get_contents(connection, src, dst):
-    parts = _list_contents(connection, src)
+    Corrupt or short transfers are downloaded again, and the file is only moved into place once
+    it matches the checksum.
+
+    Returns:
+        bool: True if the file was downloaded intact.
+    """
+    partial = f'{dst}.part'
+    for attempt in range(1, attempts + 1):
+        try:
+            with open(partial, 'wb') as fref:
+                writer = _HashingWriter(fref)
+                connection.get(src, writer)
+        except OSError as err:
+            logging.warning('Transfer of %s failed (attempt %d of %d): %s',
+                            src, attempt, attempts, err)
+            continue
+
+        received = writer.hash.hexdigest()
+        if received == checksum:
+            os.replace(partial, dst)
+            return True
+        logging.warning('Checksum mismatch for %s (attempt %d of %d): expected %s, received %s '
+                        '(%d bytes)', src, attempt, attempts, checksum, received, writer.size)
+
+    if os.path.exists(partial):
+        os.remove(partial)
+    logging.error('Unable to download %s intact after %d attempts', src, attempts)
+    return False
+
+
+def _get_contents(connection, src, dst, prefixes=None):
+    """ Download the files in a remote directory, verifying each against its remote checksum.
+
+    Files that cannot be downloaded intact are left out of the returned paths, so only the
+    affected cameras fail rather than the whole transfer.
+    """
+    checksums = _list_checksums(connection, src)
+    parts = list(checksums)
+    if prefixes is not None:
+        parts = [part for part in parts if part.startswith(prefixes)]
+    paths = []
     for part in parts:
         print('.', end='')
-        connection.get(f'{src}/{part}', f'{dst}/{part}')
+        if _get_file(connection, f'{src}/{part}', f'{dst}/{part}', checksums[part]):
+            paths.append(f'{dst}/{part}')
+    return paths
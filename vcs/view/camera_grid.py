@@ -3,10 +3,16 @@
 CameraGrid
 CameraItem
 """
+import collections
+import functools
+import os
+import threading
 import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import ttk
-from PIL import Image, ImageTk, ImageDraw, UnidentifiedImageError
+from PIL import Image, ImageTk, ImageDraw
 
+from vcs.model import image_cache
 from vcs.model.camera import Camera
 
 DEBUG = False
@@ -20,6 +26,7 @@ COLOR_FAIL = 'red'
 COLOR_PASS = 'green1'
 
 DEFAULT_TINT_COLOR = (COLOR_PASS)
+MARK_COLORS = (COLOR_PASS, COLOR_FAIL)
 DEFAULT_TRANSPARENCY = .35
 DEFAULT_OPACITY = int(255 * DEFAULT_TRANSPARENCY)
 MARK_OUTLINE_WIDTH = 20
@@ -27,6 +34,130 @@ MARK_FILLED = False
 
 PAD = 2
 
+# Thumbnails are decoded off the UI thread and cached by path and modification time.
+THUMBNAIL_WORKERS = 4
+THUMBNAIL_CACHE_SIZE = 64
+THUMBNAIL_POLL_PERIOD = 20
+
+
+class ThumbnailCache():
+    """ Thread-safe least-recently-used cache of thumbnails keyed by path and modification time.
+
+    Each entry holds the layers of a thumbnail (see load_layers).
+
+    Args:
+        capacity (int, optional): maximum number of thumbnails kept. Defaults to THUMBNAIL_CACHE_SIZE.
+    """
+    def __init__(self, capacity=THUMBNAIL_CACHE_SIZE):
+        self._capacity = capacity
+        self._items = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+
+    def get(self, key):
+        """ Returns the thumbnail stored for key, or None if not cached.
+        """
+        with self._lock:
+            if key not in self._items:
+                return None
+            self._items.move_to_end(key)
+            return self._items[key]
+
+
+    def put(self, key, image):
+        """ Stores a thumbnail, discarding the least recently used one when full.
+        """
+        with self._lock:
+            self._items[key] = image
+            self._items.move_to_end(key)
+            while len(self._items) > self._capacity:
+                self._items.popitem(last=False)
+
+
+_thumbnails = ThumbnailCache()
+_thumbnail_pool = ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS, thread_name_prefix='thumbnail')
+
+
+def get_thumbnail_key(image_path: str, marks: tuple = ()) -> tuple:
+    """ Returns the cache key for an image file.
+    """
+    return (os.path.abspath(image_path), os.stat(image_path).st_mtime_ns, marks)
+
+
+@functools.lru_cache(maxsize=16)
+def get_overlay(size: tuple, color: tuple, opacity: int, outline_width: int) -> Image.Image:
+    """ Returns the semi-transparent frame used to highlight an image.
+
+    Overlays are cached, so each size/color combination is only drawn once.
+
+    Args:
+        size (tuple): image (width, height).
+        color (tuple): (red, green, blue) color of the frame.
+        opacity (int): opacity of the frame (0-255).
+        outline_width (int): width of the frame.
+
+    Returns:
+        Image.Image: RGBA overlay.
+    """
+    overlay = Image.new('RGBA', size, color+(0,))
+    draw = ImageDraw.Draw(overlay)
+    fill = color+(opacity,) if MARK_FILLED else None
+    draw.rectangle(((0,0), size),
+                   fill=fill,
+                   outline=color+(opacity, ),
+                   width=outline_width,
+                   )
+    return overlay
+
+
+def compose_layers(thumbnail: Image.Image, marks: tuple) -> dict:
+    """ Pre-composite each highlight over a thumbnail.
+
+    Args:
+        thumbnail (Image.Image): RGBA thumbnail.
+        marks (tuple): (color, opacity, outline_width) of each highlight to prepare.
+
+    Returns:
+        dict: images keyed by mark, with the plain thumbnail stored under None.
+    """
+    layers = {None:thumbnail}
+    for mark in marks:
+        layers[mark] = Image.alpha_composite(thumbnail, get_overlay(thumbnail.size, *mark))
+    return layers
+
+
+@functools.lru_cache(maxsize=4)
+def get_blank_layers(marks: tuple) -> dict:
+    """ Returns the layers displayed when no image is available.
+    """
+    return compose_layers(Image.new('RGBA', (MAX_IMAGE_WIDTH, MAX_IMAGE_HEIGHT)), marks)
+
+
+def load_layers(image_path: str, marks: tuple = ()) -> dict:
+    """ Decode an image reduced to fit the camera grid and prepare its highlighted versions.
+
+    The decoded image is shared with image analysis through vcs.model.image_cache and
+    reduced by block averaging before the final resize.  Safe to call from any thread.
+
+    Args:
+        image_path (str): path to the image.
+        marks (tuple, optional): highlights to prepare (see compose_layers). Defaults to ().
+
+    Returns:
+        dict: RGBA images keyed by mark, with the plain thumbnail stored under None.
+    """
+    key = get_thumbnail_key(image_path, marks)
+    layers = _thumbnails.get(key)
+    if layers is None:
+        image = Image.fromarray(image_cache.read(image_path))
+        resize_ratio = min(MAX_IMAGE_WIDTH/image.width, MAX_IMAGE_HEIGHT/image.height)
+        size = (round(image.width*resize_ratio), round(image.height*resize_ratio))
+        thumbnail = image.resize(size, reducing_gap=2.0).convert('RGBA')
+        layers = compose_layers(thumbnail, marks)
+        _thumbnails.put(key, layers)
+    return layers
+
+
 class CameraGrid(tk.Frame):
     """ A tkinter widget displaying a grid of camera images.
 
@@ -110,7 +241,11 @@ class CameraItem(tk.Frame):
     def __init__(self, parent: tk.Widget, index: int, *args, **kwargs):
         super().__init__(parent, *args, **kwargs)
         self.parent = parent
-        self._source_image = None
+        self._layers = None
+        self._photos = {}
+        self._pending = None
+        self._mark = None
+        self._marks = tuple(self._get_mark(color) for color in MARK_COLORS)
 
         name = f"Camera {index+1}"
         self._lf = ttk.LabelFrame(self, text=name)
@@ -124,19 +259,51 @@ class CameraItem(tk.Frame):
     def set_image(self, image_path=None):
         """ Display an image.
 
+        The image is decoded, and the pass/fail highlights composited, in the background and
+        displayed once ready; cached thumbnails are displayed immediately.
+
         Args:
             image_path (str, optional): path to an image to display. Defaults to None.
         """
+        self._mark = None
+        self._pending = None
+        if image_path is None:
+            self._set_source(get_blank_layers(self._marks))
+            return
+
+        try:
+            layers = _thumbnails.get(get_thumbnail_key(image_path, self._marks))
+        except OSError:
+            layers = None
+        if layers is not None:
+            self._set_source(layers)
+        else:
+            self._pending = _thumbnail_pool.submit(load_layers, image_path, self._marks)
+            self.after(THUMBNAIL_POLL_PERIOD, self._check_pending, self._pending)
+
+
+    def _check_pending(self, future):
+        if future is not self._pending:
+            # Superseded by a later call to set_image()
+            return
+        if not future.done():
+            self.after(THUMBNAIL_POLL_PERIOD, self._check_pending, future)
+            return
+
+        self._pending = None
         try:
-            image = Image.open(image_path)
-            resize_ratio = min(MAX_IMAGE_WIDTH/image.width, MAX_IMAGE_HEIGHT/image.height)
-            size = (image.width, image.height)
-            resized_image = image.resize((round(size[0]*resize_ratio), round(size[1]*resize_ratio)))
-            self._source_image = resized_image
-        except (AttributeError, UnidentifiedImageError):
-            # Create a blank image of the expected size if we are unable to open the given path
-            self._source_image = Image.new('RGBA', (MAX_IMAGE_WIDTH, MAX_IMAGE_HEIGHT))
-        self._draw(self._source_image)
+            self._set_source(future.result())
+        except (OSError, ValueError):
+            # Display a blank image of the expected size if we are unable to open the given path
+            self._set_source(get_blank_layers(self._marks))
+
+
+    def _set_source(self, layers):
+        if layers is not self._layers:
+            # PhotoImages are created up front so marking only has to swap the displayed image.
+            self._layers = layers
+            self._photos = {mark:ImageTk.PhotoImage(image) for mark, image in layers.items()}
+        self._draw(self._mark)
 
 
     def mark(self, color_name=DEFAULT_TINT_COLOR, opacity=DEFAULT_OPACITY,
@@ -151,27 +318,28 @@ class CameraItem(tk.Frame):
             outline_width (int, optional): Width of the semi-transparent outline.
                 Defaults to MARK_OUTLINE_WIDTH.
         """
-        color = self._rgb(color_name)
-        target_image = self._source_image
-        overlay = Image.new('RGBA', target_image.size, color+(0,))
-        draw = ImageDraw.Draw(overlay)
-        fill = color+(opacity,) if MARK_FILLED else None
-        draw.rectangle(((0,0), target_image.size),
-                       fill=fill,
-                       outline=color+(opacity, ),
-                       width=outline_width,
-                       )
-        colored_image = Image.alpha_composite(target_image, overlay)
-        self._draw(colored_image)
+        self._mark = self._get_mark(color_name, opacity, outline_width)
+        if self._pending is not None:
+            # Applied once the image has loaded
+            return
+        if self._mark not in self._photos:
+            # Only highlights other than pass/fail need to be composited here.
+            image = compose_layers(self._layers[None], (self._mark,))[self._mark]
+            self._photos[self._mark] = ImageTk.PhotoImage(image)
+        self._draw(self._mark)
+
+
+    def _get_mark(self, color_name, opacity=DEFAULT_OPACITY, outline_width=MARK_OUTLINE_WIDTH):
+        return (self._rgb(color_name), opacity, outline_width)
 
 
     def _rgb(self, colorname):
-        """ Returns 3-part color tuple for the corresponding colorname.
+        """ Returns 3-part 8-bit color tuple for the corresponding colorname.
         """
-        return self.winfo_rgb(colorname)
+        return tuple(value // 257 for value in self.winfo_rgb(colorname))
 
 
-    def _draw(self, image):
-        imagetk = ImageTk.PhotoImage(image)
+    def _draw(self, mark=None):
+        imagetk = self._photos[mark]
         self._label.config(image=imagetk)
         self._label.image = imagetk
@@ -1,16 +1,38 @@
 ''' Module provides Tk widget for visualizing output log '''
+import collections
+import logging
 import tkinter as tk
+from dataclasses import dataclass
 
 from util.gui import add_scrollbar
 
 
+@dataclass
+class LogRecord:
+    """ Text inserted into the log along with the details used to filter it.
+    """
+    text: str
+    level: int = logging.INFO
+    step: object = None
+
+
 class LogOutput():
     """ Tk Widget for displaying log information in a scollable frame.
 
+    The displayed text is backed by a fixed-capacity ring buffer of records, so memory use
+    stays flat however long the application runs.  Inserts are collected and applied to the
+    widget in a single batch once the UI is idle, and old lines are trimmed in bulk.
+
     Args:
         tk (Frame): parent frame/object
+        capacity (int, optional): maximum number of records (and displayed lines) kept.
+            Defaults to CAPACITY.
     """
-    def __init__(self, parent):
+    CAPACITY = 5000
+    # Lines allowed past capacity before the widget is trimmed, so trims happen in bulk.
+    TRIM_SLACK = 500
+
+    def __init__(self, parent, capacity=CAPACITY):
         self.frame = tk.Frame(parent, width=100)
 
         self._output = add_scrollbar(
@@ -18,30 +40,90 @@ class LogOutput():
                     highlightthickness=1, bd=0, fg='black'))
         self._output.pack(fill=tk.BOTH, expand=True)
 
+        self._capacity = capacity
+        self._records = collections.deque(maxlen=capacity)
+        self._pending = []
+        self._flush_id = None
+        self._level = logging.NOTSET
+        self._step = None
+        self.step = None
+
 
-    def insert(self, message, newline=True):
+    def insert(self, message, newline=True, level=logging.INFO):
         """ Inserts text into the logged output buffer.
 
-            NOTE: the output Text element must have it's state configured to allow for the
-            additional text, and then changed back to prevent the user from altering the
-            text.
+            NOTE: the text is added to the widget the next time the UI is idle.
         Args:
             message (str): Text to add to the output display buffer.
             newline (bool, optional): If enabled, adds a newline to the message.
                 Can be disabled to allow for custom manipulation of the buffer.
                 Defaults to True.
+            level (int, optional): logging level of the message. Defaults to logging.INFO.
         """
         if newline:
             message += '\n'
+        record = LogRecord(message, level, self.step)
+        self._records.append(record)
+        if self._matches(record):
+            self._pending.append(message)
+            if self._flush_id is None:
+                self._flush_id = self._output.after_idle(self._flush)
+
+
+    def _matches(self, record: LogRecord) -> bool:
+        return record.level >= self._level and (self._step is None or record.step == self._step)
+
+
+    def _flush(self):
+        """ Apply all pending inserts to the widget at once.
+        """
+        self._flush_id = None
+        if not self._pending:
+            return
+        text = ''.join(self._pending)
+        self._pending.clear()
+
         self._output.config(state=tk.NORMAL)
-        self._output.insert(tk.END, message)
+        self._output.insert(tk.END, text)
+        lines = int(self._output.index('end-1c').split('.')[0])
+        if lines > self._capacity + self.TRIM_SLACK:
+            self._output.delete('1.0', f'{lines - self._capacity}.0')
         self._output.yview_moveto(1)
         self._output.config(state=tk.DISABLED)
 
 
+    def filter(self, level=logging.NOTSET, step=None):
+        """ Only display records at or above the given level, optionally from a single step.
+
+        Records are taken from the buffer, so filtering does not depend on what the
+        widget currently holds.
+
+        Args:
+            level (int, optional): minimum logging level to display. Defaults to logging.NOTSET.
+            step (object, optional): only display records logged during this step.
+                Defaults to None, which displays records from every step.
+        """
+        self._level = level
+        self._step = step
+        self._pending = [record.text for record in self._records if self._matches(record)]
+        self._output.config(state=tk.NORMAL)
+        self._output.delete('1.0', tk.END)
+        self._output.config(state=tk.DISABLED)
+        self._flush()
+
+
+    @property
+    def records(self) -> list[LogRecord]:
+        """ Records currently held in the buffer, oldest first.
+        """
+        return list(self._records)
+
+
     def clear(self):
         """ Clears the contents of the widget.
         """
+        self._records.clear()
+        self._pending.clear()
         self._output.config(state=tk.NORMAL)
         self._output.delete('1.0', tk.END)
         self._output.config(state=tk.DISABLED)
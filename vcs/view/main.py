@@ -6,6 +6,7 @@ from tkinter import filedialog
 
 from util.gui import StatusBar
 from vcs.model import application
+from vcs.model import messages
 from vcs.control.controller import ExecutorController
 from vcs.model.bgstates import BGStates
 from vcs.model.resources import VCSResources
@@ -40,6 +41,8 @@ class MainLayout(tk.Frame):
         menubar.add_cascade(label="File", menu=filemenu)
         filemenu.add_command(label="Open Logging Directory",
                              command=self._cmd_open_logging_dir)
+        filemenu.add_command(label="Export Logs...",
+                             command=self._cmd_export_logs)
         filemenu.add_command(label="Update Baseline Images",
                              command=self._cmd_update_baseline_images)
 
@@ -125,8 +128,7 @@ class MainLayout(tk.Frame):
 
             #AV taken start time when press button 
             self._start_time = str(datetime.datetime.now().strftime('%Y-%m-%d T%H:%M:%S'))           
-            application.settings.load()
-            application.settings.save()
+            application.settings.refresh()
             # VCU_NUMBER = ""
             # try:
             #     f = open("vcunumber.txt", "r")
@@ -139,6 +141,8 @@ class MainLayout(tk.Frame):
      
             # if VCU_NUMBER != "":
             VCU_NUMBER = ""
+            # Queues the unit if a test is already running, so the list can be cleared for the
+            #   next unit right away.
             self.controller.start(
                 VCSResources(
                     vcu_number=VCU_NUMBER,
@@ -149,6 +153,9 @@ class MainLayout(tk.Frame):
                     deserializer_lookup = self._mapper.get_deserializer_lookup(),
                 )
             )
+            self._device_list.clear()
+            self._device_list.select(0)
+            self.focus()
             # else:
                 # tk.messagebox.showerror('Error','VCU NUMBER can not be empty!')
 
@@ -158,6 +165,14 @@ class MainLayout(tk.Frame):
         self.controller.open_logging_dir()
 
 
+    def _cmd_export_logs(self):
+        # Open dialog to have user select where to export the logs to, e.g. a thumb drive
+        path = filedialog.askdirectory(
+            title="Select a directory to export the logs to",
+        )
+        self.controller.export_logs(path)
+
+
     def _cmd_update_baseline_images(self):
         # Open dialog to have user select a directory to use as the new baseline image
         path = filedialog.askdirectory(
@@ -183,51 +198,57 @@ class MainLayout(tk.Frame):
         self._log_output.insert('Background worker finalized')
 
 
-    def update_handler(self, message: dict):
+    def update_handler(self, message: messages.Message):
         """ Handle messages from the controller.
 
         Args:
-            message (dict): dictionary of named messages.
+            message (messages.Message): message posted by the controller.
 
         Raises:
-            NotImplementedError: Raised if an unknown message key is receiving from the controller.
+            NotImplementedError: Raised if an unknown message type is received from the controller.
         """
-        for key, value in message.items():
-            if key == 'state':
-                self._status_bar.set(f'{value}')
-                if value is BGStates.SETUP:
-                    self._log_output.clear()
-                    self._camera_grid.clear()
-
-                    #AV show information iside log GUI
-                    self._log_output.insert(f'Operator Name: {str(self._input_operator_name.get())}',True)
-                    self._log_output.insert(f'Start Time: {str(self._start_time)}',True)
-                if value is BGStates.CLEANUP:
-                    self._device_list.clear()
-                    self._device_list.select(0)
-                    self.focus()
-                if value is not BGStates.IDLE:
-                    #AV show information iside log GUI with steps
-
-                    self._step_count = self._step_count + 1
-                    self._log_output.insert(f"")
-                    self._log_output.insert(f"---------------- STEP {self._step_count} ----------------")
-                    self._log_output.insert(f"------------------------------------------")
-                    self._log_output.insert(f"")
-                    self._log_output.insert(f'Step: {value}')      
-            elif key == 'msg':
-                self._log_output.insert(value[0], newline=value[1])
-            elif key == 'ask':
-                statement, question = value
-                self._ask_user(statement, question)
-            elif key == 'prompt':
-                statement, question = value
-                self._prompt_user(statement, question)
-            elif key == 'cameras':
-                self._camera_grid.set(value)
-            elif key == 'pass':
-                self._camera_grid.mark_as_pass(value)
-            elif key == 'fail':
-                self._camera_grid.mark_as_fail(value)
+        if isinstance(message, messages.Status):
+            self._status_bar.set(message.text)
+        elif isinstance(message, messages.StateChanged):
+            if message.state is not BGStates.IDLE:
+                #AV show information iside log GUI with steps
+                self._step_count = self._step_count + 1
+                self._log_output.step = message.state
+                self._log_output.insert('\n'.join((
+                    '',
+                    f'---------------- STEP {self._step_count} ----------------',
+                    '------------------------------------------',
+                    '',
+                    f'Step: {message.state}',
+                )))
+        elif isinstance(message, messages.UnitStarted):
+            self._log_output.clear()
+            self._camera_grid.clear()
+
+            #AV show information iside log GUI
+            self._log_output.insert(f'Operator Name: {message.resources.operator_name}\n'
+                                    f'Start Time: {message.resources.start_time}')
+        elif isinstance(message, messages.Log):
+            self._log_output.insert(message.text, newline=message.newline, level=message.level)
+        elif isinstance(message, messages.Ask):
+            self._ask_user(message.statement, message.question)
+        elif isinstance(message, messages.Prompt):
+            self._prompt_user(message.statement, message.details)
+        elif isinstance(message, messages.CamerasReady):
+            self._camera_grid.set(message.camera_list)
+        elif isinstance(message, messages.CameraMarked):
+            if message.status:
+                self._camera_grid.mark_as_pass(message.index)
             else:
-                raise NotImplementedError(f'Support for {key} not implemented yet!')
+                self._camera_grid.mark_as_fail(message.index)
+        elif isinstance(message, messages.UnitComplete):
+            self._log_output.insert(f"Result: {message.result}")
+        elif isinstance(message, messages.Statistics):
+            cycle_time = message.statistics.get('cycle time')
+            if cycle_time:
+                self._log_output.insert(
+                    f"Cycle time ({cycle_time['count']} units): mean {cycle_time['mean']:.1f} s, "
+                    f"p50 {cycle_time['p50']:.1f} s, p95 {cycle_time['p95']:.1f} s, "
+                    f"p99 {cycle_time['p99']:.1f} s")
+        else:
+            raise NotImplementedError(f'Support for {type(message).__name__} not implemented yet!')
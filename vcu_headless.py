@@ -0,0 +1,65 @@
+''' Launch the Vision Control Unit (VCU) Test Application without a graphical user interface.
+
+Intended for unattended/scripted test cycles such as soak tests and throughput measurements.
+Per-unit results and the final statistics are written to stdout as JSON Lines.
+'''
+import argparse
+import sys
+
+from vcs.control.headless import HeadlessRunner, UnitRequest, read_unit_queue
+from vcs.model import application
+
+MAPPERS = {
+    'vcu':application.MapperForVCUTest,
+    'camera':application.MapperForCameraTest,
+}
+
+
+def parse_args(argv=None):
+    """ Parse the command line arguments.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--operator', default='', help='Name of the operator running the test.')
+    parser.add_argument('--mode', choices=MAPPERS.keys(), default='vcu',
+                        help='Test to run. Defaults to the VCU test.')
+    parser.add_argument('--vcu-number', default='', help='VCU number of the unit under test.')
+    parser.add_argument('--serial', dest='serial_numbers', action='append', default=[],
+                        help='Camera serial number; repeat for each camera position.')
+    parser.add_argument('--queue', help='CSV file listing the units to test '
+                        '(columns: vcu_number, operator_name, serial_numbers).')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='Number of times to run the list of units (for soak testing).')
+    parser.add_argument('--ask', choices=('yes', 'no'), default='no',
+                        help='Answer given to yes/no questions raised during the test.')
+    parser.add_argument('--prompt', choices=('ok', 'cancel'), default='cancel',
+                        help='Answer given to ok/cancel prompts raised during the test.')
+    parser.add_argument('--results', help='Append per-unit results to this JSON Lines file.')
+    parser.add_argument('--verbose', action='store_true', help='Echo the test log to stderr.')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """ Run the test for each requested unit.
+
+    Returns:
+        int: return code where 0 indicates every unit passed.
+    """
+    args = parse_args(argv)
+    if args.queue:
+        units = read_unit_queue(args.queue, args.operator)
+    else:
+        units = [UnitRequest(args.operator, args.vcu_number, args.serial_numbers)]
+
+    runner = HeadlessRunner(
+        MAPPERS[args.mode],
+        answer_ask=args.ask == 'yes',
+        answer_prompt=args.prompt == 'ok',
+        results_path=args.results,
+        verbose=args.verbose,
+    )
+    statistics = runner.run(units * args.repeat)
+    return 0 if statistics['passed'] == statistics['units'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())